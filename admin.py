@@ -0,0 +1,329 @@
+"""Headless administration for scripts and nightly jobs
+
+    python admin.py list [--status Pending] [--strand STEM] [--format csv]
+    python admin.py accept [--strand STEM] [--dry-run]
+    python admin.py reject --ids 12,15
+    python admin.py drop --ids 40 --reason "Transferred"
+    python admin.py stats [--by grade]
+    python admin.py export roster.xlsx --status Accepted
+    python admin.py duplicates
+    python admin.py purge --status Rejected --older-than 30
+    python admin.py archive --older-than 90 [--audit-days 730]
+    python admin.py archive --year 2024-2025
+    python admin.py rollover [--year 2025-2026] [--dry-run] [--undo]
+    python admin.py history 42
+    python admin.py restore --ids 42
+
+Runs through the same StudentRepository as the windows and never imports
+tkinter, so it starts quickly.  ``list`` streams rows to stdout as they are
+fetched; the database is chosen with SHS_DB_BACKEND as usual.  Filters
+default to the current school year (``--year all`` for every year).  Changes are
+audited as ``cli:<login name>``.  Exit status is 0 on success, 2 on a
+database or usage error.
+"""
+import argparse
+import csv
+import getpass
+import json
+import os
+import sys
+
+from choices import (ACCEPTED, DROPPED, PENDING, REJECTED, STATUSES, check_options, current_school_year,
+                     parse_school_year, school_year_label)
+from student_query import SORT_COLUMNS, StudentFilter, format_changes
+from student_repository import BULK_CHUNK, StudentRepository
+
+LIST_FORMATS = ("table", "csv", "jsonl")
+STATS_GROUPS = {"strand": 0, "grade": 1, "gender": 2}
+
+# Status a bulk action moves students from when --status is not given
+ACTIONS = {
+    "accept": (ACCEPTED, PENDING),
+    "reject": (REJECTED, PENDING),
+    "drop": (DROPPED, ACCEPTED),
+}
+
+
+def student_filter(args, with_status=True):
+    return StudentFilter(name=args.name, strand=args.strand, grade_level=args.grade,
+                         status=args.status if with_status else None, gender=args.gender,
+                         sort=getattr(args, "sort", "ID"), descending=getattr(args, "desc", False),
+                         school_year=args.year, archived=getattr(args, "archived", False))
+
+
+def parse_ids(text):
+    try:
+        return [int(part) for part in text.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError("--ids takes comma-separated numbers, e.g. 12,15,20")
+
+
+def cmd_list(repo, args, out):
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else list(SORT_COLUMNS)
+    unknown = [c for c in columns if c not in SORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown column(s): {', '.join(unknown)}")
+
+    if args.format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        write = writer.writerows
+    elif args.format == "jsonl":
+        def write(rows):
+            out.writelines(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows)
+    else:
+        out.write("\t".join(columns) + "\n")
+
+        def write(rows):
+            out.writelines("\t".join(str(value) for value in row) + "\n" for row in rows)
+
+    listed = 0
+    chunks = repo.stream(student_filter(args), columns)
+    try:
+        for rows in chunks:
+            if args.limit:
+                rows = rows[:args.limit - listed]
+            write(rows)
+            out.flush()
+            listed += len(rows)
+            if args.limit and listed >= args.limit:
+                break
+    finally:
+        chunks.close()
+    print(f"{listed} student(s)", file=sys.stderr)
+
+
+def cmd_change(repo, args, out):
+    status, current = ACTIONS[args.command]
+    current = args.status or current
+    matching = student_filter(args, with_status=False)
+
+    if args.dry_run:
+        if args.ids:
+            print(f"Would {args.command} up to {len(args.ids)} student(s)", file=out)
+        else:
+            print(f"Would {args.command} {repo.count_matching(matching, current)} {current} student(s)", file=out)
+        return
+
+    if args.command != "accept":
+        if args.ids:
+            changed = repo.set_status(args.ids, status, reason=args.reason)
+        else:
+            changed = repo.set_status_matching(matching, status, current, reason=args.reason)
+        print(f"{changed} student(s) marked as {status}", file=out)
+        return
+
+    result = _accept_ids(repo, args.ids) if args.ids else repo.accept_matching(matching)
+    print(f"{result.accepted} student(s) marked as Accepted", file=out)
+    if result.waitlisted:
+        print(f"{len(result.waitlisted)} stayed Pending (strand or sections full): "
+              + ",".join(str(i) for i in result.waitlisted), file=out)
+
+
+def _accept_ids(repo, student_ids):
+    # Accepting by id still goes through the capacity engine, at each row's current version
+    rows = [repo.get(student_id) for student_id in student_ids]
+    rows = [row for row in rows if row is not None]
+    return repo.accept([row.id for row in rows], [row.version for row in rows])
+
+
+def cmd_stats(repo, args, out):
+    index = STATS_GROUPS[args.by]
+    table, totals = {}, {status: 0 for status in STATUSES}
+    for row in repo.enrollment_counts(args.year):
+        by_status = table.setdefault(row[index], {})
+        by_status[row[3]] = by_status.get(row[3], 0) + row[4]
+        totals[row[3]] = totals.get(row[3], 0) + row[4]
+
+    out.write("\t".join([args.by.title()] + STATUSES + ["Total"]) + "\n")
+    for group in sorted(table):
+        counts = [table[group].get(status, 0) for status in STATUSES]
+        out.write("\t".join([group] + [str(c) for c in counts] + [str(sum(table[group].values()))]) + "\n")
+    out.write("\t".join(["Total"] + [str(totals[s]) for s in STATUSES] + [str(sum(totals.values()))]) + "\n")
+
+
+def cmd_export(repo, args, out):
+    from exporter import export_students
+
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    exported = export_students(args.file, student_filter(args), columns, fmt=args.format, repo=repo)
+    print(f"{exported} student(s) written to {args.file}", file=out)
+
+
+def cmd_duplicates(repo, args, out):
+    groups = repo.duplicate_groups(statuses=[args.status] if args.status else None)
+    for number, members in enumerate(groups, 1):
+        for row in members:
+            out.write("\t".join([str(number)] + [str(value) for value in row[:9]]) + "\n")
+    print(f"{len(groups)} group(s) of possible duplicates", file=sys.stderr)
+
+
+def cmd_purge(repo, args, out):
+    count = repo.purge(args.status, args.older_than, dry_run=args.dry_run)
+    verb = "Would delete" if args.dry_run else "Deleted"
+    print(f"{verb} {count} {args.status} student(s) unchanged for {args.older_than}+ day(s)", file=out)
+
+
+def cmd_archive(repo, args, out):
+    verb = "Would archive" if args.dry_run else "Archived"
+    if args.year is not None:
+        count = repo.archive_year(args.year, dry_run=args.dry_run)
+        print(f"{verb} {count} student(s) of school year {school_year_label(args.year)}", file=out)
+    else:
+        count = repo.archive(args.older_than, dry_run=args.dry_run)
+        print(f"{verb} {count} student(s) deleted {args.older_than}+ day(s) ago", file=out)
+    if args.audit_days is not None and not args.dry_run:
+        print(f"Pruned {repo.prune_audit(args.audit_days)} audit entries older than {args.audit_days} day(s)",
+              file=out)
+
+
+def cmd_rollover(repo, args, out):
+    if args.year is None:
+        raise ValueError("give one school year to roll over, not 'all'")
+    label = school_year_label(args.year)
+    if args.undo:
+        restored, skipped = repo.rollback_rollover(args.year, chunk_size=args.chunk, dry_run=args.dry_run)
+        print(f"{'Would restore' if args.dry_run else 'Restored'} {restored} student(s) to {label}; "
+              f"{skipped} changed since the rollover {'would be' if args.dry_run else 'were'} left as they are",
+              file=out)
+        return
+    if args.dry_run:
+        for strand, promoted, graduated in repo.rollover_preview(args.year):
+            out.write(f"{strand}\t{promoted} to Grade 12\t{graduated} graduating\n")
+    promoted, graduated = repo.rollover(args.year, chunk_size=args.chunk, dry_run=args.dry_run)
+    verb = ("Would promote", "graduate") if args.dry_run else ("Promoted", "graduated")
+    print(f"{verb[0]} {promoted} student(s) to Grade 12 of {school_year_label(args.year + 1)} and "
+          f"{verb[1]} {graduated} from {label}", file=out)
+
+
+def cmd_history(repo, args, out):
+    entries = repo.history(args.id)
+    for at, action, actor, changes in entries:
+        out.write("\t".join([str(at), action, actor or "-", format_changes(changes)]) + "\n")
+    print(f"{len(entries)} change(s) to student {args.id}", file=sys.stderr)
+
+
+def cmd_restore(repo, args, out):
+    restored = sum(repo.restore(student_id) for student_id in args.ids)
+    print(f"{restored} student(s) restored", file=out)
+
+
+def cmd_migrate(repo, args, out):
+    repo.migrate()
+    print("Schema is up to date", file=out)
+
+
+def _add_filters(parser, status=True, archived=False):
+    parser.add_argument("--year", type=parse_school_year, default=current_school_year(),
+                        help="school year, e.g. 2025-2026, or 'all' (default: the current one)")
+    if archived:
+        parser.add_argument("--archived", action="store_true", help="read a closed year from the archive")
+    parser.add_argument("--name", default="", help='last-name prefix, or "Last, First" prefixes')
+    parser.add_argument("--strand", help="strand code, e.g. STEM")
+    parser.add_argument("--grade", help='grade level, e.g. "Grade 11"')
+    parser.add_argument("--gender")
+    if status:
+        parser.add_argument("--status")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Administer registrations without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("list", help="stream the (filtered) roster to stdout")
+    _add_filters(p, archived=True)
+    p.add_argument("--format", choices=LIST_FORMATS, default="table")
+    p.add_argument("--columns", help=f"comma-separated columns (default: {','.join(SORT_COLUMNS)})")
+    p.add_argument("--sort", choices=list(SORT_COLUMNS), default="ID")
+    p.add_argument("--desc", action="store_true", help="sort descending")
+    p.add_argument("--limit", type=int, default=0, help="stop after this many rows")
+    p.set_defaults(run=cmd_list)
+
+    for name, (status, current) in ACTIONS.items():
+        p = commands.add_parser(name, help=f"mark students {status} (matching filters, or --ids)")
+        _add_filters(p, status=False)
+        if name != "accept":
+            p.add_argument("--status", help=f"status to move from (default: {current})")
+        p.add_argument("--ids", type=parse_ids, help="comma-separated student ids instead of filters")
+        p.add_argument("--dry-run", action="store_true", help="only report how many would change")
+        if name == "drop":
+            p.add_argument("--reason", required=True, help="reason recorded with each drop")
+        p.set_defaults(run=cmd_change, status=None, reason=None)
+
+    p = commands.add_parser("stats", help="enrollment counts per strand, grade or gender and status")
+    p.add_argument("--by", choices=list(STATS_GROUPS), default="strand")
+    p.add_argument("--year", type=parse_school_year, default=current_school_year(),
+                   help="school year, or 'all' (default: the current one)")
+    p.set_defaults(run=cmd_stats)
+
+    p = commands.add_parser("export", help="write the roster to .csv, .xlsx or .json")
+    p.add_argument("file")
+    _add_filters(p, archived=True)
+    p.add_argument("--format", choices=("csv", "xlsx", "json"))
+    p.add_argument("--columns", help="comma-separated columns")
+    p.set_defaults(run=cmd_export)
+
+    p = commands.add_parser("duplicates", help="list groups of registrations that look alike")
+    p.add_argument("--status", help="only consider students with this status")
+    p.set_defaults(run=cmd_duplicates)
+
+    p = commands.add_parser("purge", help="delete old students with a status (restorable until archived)")
+    p.add_argument("--status", default=REJECTED)
+    p.add_argument("--older-than", type=int, default=30, metavar="DAYS",
+                   help="only students unchanged for this many days (default: 30)")
+    p.add_argument("--dry-run", action="store_true", help="only report how many would be deleted")
+    p.set_defaults(run=cmd_purge)
+
+    p = commands.add_parser("archive", help="move deleted students, or a closed school year, out of the live table")
+    p.add_argument("--older-than", type=int, default=30, metavar="DAYS",
+                   help="only students deleted this many days ago (default: 30)")
+    p.add_argument("--year", type=parse_school_year, help="archive this whole closed school year instead")
+    p.add_argument("--audit-days", type=int, metavar="DAYS", help="also prune audit entries older than this")
+    p.add_argument("--dry-run", action="store_true", help="only report how many would be archived")
+    p.set_defaults(run=cmd_archive)
+
+    p = commands.add_parser("rollover", help="year end: promote accepted Grade 11, graduate Grade 12")
+    p.add_argument("--year", type=parse_school_year, default=current_school_year(),
+                   help="school year to close (default: the current one)")
+    p.add_argument("--chunk", type=int, default=BULK_CHUNK, help=f"students per transaction (default: {BULK_CHUNK})")
+    p.add_argument("--undo", action="store_true", help="roll the year's rollover back instead")
+    p.add_argument("--dry-run", action="store_true", help="only report how many would move")
+    p.set_defaults(run=cmd_rollover)
+
+    p = commands.add_parser("history", help="audit trail of one student")
+    p.add_argument("id", type=int)
+    p.set_defaults(run=cmd_history)
+
+    p = commands.add_parser("restore", help="undelete students that are not archived yet")
+    p.add_argument("--ids", type=parse_ids, required=True, help="comma-separated student ids")
+    p.set_defaults(run=cmd_restore)
+
+    p = commands.add_parser("migrate", help="bring the database schema up to date")
+    p.set_defaults(run=cmd_migrate)
+    return parser
+
+
+def main(argv=None, out=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    out = out or sys.stdout
+    repo = StudentRepository(actor=f"cli:{getpass.getuser()}")
+    try:
+        if args.command != "migrate":
+            repo.load_choices()
+            check_options(parser, args)
+        args.run(repo, args, out)
+    except BrokenPipeError:
+        # Output piped into e.g. head, which stopped reading; silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except Exception as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 2
+    finally:
+        repo.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
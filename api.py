@@ -0,0 +1,312 @@
+"""Optional HTTP/JSON service for kiosks and web forms
+
+    SHS_DB_BACKEND=sqlite python api.py [--host 127.0.0.1] [--port 8765]
+
+    POST /registrations          wizard fields as JSON -> {"id": ..., "status": "Pending"}
+    GET  /registrations/<id>     one student
+    GET  /registrations?status=Pending&strand=STEM&year=2026-2027&after=<id>&limit=50
+    GET  /health
+
+Plain asyncio, no web framework.  Submissions go through validate_student
+like the wizard and are inserted by a micro-batcher: requests arriving within
+BATCH_WINDOW_MS of each other share one INSERT transaction, so a burst of
+kiosks costs a few commits instead of one each.  A client may send its own
+"submission_id" and safely retry; the students table keeps those unique.  When
+SHS_API_TOKEN is set every request needs ``Authorization: Bearer <token>``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import db_config
+import metrics
+from choices import GENDERS, GRADE_LEVELS, PENDING, STATUSES, STRAND_CODES, current_school_year, parse_school_year
+from student_query import SORT_COLUMNS, StudentFilter
+from student_repository import StudentRepository
+from validation import ValidationError, validate_student
+
+BATCH_MAX = 100         # submissions per insert transaction
+BATCH_WINDOW_MS = 5     # how long the first submission of a batch waits for company
+MAX_BODY = 64 * 1024    # bytes
+PAGE_LIMIT = 200        # most students per list response
+SUBMISSION_ID_MAX = 32  # width of students.submission_id
+API_TOKEN = os.environ.get("SHS_API_TOKEN", "")
+
+FIELDS = list(SORT_COLUMNS)
+FILTERS = {"strand": STRAND_CODES, "grade": GRADE_LEVELS, "status": STATUSES, "gender": GENDERS}
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def student_json(row):
+    return dict(zip(FIELDS, row))
+
+
+class SubmitBatcher:
+    """Collects concurrent submissions and inserts them together on a worker thread"""
+
+    def __init__(self, repo, executor, batch_max=BATCH_MAX, window_ms=BATCH_WINDOW_MS):
+        self.repo = repo
+        self.executor = executor
+        self.batch_max = batch_max
+        self.window = window_ms / 1000
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def submit(self, submission_id, data):
+        """Queue one validated registration; resolves to its student id once committed"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((submission_id, data, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.batch_max:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            metrics.observe("api_batch_size", len(batch))
+            try:
+                ids = await loop.run_in_executor(self.executor, self._insert, batch)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for submission_id, _, future in batch:
+                if future.done():
+                    continue    # the client went away
+                result = ids.get(submission_id)
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _insert(self, batch):
+        """Insert a batch in one transaction; on failure retry singly so one bad row fails alone"""
+        submissions = [(submission_id, data) for submission_id, data, _ in batch]
+        try:
+            self.repo.insert_submissions(submissions)
+        except Exception:
+            self.repo.ping()    # database down: fail the whole batch
+            errors = {}
+            for submission in submissions:
+                try:
+                    self.repo.insert_submissions([submission])
+                except Exception as e:
+                    errors[submission[0]] = e
+            ids = self.repo.submission_ids([s for s, _ in submissions if s not in errors])
+            return {**ids, **errors}
+        return self.repo.submission_ids([submission_id for submission_id, _ in submissions])
+
+
+class RegistrationAPI:
+    def __init__(self, repo=None, batch_max=BATCH_MAX, window_ms=BATCH_WINDOW_MS):
+        self.repo = repo or StudentRepository(actor="api")
+        # One worker per pooled connection, so queries never wait on the pool
+        self.executor = ThreadPoolExecutor(max_workers=db_config.POOL_SIZE, thread_name_prefix="api-db")
+        self.batcher = SubmitBatcher(self.repo, self.executor, batch_max, window_ms)
+
+    async def serve(self, host, port):
+        await self.run_db(self.repo.migrate)
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Listening on http://{host}:{port}", file=sys.stderr, flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+            self.executor.shutdown(wait=False)
+            self.repo.close()
+
+    async def run_db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def handle(self, reader, writer):
+        """One keep-alive connection: read requests until the client closes"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                started = time.perf_counter()
+                route = "unknown"
+                try:
+                    route, status, payload = await self._dispatch(method, target, headers, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 503, {"error": f"Database unavailable: {e}"}
+                metrics.observe("api_request_seconds", time.perf_counter() - started, route=route)
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HTTPError as e:
+            self._respond(writer, e.status, {"error": str(e)}, False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "Bad Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Bad Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, default=str).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                     "Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+
+    async def _dispatch(self, method, target, headers, body):
+        if API_TOKEN and headers.get("authorization") != f"Bearer {API_TOKEN}":
+            raise HTTPError(401, "Missing or wrong API token")
+
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["health"]:
+            await self.run_db(self.repo.ping)
+            return "health", 200, {"ok": True}
+        if parts[:1] != ["registrations"] or len(parts) > 2:
+            raise HTTPError(404, "Not found")
+
+        if len(parts) == 2:
+            if method != "GET":
+                raise HTTPError(405, "Use GET")
+            if not parts[1].isdigit():
+                raise HTTPError(404, "Not found")
+            row = await self.run_db(self.repo.get, int(parts[1]))
+            if row is None:
+                raise HTTPError(404, "No such student")
+            return "status", 200, student_json(row)
+
+        if method == "POST":
+            return ("submit",) + await self._submit(body)
+        if method == "GET":
+            return "list", 200, await self._list(parse_qs(url.query))
+        raise HTTPError(405, "Use GET or POST")
+
+    async def _submit(self, body):
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Body must be a JSON object of wizard fields")
+        try:
+            cleaned = validate_student(data)
+        except ValidationError as e:
+            raise HTTPError(400, f"{e.title}: {e}")
+
+        submission_id = data.get("submission_id") or uuid.uuid4().hex
+        if not isinstance(submission_id, str) or len(submission_id) > SUBMISSION_ID_MAX:
+            raise HTTPError(400, f"submission_id must be a string of at most {SUBMISSION_ID_MAX} characters")
+        try:
+            student_id = await self.batcher.submit(submission_id, cleaned)
+        except Exception as e:
+            await self.run_db(self.repo.ping)   # raises (-> 503) when the database is down
+            raise HTTPError(400, f"Registration rejected: {e}")
+        return 201, {"id": student_id, "submission_id": submission_id, "status": PENDING}
+
+    async def _list(self, query):
+        params = {key: values[-1] for key, values in query.items()}
+        for key, allowed in FILTERS.items():
+            if params.get(key) and params[key] not in allowed:
+                raise HTTPError(400, f"{key} must be one of: {', '.join(allowed)}")
+        try:
+            limit = int(params.get("limit", 50))
+            after = int(params["after"]) if params.get("after") else None
+            school_year = parse_school_year(params["year"]) if params.get("year") else current_school_year()
+        except ValueError:
+            raise HTTPError(400, "limit and after must be numbers, year a school year like 2026-2027 or 'all'")
+        if not 1 <= limit <= PAGE_LIMIT:
+            raise HTTPError(400, f"limit must be between 1 and {PAGE_LIMIT}")
+
+        student_filter = StudentFilter(name=params.get("name", ""), strand=params.get("strand"),
+                                       grade_level=params.get("grade"), status=params.get("status"),
+                                       gender=params.get("gender"), school_year=school_year)
+
+        # Listed by id, so the cursor is just the last id seen: no lookup, and
+        # a cursor student deleted since still continues after its id
+        rows = await self.run_db(lambda: self.repo.page(student_filter,
+                                                        after=(after,) if after is not None else None,
+                                                        limit=limit))
+        return {"students": [student_json(row) for row in rows],
+                "next_after": rows[-1][0] if len(rows) == limit else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve registrations over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-max", type=int, default=BATCH_MAX, help="submissions per insert")
+    parser.add_argument("--batch-window-ms", type=float, default=BATCH_WINDOW_MS,
+                        help="how long a submission waits to share an insert")
+    args = parser.parse_args(argv)
+
+    api = RegistrationAPI(batch_max=args.batch_max, window_ms=args.batch_window_ms)
+    try:
+        asyncio.run(api.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Section assignment for batch acceptance
+
+Pure Python, no database: StudentRepository.accept reads the candidates,
+sections and current seat counts inside a locked transaction, calls
+``assign`` once for the whole batch and writes the result back.
+"""
+from collections import deque
+
+
+class Assignment:
+    """Outcome of one ``assign`` pass
+
+    ``sections`` maps a section id (None for strands/grades without sections)
+    to the student ids placed there; ``waitlisted`` ids stay Pending because
+    their strand or every matching section is full.
+    """
+
+    def __init__(self):
+        self.sections = {}
+        self.waitlisted = []
+
+    @property
+    def accepted(self):
+        return sum(len(ids) for ids in self.sections.values())
+
+
+def assign(candidates, sections, taken, strand_room):
+    """Place ``candidates`` into sections in one pass
+
+    candidates  -- ``(id, strand, grade_level, gender)`` in queue order
+    sections    -- ``(id, strand, grade_level, capacity)``
+    taken       -- ``{(section_id, gender): accepted}`` already seated
+    strand_room -- ``{strand: seats left}``; strands missing here are unlimited
+
+    Within a strand, candidates are taken round-robin across grade level and
+    gender queues (each first come, first served), so a strand that runs out
+    of room is shared evenly instead of going to whichever group applied
+    first.  Each student then goes to the open section of their strand and
+    grade with the smallest share of their gender, then the most free seats.
+    """
+    by_group = {}
+    for section_id, strand, grade_level, capacity in sections:
+        by_group.setdefault((strand, grade_level), []).append(section_id)
+    capacity = {section_id: cap for section_id, _, _, cap in sections}
+    seated = {section_id: 0 for section_id in capacity}
+    mix = {}
+    for (section_id, gender), count in taken.items():
+        if section_id in seated:
+            seated[section_id] += count
+            mix[section_id, gender] = count
+
+    room = dict(strand_room)
+    result = Assignment()
+    for strand, queue in _interleave(candidates):
+        for student_id, grade_level, gender in queue:
+            if strand in room and room[strand] <= 0:
+                result.waitlisted.append(student_id)
+                continue
+            group = by_group.get((strand, grade_level))
+            if group is None:
+                section_id = None       # no sections defined: only the strand limit applies
+            else:
+                open_sections = [s for s in group if seated[s] < capacity[s]]
+                if not open_sections:
+                    result.waitlisted.append(student_id)
+                    continue
+                section_id = min(open_sections, key=lambda s: ((mix.get((s, gender), 0) + 1) / capacity[s],
+                                                               seated[s] / capacity[s], s))
+                seated[section_id] += 1
+                mix[section_id, gender] = mix.get((section_id, gender), 0) + 1
+            if strand in room:
+                room[strand] -= 1
+            result.sections.setdefault(section_id, []).append(student_id)
+    return result
+
+
+def _interleave(candidates):
+    """Yield ``(strand, students)`` with each strand's students alternating grade and gender queues"""
+    strands = {}
+    for student_id, strand, grade_level, gender in candidates:
+        strands.setdefault(strand, {}).setdefault((grade_level, gender), deque()).append(
+            (student_id, grade_level, gender))
+
+    for strand, queues in strands.items():
+        order = []
+        queues = deque(queues[key] for key in sorted(queues))
+        while queues:
+            queue = queues.popleft()
+            order.append(queue.popleft())
+            if queue:
+                queues.append(queue)
+        yield strand, order
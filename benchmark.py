@@ -0,0 +1,330 @@
+"""Benchmarks for enrollment-day volumes against a seeded local database
+
+    python benchmark.py [--sizes 10000 100000 1000000] [--output results.json]
+
+Each size gets a fresh SQLite file seeded with synthetic students, then the
+registration code paths are timed through StudentRepository: wizard submits,
+roster refreshes (the first page plus the watermark the view takes), scrolling
+through the materialized window, a change sync, single and bulk status
+updates, batch acceptance into sections, the dashboard's counter read, and
+the submit-time duplicate lookup.  Cold import time of the GUI module is measured in a fresh
+interpreter.  When a display is available the refresh is also timed through
+a real PagedTreeview, along with first-open and re-open times of the cached
+windows.  Results are printed (or written) as JSON so runs from different
+commits can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import db_config
+from choices import GENDERS, GRADE_LEVELS, STRAND_CODES
+from paged_tree import MAX_PAGES, PAGE_SIZE, PagedTreeview
+from roster_cache import RosterCache
+from student_query import StudentFilter, StudentRecord, insert_values
+from student_repository import StudentRepository
+from validation import validate_student
+
+SIZES = [10000, 100000, 1000000]
+SEED_BATCH = 5000
+SUBMITS = 500           # wizard submits timed per size
+REPEAT = 20             # samples per latency measurement
+BULK_UPDATE = 1000      # students per bulk status change
+SEED_STATUSES = {"Pending": 60, "Accepted": 30, "Rejected": 5, "Dropped": 5}   # status mix of seeded rosters
+
+FIRST_NAMES = ["Juan", "Maria", "Jose", "Ana", "Mark", "Angel", "John", "Princess", "Paolo", "Kristine",
+               "Miguel", "Andrea", "Carlo", "Nicole", "Rafael", "Bea", "Joshua", "Camille", "Gabriel", "Joy"]
+LAST_NAMES = ["Santos", "Reyes", "Cruz", "Bautista", "Ocampo", "Garcia", "Mendoza", "Torres", "Villanueva",
+              "Ramos", "Aquino", "Castillo", "Flores", "Gonzales", "Lopez", "Navarro", "Dela Cruz",
+              "Villamor", "Pascual", "Salazar"]
+
+# Roster views worth timing: the admin list, the public list and a filtered, name-sorted search
+VIEWS = {
+    "all_by_id": StudentFilter(),
+    "active_only": StudentFilter(statuses=["Accepted", "Dropped"]),
+    "filtered_by_name_desc": StudentFilter(name="Re", strand="STEM", sort="Last Name", descending=True),
+}
+
+
+def synthetic_student(rng):
+    """One wizard-style registration with plausible values"""
+    return {
+        "First Name": rng.choice(FIRST_NAMES),
+        "Last Name": rng.choice(LAST_NAMES) + str(rng.randrange(1000)),
+        "Grade Level": rng.choice(GRADE_LEVELS),
+        "Gender": rng.choice(GENDERS),
+        "Age": str(rng.randint(15, 19)),
+        "Guardian": rng.choice(FIRST_NAMES) + " " + rng.choice(LAST_NAMES),
+        "Strand": rng.choice(STRAND_CODES),
+    }
+
+
+def seed(repo, count, rng):
+    """Insert ``count`` students in batches; returns rows per second"""
+    started = time.perf_counter()
+    for start in range(0, count, SEED_BATCH):
+        batch = []
+        for _ in range(min(SEED_BATCH, count - start)):
+            s = synthetic_student(rng)
+            status = rng.choices(list(SEED_STATUSES), weights=list(SEED_STATUSES.values()))[0]
+            batch.append(insert_values(s, status))
+        repo.insert_many(batch)
+    return count / (time.perf_counter() - started)
+
+
+def timed(fn, repeat=REPEAT):
+    """Latency summary in milliseconds for ``repeat`` calls of ``fn``"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+
+    def percentile(p):
+        return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))], 3)
+
+    return {"n": len(samples), "min": round(samples[0], 3), "p50": percentile(50), "p95": percentile(95),
+            "max": round(samples[-1], 3), "mean": round(sum(samples) / len(samples), 3)}
+
+
+def bench_submits(repo, rng):
+    """Wizard submit path: validate, then insert one Pending registration"""
+    samples = []
+    started = time.perf_counter()
+    for _ in range(SUBMITS):
+        t = time.perf_counter()
+        repo.insert(validate_student(synthetic_student(rng)))
+        samples.append((time.perf_counter() - t) * 1000)
+    return {"per_second": round(SUBMITS / (time.perf_counter() - started), 1), "latency_ms": summarize(samples)}
+
+
+def bench_refresh(repo, student_filter):
+    """What a view reset costs: the change watermark, then the first keyset page"""
+    def refresh():
+        repo.changes_since(None)
+        return repo.page(student_filter, limit=PAGE_SIZE)
+
+    def scroll_window():
+        # Walk forward through the pages the Treeview keeps materialized
+        rows = repo.page(student_filter, limit=PAGE_SIZE)
+        for _ in range(MAX_PAGES - 1):
+            if not rows:
+                break
+            rows = repo.page(student_filter, after=rows[-1], limit=PAGE_SIZE)
+
+    return {"first_page_ms": timed(refresh), "window_ms": timed(scroll_window, repeat=max(3, REPEAT // 4))}
+
+
+def bench_roster_cache(repo, student_filter):
+    """A view re-reading a window of pages it read before, through the shared RosterCache"""
+    cache = RosterCache(repo)
+
+    def scroll_window():
+        rows = cache.page(student_filter, limit=PAGE_SIZE)
+        for _ in range(MAX_PAGES - 1):
+            if not rows:
+                break
+            rows = cache.page(student_filter, after=rows[-1], limit=PAGE_SIZE)
+
+    scroll_window()
+    return {"window_ms": timed(scroll_window), **cache.stats()}
+
+
+def bench_window_memory(repo, student_filter):
+    """Python-side memory peak for holding a full window of pages"""
+    tracemalloc.start()
+    try:
+        pages = [repo.page(student_filter, limit=PAGE_SIZE)]
+        for _ in range(MAX_PAGES - 1):
+            if not pages[-1]:
+                break
+            pages.append(repo.page(student_filter, after=pages[-1][-1], limit=PAGE_SIZE))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_treeview(repo, student_filter):
+    """Refresh timed through a real PagedTreeview; None when there is no display"""
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+    except Exception:
+        return None
+
+    try:
+        root.withdraw()
+        tree = ttk.Treeview(root, columns=list(range(9)), show="headings")
+        scrollbar = ttk.Scrollbar(root)
+        pager = PagedTreeview(tree, scrollbar, lambda **kw: repo.page(student_filter, **kw),
+                              fetch_changes=repo.changes_since, key=student_filter.sort_key,
+                              matches=student_filter.matches, row_tags=lambda row: (row.status,),
+                              render=StudentRecord.display)
+
+        def reset():
+            pager.reset()
+            root.update_idletasks()
+
+        tracemalloc.start()
+        try:
+            result = {"reset_ms": timed(reset)}
+            result["memory_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        result["sync_ms"] = timed(pager.sync)
+        return result
+    finally:
+        root.destroy()
+
+
+def bench_windows(directory):
+    """First open vs. re-open of cached windows; None when there is no display"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+
+    from registration import SHSRegistrationSystem
+    db_config.OUTBOX_PATH = os.path.join(directory, "bench_outbox.db")
+    app = SHSRegistrationSystem(root)
+    result = {}
+    try:
+        for label, open_window, name in (("registration", app.open_student_registration, "registration"),
+                                         ("roster", app.view_students, "students"),
+                                         ("admin_login", app.open_admin_login, "login")):
+            samples = []
+            for _ in range(6):
+                started = time.perf_counter()
+                open_window()
+                root.update_idletasks()
+                samples.append((time.perf_counter() - started) * 1000)
+                app.hide_window(app.windows[name][0])
+            result[label] = {"first_ms": round(samples[0], 3), "reopen_ms": summarize(samples[1:])}
+    finally:
+        app.close()
+    return result
+
+
+def bench_startup(repeat=5):
+    """Cold import of the GUI module in a fresh interpreter, in milliseconds"""
+    code = "import time; t = time.perf_counter(); import registration; print(time.perf_counter() - t)"
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=here)
+        if out.returncode != 0:
+            return None
+        samples.append(float(out.stdout) * 1000)
+    return summarize(samples)
+
+
+def bench_status(repo, rng, count):
+    """Single accept/reject round trips and one bulk change"""
+    def single():
+        student_id = rng.randint(1, count)
+        repo.set_status([student_id], rng.choice(["Accepted", "Rejected"]))
+        repo.get(student_id)
+
+    ids = rng.sample(range(1, count + 1), min(BULK_UPDATE, count))
+    started = time.perf_counter()
+    repo.set_status(ids, "Accepted")
+    bulk = (time.perf_counter() - started) * 1000
+    return {"single_ms": timed(single), "bulk_ms": round(bulk, 3), "bulk_rows": len(ids)}
+
+
+def bench_accept(repo):
+    """One strand's whole pending queue accepted into sections in a single pass"""
+    for grade_level in GRADE_LEVELS:
+        for n in range(1, 5):
+            repo.save_section("ABM", grade_level, f"ABM {n}", 50)
+    started = time.perf_counter()
+    result = repo.accept_matching(StudentFilter(strand="ABM"))
+    return {"ms": round((time.perf_counter() - started) * 1000, 3), "accepted": result.accepted,
+            "waitlisted": len(result.waitlisted)}
+
+
+def bench_sync(repo, rng, count):
+    """Change sync after another station edits a handful of rows"""
+    _, watermark = repo.changes_since(None)
+    repo.set_status(rng.sample(range(1, count + 1), min(20, count)), "Dropped")
+    return timed(lambda: repo.changes_since(watermark))
+
+
+def run_size(count, directory, rng):
+    path = os.path.join(directory, f"bench_{count}.db")
+    if os.path.exists(path):
+        os.remove(path)
+    db_config.configure("sqlite", path)
+    repo = StudentRepository()
+    repo.migrate()
+
+    print(f"Seeding {count} students...", file=sys.stderr)
+    result = {"students": count, "seed_rows_per_second": round(seed(repo, count, rng), 1)}
+    result["submit"] = bench_submits(repo, rng)
+    result["refresh"] = {name: bench_refresh(repo, f) for name, f in VIEWS.items()}
+    result["cached_refresh"] = bench_roster_cache(repo, VIEWS["all_by_id"])
+    result["window_memory_peak_bytes"] = bench_window_memory(repo, VIEWS["all_by_id"])
+    result["treeview"] = bench_treeview(repo, VIEWS["all_by_id"])
+    result["status_update"] = bench_status(repo, rng, count)
+    result["accept"] = bench_accept(repo)
+    result["sync_ms"] = bench_sync(repo, rng, count)
+    result["stats_ms"] = timed(repo.enrollment_counts)
+    result["duplicate_lookup_ms"] = timed(lambda: repo.similar_students(synthetic_student(rng)))
+    result["db_bytes"] = os.path.getsize(path)
+    result["windows"] = bench_windows(directory)
+    repo.close()
+    return result
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark registration throughput and roster latency.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES[:2], metavar="N",
+                        help=f"students to seed per run (default: {SIZES[0]} {SIZES[1]}; try {SIZES[2]})")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--dir", help="directory for the benchmark databases (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the synthetic data")
+    args = parser.parse_args(argv)
+
+    if args.dir:
+        os.makedirs(args.dir, exist_ok=True)
+    rng = random.Random(args.seed)
+    results = {"commit": _commit(), "python": platform.python_version(), "platform": platform.platform(),
+               "backend": "sqlite", "page_size": PAGE_SIZE, "max_pages": MAX_PAGES,
+               "import_ms": bench_startup(), "runs": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.sizes:
+            results["runs"].append(run_size(count, args.dir or tmp, rng))
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# Allowed values shared by the registration forms, filters and queries; the
+# database's reference_values table is the master copy (see load_reference)
+import datetime
+import os
+
+GRADE_LEVELS = ["Grade 11", "Grade 12"]
+
+GENDERS = ["Male", "Female"]
+
+STRANDS = [
+    ("STEM", "Science, Technology, Engineering, Mathematics"),
+    ("ABM", "Accountancy, Business, Management"),
+    ("HUMSS", "Humanities and Social Sciences"),
+    ("TVL ICT", "Information & Communication Technology"),
+    ("TVL EIM", "Electrical Installation & Maintenance"),
+    ("GAS", "General Academic Strand")
+]
+
+STRAND_CODES = [code for code, _ in STRANDS]
+
+STATUSES = ["Pending", "Accepted", "Rejected", "Dropped", "Graduated"]
+
+# The values queries and screens act on by name
+PENDING, ACCEPTED, REJECTED, DROPPED, GRADUATED = STATUSES
+GRADE_11, GRADE_12 = GRADE_LEVELS
+
+# Statuses shown in the public "View Registered Students" list
+ACTIVE_STATUSES = [ACCEPTED, DROPPED]
+
+# Command-line options naming a reference value, checked once the lists are loaded
+REFERENCE_OPTIONS = {"strand": STRAND_CODES, "grade": GRADE_LEVELS, "gender": GENDERS, "status": STATUSES}
+
+
+def load_reference(rows):
+    """Replace the lists above with the database's reference_values
+
+    ``rows`` are ``(kind, name, description)`` in display order.  The lists
+    are updated in place, so every module that imported them (forms,
+    filters, validation, the API) shares the one copy read at startup; until
+    then, or without a database, the built-in values above apply.
+    """
+    values = {}
+    for kind, name, description in rows:
+        values.setdefault(kind, []).append((name, description))
+    for kind, target in (("grade_level", GRADE_LEVELS), ("gender", GENDERS), ("status", STATUSES)):
+        if kind in values:
+            target[:] = [name for name, _ in values[kind]]
+    if "strand" in values:
+        STRANDS[:] = [(name, description or name) for name, description in values["strand"]]
+        STRAND_CODES[:] = [code for code, _ in STRANDS]
+
+
+def check_options(parser, args):
+    """``parser.error`` for a --strand/--grade/--gender/--status value missing from its list
+
+    argparse ``choices=`` would be bound to the built-in lists before
+    load_reference runs, so command-line tools check after loading instead.
+    """
+    for option, allowed in REFERENCE_OPTIONS.items():
+        value = getattr(args, option, None)
+        if value is not None and value not in allowed:
+            parser.error(f"argument --{option}: invalid choice: '{value}' (choose from {', '.join(allowed)})")
+
+# A school year is numbered by the calendar year it opens in (2026 = SY
+# 2026-2027); classes open in June.  SHS_SCHOOL_YEAR pins it, e.g. for testing.
+SCHOOL_YEAR_START_MONTH = 6
+
+
+def current_school_year(today=None):
+    if os.environ.get("SHS_SCHOOL_YEAR"):
+        return int(os.environ["SHS_SCHOOL_YEAR"])
+    today = today or datetime.date.today()
+    return today.year if today.month >= SCHOOL_YEAR_START_MONTH else today.year - 1
+
+
+def school_year_label(year):
+    return f"{year}-{year + 1}"
+
+
+def parse_school_year(text):
+    """2026 from "2026" or "2026-2027", None for "all"; raises ValueError otherwise"""
+    if str(text).strip().lower() == "all":
+        return None
+    start, _, end = str(text).strip().partition("-")
+    year = int(start)
+    if end and int(end) != year + 1:
+        raise ValueError(f"{text} is not a school year like {school_year_label(year)}")
+    return year
@@ -1,4 +1,17 @@
-import pymysql
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+# "mysql" for a shared server, "sqlite" for a single-campus embedded database
+DB_BACKEND = os.environ.get("SHS_DB_BACKEND", "mysql")
+SQLITE_PATH = os.environ.get("SHS_SQLITE_PATH", "shs_registration.db")
+
+# Local queue that holds wizard submissions until the database accepts them
+OUTBOX_PATH = os.environ.get("SHS_OUTBOX_PATH", "shs_outbox.db")
 
 DB_HOST = "localhost"
 DB_USER = "root"
@@ -6,7 +19,14 @@ DB_PASS = ""
 DB_NAME = "shs_registration"
 DB_PORT = 3306
 
+# Connection pool settings
+POOL_SIZE = 5           # maximum open connections
+POOL_TIMEOUT = 10       # seconds to wait for a free connection
+POOL_PING_AFTER = 30    # ping connections idle longer than this (seconds)
+
+
 def get_connection():
+    import pymysql  # imported on first connect so the first window is not kept waiting
     return pymysql.connect(
         host=DB_HOST,
         user=DB_USER,
@@ -15,3 +35,182 @@ def get_connection():
         port=DB_PORT
     )
 
+
+def get_sqlite_connection(path=None):
+    """Open the embedded database in WAL mode so readers never block the writer"""
+    conn = sqlite3.connect(path or SQLITE_PATH, timeout=POOL_TIMEOUT, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free in time"""
+
+
+class ConnectionPool:
+    """Bounded pool of reusable database connections"""
+
+    def __init__(self, creator, size=POOL_SIZE, timeout=POOL_TIMEOUT, ping_after=POOL_PING_AFTER):
+        self.creator = creator
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = []         # (connection, returned_at), most recent last
+        self._open = 0
+        self._closed = False
+        self._stats = {"creates": 0, "checkouts": 0, "waits": 0, "wait_time": 0.0,
+                       "reconnects": 0, "discards": 0}
+
+    def acquire(self):
+        """Check out a healthy connection, opening or waiting for one if needed"""
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            waited = False
+            wait_started = time.monotonic()
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No database connection available after {self.timeout}s")
+                waited = True
+                self._cond.wait(remaining)
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time"] += time.monotonic() - wait_started
+            self._stats["checkouts"] += 1
+            if self._idle:
+                conn, returned_at = self._idle.pop()
+            else:
+                conn, returned_at = None, None
+                self._open += 1
+
+        # Connect and ping outside the lock so other threads are not blocked
+        try:
+            if conn is None:
+                conn = self._create()
+            elif time.monotonic() - returned_at > self.ping_after:
+                conn = self._check(conn)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        metrics.observe("db_connection_acquire_seconds", time.perf_counter() - started)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, ending any open transaction"""
+        if not discard:
+            # Roll back so the next user never inherits an open transaction
+            # or a stale REPEATABLE READ snapshot
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard or self._closed:
+                self._open -= 1
+                if discard:
+                    self._stats["discards"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that always gives the connection back to the pool"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            self.release(conn)
+            raise
+        except BaseException:
+            self.release(conn, discard=True)
+            raise
+        else:
+            self.release(conn)
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(size=self.size, open=self._open, idle=len(self._idle),
+                         in_use=self._open - len(self._idle))
+        return stats
+
+    def close(self):
+        """Close idle connections; in-use ones are closed when released"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def _create(self):
+        conn = self.creator()
+        with self._cond:
+            self._stats["creates"] += 1
+        return conn
+
+    def _check(self, conn):
+        """Ping a connection that sat idle; replace it if the server dropped it"""
+        ping = getattr(conn, "ping", None)
+        if ping is None:
+            return conn
+        try:
+            ping(reconnect=True)
+            return conn
+        except Exception:
+            self._close_quietly(conn)
+            with self._cond:
+                self._stats["reconnects"] += 1
+            return self._create()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def create_pool(backend=None, sqlite_path=None, size=POOL_SIZE):
+    """A connection pool for ``backend`` ("mysql" or "sqlite")"""
+    backend = backend or DB_BACKEND
+    if backend == "sqlite":
+        return ConnectionPool(lambda: get_sqlite_connection(sqlite_path), size=size)
+    if backend == "mysql":
+        return ConnectionPool(get_connection, size=size)
+    raise ValueError(f"Unknown database backend '{backend}'")
+
+
+def configure(backend, sqlite_path=None):
+    """Switch the shared pool to another backend (command-line tools, benchmarks)"""
+    global DB_BACKEND, SQLITE_PATH, pool
+    old = pool
+    pool = create_pool(backend, sqlite_path)
+    DB_BACKEND = backend
+    SQLITE_PATH = sqlite_path or SQLITE_PATH
+    old.close()
+
+
+pool = create_pool()
+
+
+def connection():
+    """Check out a pooled connection: ``with connection() as conn: ...``"""
+    return pool.connection()
@@ -0,0 +1,118 @@
+"""Fuzzy matching of learner names for duplicate detection
+
+Every student row stores ``name_key``: Soundex codes of the folded last name
+and first given name.  Spelling variants that sound alike ("Dela Cruz" /
+"Delacruz", "Ma. Jose" / "Maria José") share a key, so finding possible
+duplicates is an indexed equality lookup; ``likely_duplicate`` then compares
+the few rows found by name and guardian trigram similarity.
+"""
+import re
+import unicodedata
+
+MATCH_THRESHOLD = 0.75  # combined similarity at which two registrations are flagged
+
+_NOT_LETTERS = re.compile(r"[^a-z ]+")
+_SOUNDEX = {letter: str(code) for code, letters in enumerate(
+    ["aehiouwy", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for letter in letters}
+_ABBREVIATIONS = {"ma": "maria", "jr": "", "sr": "", "ii": "", "iii": ""}
+
+
+def fold(name):
+    """Lowercase ASCII letters and single spaces: accents, punctuation and case dropped"""
+    text = str(name)
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    text = text.casefold()
+    words = _NOT_LETTERS.sub(" ", text).split()
+    return " ".join(w for w in (_ABBREVIATIONS.get(w, w) for w in words) if w)
+
+
+def soundex(word):
+    """Four-character Soundex code, or "" for a word with no letters"""
+    word = word.replace(" ", "")
+    if not word:
+        return ""
+    code, last = word[0].upper(), _SOUNDEX.get(word[0])
+    for letter in word[1:]:
+        digit = _SOUNDEX.get(letter)
+        if digit != "0" and digit != last:
+            code += digit
+        if letter not in "hw":
+            last = digit
+        if len(code) == 4:
+            break
+    return code.ljust(4, "0")
+
+
+def name_key(first_name, last_name):
+    """Indexed lookup key: whole last name plus first given name, phonetically"""
+    given = fold(first_name).split()
+    return soundex(fold(last_name)) + soundex(given[0] if given else "")
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    """Jaccard similarity of the folded strings' trigrams, 0.0 to 1.0"""
+    return _jaccard(trigrams(fold(a)), trigrams(fold(b)))
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def score(a, b):
+    """How alike two ``(first_name, last_name, guardian)`` registrations are, 0.0 to 1.0"""
+    names = similarity(f"{a[0]} {a[1]}", f"{b[0]} {b[1]}")
+    return 0.7 * names + 0.3 * similarity(a[2], b[2])
+
+
+def likely_duplicate(a, b):
+    return score(a, b) >= MATCH_THRESHOLD
+
+
+def group(rows, fields=lambda row: (row[1], row[2], row[6])):
+    """Cluster rows sharing a name key into groups of likely duplicates
+
+    ``fields(row)`` gives ``(first_name, last_name, guardian)``; the default
+    suits STUDENT_COLUMNS rows.  Rows that fold to the same text are grouped
+    without comparing them, trigrams are built once per distinct spelling, and
+    matches chain (A~B, B~C puts all three together).  Groups of one are left
+    out; rows keep their input order within a group.
+    """
+    spellings = {}
+    for row in rows:
+        first, last, guardian = fields(row)
+        spellings.setdefault((fold(f"{first} {last}"), fold(guardian)), []).append(row)
+
+    keys = list(spellings)
+    grams = [(trigrams(name), trigrams(guardian)) for name, guardian in keys]
+    root = list(range(len(keys)))
+
+    def find(i):
+        while root[i] != i:
+            root[i] = root[root[i]]
+            i = root[i]
+        return i
+
+    # Names alone must reach this for the combined score to have a chance
+    name_floor = (MATCH_THRESHOLD - 0.3) / 0.7
+    for i in range(len(keys)):
+        for j in range(i):
+            if find(i) == find(j):
+                continue
+            names = _jaccard(grams[i][0], grams[j][0])
+            if names >= name_floor and 0.7 * names + 0.3 * _jaccard(grams[i][1], grams[j][1]) >= MATCH_THRESHOLD:
+                root[find(i)] = find(j)
+
+    clusters = {}
+    for i, key in enumerate(keys):
+        clusters.setdefault(find(i), []).extend(spellings[key])
+    order = {id(row): n for n, row in enumerate(rows)}
+    return [sorted(members, key=lambda row: order[id(row)]) for members in clusters.values() if len(members) > 1]
@@ -0,0 +1,159 @@
+"""Streaming export of the student roster to CSV, Excel (.xlsx) or JSON
+
+    python exporter.py roster.csv [--status Accepted] [--strand STEM] [--columns "ID,Last Name,Strand"]
+
+Rows are read through an unbuffered cursor and written as they arrive, so
+memory stays flat no matter how many students are exported.
+The output appears under its final name only once the export completes.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from choices import check_options, current_school_year, parse_school_year
+from student_query import SORT_COLUMNS, StudentFilter
+from student_repository import StudentRepository
+
+FETCH_SIZE = 1000
+FORMATS = ("csv", "xlsx", "json")
+ALL_COLUMNS = list(SORT_COLUMNS)
+
+
+class ExportCancelled(Exception):
+    """Raised when the export was cancelled before it finished"""
+
+
+def _csv_writer(f, columns):
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    return writer.writerows, lambda: None
+
+
+def _json_writer(f, columns):
+    state = {"first": True}
+    f.write("[")
+
+    def write(rows):
+        for row in rows:
+            f.write("\n" if state["first"] else ",\n")
+            f.write(json.dumps(dict(zip(columns, row)), default=str))
+            state["first"] = False
+
+    return write, lambda: f.write("\n]\n")
+
+
+def export_students(path, student_filter=None, columns=None, fmt=None, progress=None, cancel=None, repo=None):
+    """Write the filtered roster to ``path``; returns the number of rows exported
+
+    ``fmt`` defaults to the file extension.  ``progress(rows)`` is called after
+    every fetched chunk and ``cancel`` (a threading.Event) is checked between
+    chunks; both may be used from a background thread.
+    """
+    student_filter = student_filter or StudentFilter()
+    columns = columns or ALL_COLUMNS
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'; use one of: {', '.join(FORMATS)}")
+
+    chunks = (repo or StudentRepository()).stream(student_filter, columns, FETCH_SIZE)
+    partial = path + ".part"
+    exported = 0
+    try:
+        try:
+            if fmt == "xlsx":
+                exported = _write_xlsx(partial, chunks, columns, progress, cancel)
+            else:
+                with open(partial, "w", newline="", encoding="utf-8") as f:
+                    make_writer = _csv_writer if fmt == "csv" else _json_writer
+                    write, finish = make_writer(f, columns)
+                    exported = _stream(chunks, write, progress, cancel)
+                    finish()
+        finally:
+            chunks.close()
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return exported
+
+
+def _stream(chunks, write, progress, cancel):
+    exported = 0
+    for rows in chunks:
+        write(rows)
+        exported += len(rows)
+        if progress is not None:
+            progress(exported)
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled("Export cancelled")
+    return exported
+
+
+def _write_xlsx(path, chunks, columns, progress, cancel):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ValueError("Writing .xlsx files requires the openpyxl package (pip install openpyxl)")
+
+    # Write-only workbooks stream rows to disk instead of building them in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Students")
+    sheet.append(columns)
+
+    def write(rows):
+        for row in rows:
+            sheet.append(list(row))
+
+    exported = _stream(chunks, write, progress, cancel)
+    workbook.save(path)
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the student roster to CSV, Excel or JSON.")
+    parser.add_argument("file", help="output path; the extension picks the format unless --format is given")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--name", default="", help='last-name prefix, or "Last, First" prefixes')
+    parser.add_argument("--strand", help="strand code, e.g. STEM")
+    parser.add_argument("--grade", help='grade level, e.g. "Grade 11"')
+    parser.add_argument("--status")
+    parser.add_argument("--gender")
+    parser.add_argument("--year", type=parse_school_year, default=current_school_year(),
+                        help="school year, e.g. 2025-2026, or 'all' (default: the current one)")
+    parser.add_argument("--archived", action="store_true", help="read a closed year from the archive")
+    parser.add_argument("--columns", help=f"comma-separated columns (default: {','.join(ALL_COLUMNS)})")
+    parser.add_argument("--sort", choices=ALL_COLUMNS, default="ID")
+    parser.add_argument("--desc", action="store_true", help="sort descending")
+    args = parser.parse_args(argv)
+    repo = StudentRepository()
+    repo.load_choices()
+    check_options(parser, args)
+
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    unknown = [c for c in columns or [] if c not in SORT_COLUMNS]
+    if unknown:
+        parser.error(f"unknown column(s): {', '.join(unknown)}")
+
+    student_filter = StudentFilter(name=args.name, strand=args.strand, grade_level=args.grade,
+                                   status=args.status, gender=args.gender, sort=args.sort,
+                                   descending=args.desc, school_year=args.year, archived=args.archived)
+
+    def report(rows):
+        print(f"\r{rows} row(s) exported", end="", file=sys.stderr, flush=True)
+
+    try:
+        exported = export_students(args.file, student_filter, columns, fmt=args.format, progress=report,
+                                   repo=repo)
+    except (ValueError, OSError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 2
+    print(file=sys.stderr)
+    print(f"{exported} student(s) written to {args.file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
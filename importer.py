@@ -0,0 +1,229 @@
+"""Bulk import of registrations from CSV or Excel (.xlsx) files
+
+    python importer.py learners.csv [--batch-size 500] [--errors report.csv] [--restart]
+
+Rows are validated with the registration wizard's rules and inserted as
+Pending in batches, one transaction per batch.  Progress is committed with
+each batch, so re-running the same file after a failure resumes where it
+stopped.  Rejected rows are written to an error report next to the file.
+"""
+import argparse
+import csv
+import hashlib
+import os
+import sys
+
+from student_query import insert_values
+from student_repository import StudentRepository
+from validation import PERSONAL_FIELDS, ValidationError, validate_student
+
+BATCH_SIZE = 500
+
+FIELDS = PERSONAL_FIELDS + ["Strand"]
+
+# Accepted header spellings (lowercase) -> wizard field names
+HEADER_ALIASES = {field.lower(): field for field in FIELDS}
+HEADER_ALIASES.update({
+    "first_name": "First Name",
+    "last_name": "Last Name",
+    "grade_level": "Grade Level",
+    "grade": "Grade Level",
+    "guardian/parent name": "Guardian",
+    "parent": "Guardian",
+})
+
+
+class ImportFileError(Exception):
+    """The file cannot be imported at all (unreadable, wrong columns, ...)"""
+
+
+class AlreadyImported(ImportFileError):
+    """The same file content was imported to completion before"""
+
+
+class ImportResult:
+    """Counters for one import run, including rows from earlier resumed attempts"""
+
+    def __init__(self, file_name, errors_path):
+        self.file_name = file_name
+        self.errors_path = errors_path
+        self.inserted = 0
+        self.rejected = 0
+        self.resumed_from = 0
+        self.cancelled = False
+
+    def summary(self):
+        lines = [f"{self.inserted} registration(s) imported from {self.file_name}."]
+        if self.resumed_from:
+            lines.append(f"Resumed after spreadsheet row {self.resumed_from}.")
+        if self.rejected:
+            lines.append(f"{self.rejected} row(s) rejected; see {self.errors_path}")
+        if self.cancelled:
+            lines.append("Import was cancelled; run it again to resume.")
+        return "\n".join(lines)
+
+
+def file_hash(path):
+    """SHA-256 of the file content, used to recognize the same import again"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_rows(path):
+    """Yield ``(row_number, {field: text})`` one row at a time; row 1 is the header"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        rows = _read_csv(path)
+    elif extension in (".xlsx", ".xlsm"):
+        rows = _read_xlsx(path)
+    else:
+        raise ImportFileError(f"Unsupported file type '{extension}'; use .csv or .xlsx")
+
+    header = next(rows, None)
+    if header is None:
+        return
+    fields = _map_header(header)
+    for number, values in enumerate(rows, start=2):
+        if not any(str(v).strip() for v in values):
+            continue
+        yield number, {field: value for field, value in zip(fields, values) if field}
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.reader(f)
+
+
+def _read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("Reading .xlsx files requires the openpyxl package (pip install openpyxl)")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for values in workbook.active.iter_rows(values_only=True):
+            yield [_cell_text(value) for value in values]
+    finally:
+        workbook.close()
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # ages typed as numbers
+    return str(value)
+
+
+def _map_header(header):
+    fields = [HEADER_ALIASES.get(str(name).strip().lower()) for name in header]
+    missing = [field for field in FIELDS if field not in fields]
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+    return fields
+
+
+def _start_run(repo, digest, file_name, restart):
+    """Create or resume the import_runs row; returns the last committed row and counters"""
+    run = repo.import_run(digest)
+    if run is None or restart:
+        repo.begin_import(digest, file_name, restart=run is not None)
+        return 0, 0, 0
+    if run[3] is not None:
+        raise AlreadyImported(f"{file_name} was already imported on {run[3]}")
+    return run[:3]
+
+
+def import_file(path, batch_size=BATCH_SIZE, errors_path=None, restart=False, progress=None, cancel=None,
+                repo=None):
+    """Stream ``path`` into the students table; returns an ImportResult
+
+    ``progress(result)`` is called after every committed batch and ``cancel``
+    (a threading.Event) is checked between batches; both may be used from a
+    background thread.
+    """
+    repo = repo or StudentRepository(actor="import")
+    file_name = os.path.basename(path)
+    errors_path = errors_path or path + ".errors.csv"
+    digest = file_hash(path)
+    resume_after, inserted, rejected = _start_run(repo, digest, file_name, restart)
+
+    result = ImportResult(file_name, errors_path)
+    result.resumed_from = resume_after
+    result.inserted = inserted
+    result.rejected = rejected
+
+    resuming = resume_after > 0 and os.path.exists(errors_path)
+    with open(errors_path, "a" if resuming else "w", newline="", encoding="utf-8") as errors_file:
+        errors = csv.writer(errors_file)
+        if not resuming:
+            errors.writerow(["Row", "Error"] + FIELDS)
+
+        students, bad_rows, last_line = [], 0, resume_after
+
+        def flush():
+            nonlocal students, bad_rows
+            errors_file.flush()
+            repo.record_import_batch(digest, students, last_line, bad_rows)
+            result.inserted += len(students)
+            result.rejected += bad_rows
+            students, bad_rows = [], 0
+            if progress is not None:
+                progress(result)
+
+        for number, raw in read_rows(path):
+            if number <= resume_after:
+                continue
+            try:
+                students.append(insert_values(validate_student(raw)))
+            except ValidationError as e:
+                errors.writerow([number, str(e)] + [raw.get(field, "") for field in FIELDS])
+                bad_rows += 1
+            last_line = number
+
+            if len(students) + bad_rows >= batch_size:
+                flush()
+                if cancel is not None and cancel.is_set():
+                    result.cancelled = True
+                    return result
+
+        flush()
+
+    repo.finish_import(digest)
+    if not result.rejected:
+        os.remove(errors_path)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import student registrations from a CSV or Excel file.")
+    parser.add_argument("file", help="path to a .csv or .xlsx file with a header row")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--errors", help="where to write rejected rows (default: FILE.errors.csv)")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore earlier progress and import the whole file again")
+    args = parser.parse_args(argv)
+
+    def report(result):
+        print(f"\r{result.inserted} imported, {result.rejected} rejected", end="", file=sys.stderr, flush=True)
+
+    # Rows are validated against the database's choice lists, as in the windows
+    repo = StudentRepository(actor="import")
+    repo.load_choices()
+    try:
+        result = import_file(args.file, batch_size=args.batch_size, errors_path=args.errors,
+                             restart=args.restart, progress=report, repo=repo)
+    except (ImportFileError, OSError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 2
+    print(file=sys.stderr)
+    print(result.summary())
+    return 1 if result.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
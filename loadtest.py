@@ -0,0 +1,182 @@
+"""Load test for the HTTP/JSON API
+
+    python loadtest.py [--url http://127.0.0.1:8765] [--requests 5000] [--concurrency 50]
+                       [--mix submit=8,status=1,list=1] [--output results.json]
+
+Without --url an API server is started on a throwaway SQLite database, so the
+run is self-contained.  Each simulated client keeps one connection open and
+fires requests back to back; the report gives requests per second overall
+and latency percentiles per endpoint, as JSON like benchmark.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from benchmark import summarize, synthetic_student
+
+MIX = "submit=8,status=1,list=1"
+STARTUP_TIMEOUT = 10    # seconds to wait for a spawned server
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, host, port, token=""):
+        self.host, self.port, self.token = host, port, token
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        auth = f"Authorization: Bearer {self.token}\r\n" if self.token else ""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n{auth}"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length)) if length else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("submit", "status", "list"):
+            raise argparse.ArgumentTypeError(f"unknown endpoint '{name}' in --mix")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+async def run(host, port, total, concurrency, mix, seed, token=""):
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=total)
+    samples = {kind: [] for kind in mix}
+    errors = {}
+    known_ids = []
+    remaining = iter(kinds)
+
+    async def worker():
+        client = Client(host, port, token)
+        try:
+            for kind in remaining:
+                if kind == "submit" or not known_ids:
+                    method, path, payload = "POST", "/registrations", synthetic_student(rng)
+                    kind = "submit"
+                elif kind == "status":
+                    method, path, payload = "GET", f"/registrations/{rng.choice(known_ids)}", None
+                else:
+                    method, path, payload = "GET", "/registrations?status=Pending&limit=50", None
+
+                started = time.perf_counter()
+                try:
+                    status, body = await client.request(method, path, payload)
+                except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                    client.close()
+                    client = Client(host, port, token)
+                    continue
+                samples[kind].append((time.perf_counter() - started) * 1000)
+                if status >= 300:
+                    errors[str(status)] = errors.get(str(status), 0) + 1
+                elif kind == "submit":
+                    known_ids.append(body["id"])
+        finally:
+            client.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    done = sum(len(s) for s in samples.values())
+    everything = [ms for s in samples.values() for ms in s]
+    return {"requests": done, "concurrency": concurrency, "seconds": round(elapsed, 3),
+            "requests_per_second": round(done / elapsed, 1), "errors": errors,
+            "latency_ms": summarize(everything) if everything else None,
+            "by_endpoint": {kind: summarize(s) for kind, s in samples.items() if s}}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(directory, port):
+    """Start api.py on a fresh SQLite file; returns the process once it accepts connections"""
+    env = dict(os.environ, SHS_DB_BACKEND="sqlite", SHS_SQLITE_PATH=os.path.join(directory, "loadtest.db"))
+    env.pop("SHS_API_TOKEN", None)
+    here = os.path.dirname(os.path.abspath(__file__))
+    server = subprocess.Popen([sys.executable, os.path.join(here, "api.py"), "--port", str(port)],
+                              env=env, cwd=here, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("API server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("API server did not start")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the registration HTTP API.")
+    parser.add_argument("--url", help="running API to test (default: start one on a temp SQLite database)")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50, help="simultaneous clients")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(MIX), help=f"endpoint weights (default: {MIX})")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            host, port = "127.0.0.1", free_port()
+            server = spawn_server(tmp, port)
+        try:
+            result = asyncio.run(run(host, port, args.requests, args.concurrency, args.mix, args.seed,
+                                     os.environ.get("SHS_API_TOKEN", "") if args.url else ""))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    result["target"] = args.url or "spawned (sqlite)"
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""In-process latency instrumentation
+
+Off unless SHS_METRICS=1 (or ``enable()`` is called); when off every hook is a
+single attribute check.  When on, durations go into rolling histograms keyed
+by metric name and labels, statements slower than SLOW_QUERY_MS are logged to
+the ``shs.slow_query`` logger, and ``dump(path)`` writes a snapshot as JSON or,
+for ``.prom``/``.txt`` paths, Prometheus text format.
+
+    import metrics
+    with metrics.timer("treeview_populate_seconds", op="reset"):
+        ...
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
+WINDOW = 1024           # most recent samples kept per histogram
+SLOW_QUERY_MS = float(os.environ.get("SHS_SLOW_QUERY_MS", "250"))
+SLOW_LOG_SIZE = 100     # slow queries kept for dumps
+
+slow_log = logging.getLogger("shs.slow_query")
+
+enabled = os.environ.get("SHS_METRICS", "") not in ("", "0")
+
+_lock = threading.Lock()
+_histograms = {}        # (name, labels) -> Histogram
+_sources = {}           # name -> callable returning current counters, e.g. cache hits
+_slow = deque(maxlen=SLOW_LOG_SIZE)
+
+
+class Histogram:
+    """Lifetime count and sum plus a rolling window of recent samples"""
+
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+
+        def quantile(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+        return {"count": self.count, "sum": self.total, "max": self.max,
+                "p50": quantile(0.50), "p95": quantile(0.95), "p99": quantile(0.99)}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _slow.clear()
+
+
+def add_source(name, fn):
+    """Include ``fn()`` (a dict of numbers, e.g. cache hit counts) in every snapshot under ``name``"""
+    _sources[name] = fn
+
+
+def observe(name, seconds, **labels):
+    """Record one duration; a no-op while instrumentation is off"""
+    if not enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+class timer:
+    """Context manager recording the duration of its block under ``name``"""
+
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+        self.started = None
+
+    def __enter__(self):
+        if enabled:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.started is not None:
+            observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+
+def timed(name, fn, **labels):
+    """Wrap a callback so each call is timed under ``name`` (checked per call, so toggling works)"""
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return fn(*args, **kwargs)
+        with timer(name, **labels):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+_SPACES = re.compile(r"\s+")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)")
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def fingerprint(sql):
+    """SQL with literals and IN lists collapsed so one statement shape is one series"""
+    sql = _SPACES.sub(" ", sql).strip()
+    sql = _LITERALS.sub("?", sql)
+    return _PLACEHOLDER_LISTS.sub("(...)", sql.replace("%s", "?"))
+
+
+def record_query(sql, seconds, rows=None):
+    """Record one statement's latency and log it when slow"""
+    if not enabled:
+        return
+    shape = fingerprint(sql)
+    observe("db_query_seconds", seconds, query=shape)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        entry = {"at": time.time(), "ms": round(seconds * 1000, 3), "rows": rows, "query": shape}
+        with _lock:
+            _slow.append(entry)
+        slow_log.warning("slow query %.1f ms (%s rows): %s", entry["ms"], rows, shape)
+
+
+def snapshot():
+    """Every histogram summary plus the recent slow queries"""
+    with _lock:
+        series = [{"name": name, "labels": dict(labels), **h.summary()}
+                  for (name, labels), h in sorted(_histograms.items())]
+        slow = list(_slow)
+    sources = {name: fn() for name, fn in sorted(_sources.items())}
+    return {"enabled": enabled, "slow_query_ms": SLOW_QUERY_MS, "metrics": series, "slow_queries": slow,
+            "sources": sources}
+
+
+def to_json():
+    return json.dumps(snapshot(), indent=2)
+
+
+def to_prometheus():
+    """Snapshot as Prometheus summaries (quantiles over the rolling window), sources as gauges"""
+    lines, typed = [], set()
+    current = snapshot()
+    for source, values in current["sources"].items():
+        for key, value in values.items():
+            lines.append(f"# TYPE shs_{source}_{key} gauge")
+            lines.append(f"shs_{source}_{key} {value}")
+    for series in current["metrics"]:
+        name = "shs_" + series["name"]
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} summary")
+        labels = series["labels"]
+        for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+            lines.append(f"{name}{_labels(labels, quantile=quantile)} {series[key]}")
+        lines.append(f"{name}_sum{_labels(labels)} {series['sum']}")
+        lines.append(f"{name}_count{_labels(labels)} {series['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def dump(path):
+    """Write a snapshot to ``path``; ``.prom``/``.txt`` get Prometheus text, anything else JSON"""
+    text = to_prometheus() if path.lower().endswith((".prom", ".txt")) else to_json()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
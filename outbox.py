@@ -0,0 +1,184 @@
+"""Local write-ahead queue for wizard submissions
+
+A submission is committed to a small SQLite file on the registrar's PC before
+the learner sees "submitted", so a slow or unreachable database never loses
+wizard input.  OutboxFlusher moves queued submissions into the main database
+in batches from a background thread; each carries a submission id that the
+students table keeps unique, so a batch replayed after a crash is skipped
+rather than registered twice.
+"""
+import json
+import sqlite3
+import threading
+import uuid
+
+import db_config
+import duplicates
+
+FLUSH_BATCH = 100       # submissions per insert transaction
+FLUSH_INTERVAL = 5      # seconds between flushes while idle
+MAX_BACKOFF = 60        # longest wait between retries while the database is down
+MAX_ATTEMPTS = 5        # a submission the database keeps rejecting is set aside after this
+
+
+class Outbox:
+    """Durable FIFO of submissions waiting for the main database; safe to share between threads"""
+
+    def __init__(self, path=None):
+        self.path = path or db_config.OUTBOX_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=db_config.POOL_TIMEOUT,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")     # a queued submission survives a power cut
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS outbox (
+                                  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                                  submission_id TEXT NOT NULL UNIQUE,
+                                  payload TEXT NOT NULL,
+                                  created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                                  attempts INTEGER NOT NULL DEFAULT 0,
+                                  last_error TEXT NULL
+                              )""")
+        self._conn.commit()
+
+    def add(self, data):
+        """Queue one validated registration; returns its submission id"""
+        submission_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("INSERT INTO outbox (submission_id, payload) VALUES (?, ?)",
+                               (submission_id, json.dumps(data)))
+            self._conn.commit()
+        return submission_id
+
+    def peek(self, limit=FLUSH_BATCH):
+        """Oldest ``(submission_id, data)`` pairs still worth sending"""
+        with self._lock:
+            rows = self._conn.execute("SELECT submission_id, payload FROM outbox WHERE attempts < ? "
+                                      "ORDER BY seq LIMIT ?", (MAX_ATTEMPTS, limit)).fetchall()
+        return [(submission_id, json.loads(payload)) for submission_id, payload in rows]
+
+    def similar(self, data):
+        """Queued registrations that look like the same learner as ``data``"""
+        key = duplicates.name_key(data["First Name"], data["Last Name"])
+        wanted = (data["First Name"], data["Last Name"], data["Guardian"])
+        with self._lock:
+            payloads = [json.loads(row[0]) for row in self._conn.execute("SELECT payload FROM outbox")]
+        return [queued for queued in payloads
+                if duplicates.name_key(queued["First Name"], queued["Last Name"]) == key
+                and duplicates.likely_duplicate(wanted, (queued["First Name"], queued["Last Name"],
+                                                         queued["Guardian"]))]
+
+    def remove(self, submission_ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM outbox WHERE submission_id = ?",
+                                   [(submission_id,) for submission_id in submission_ids])
+            self._conn.commit()
+
+    def mark_failed(self, submission_id, error):
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE submission_id = ?",
+                               (str(error), submission_id))
+            self._conn.commit()
+
+    def counts(self):
+        """(waiting, stuck): stuck submissions were rejected MAX_ATTEMPTS times"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(attempts < ?), 0), COALESCE(SUM(attempts >= ?), 0) "
+                                      "FROM outbox", (MAX_ATTEMPTS, MAX_ATTEMPTS)).fetchone()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class OutboxFlusher:
+    """Background thread that drains an Outbox into the students table
+
+    ``waiting``, ``stuck`` and ``last_error`` are plain attributes the UI can
+    poll; the thread never calls back into Tk.  ``on_sent(registrations)``,
+    if given, runs on the flusher thread after each committed batch.
+    """
+
+    def __init__(self, outbox, repo, batch_size=FLUSH_BATCH, interval=FLUSH_INTERVAL, max_backoff=MAX_BACKOFF,
+                 on_sent=None):
+        self.outbox = outbox
+        self.repo = repo
+        self.on_sent = on_sent
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+
+        self.waiting, self.stuck = outbox.counts()
+        self.last_error = None
+
+        self._migrated = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def kick(self):
+        """Flush now instead of at the next interval (e.g. right after a submission)"""
+        self._wake.set()
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def flush(self):
+        """Send everything queued; returns how many were sent.  Raises while the database is unreachable"""
+        if not self._migrated:
+            self.repo.migrate()     # the submission_id column must exist before the first insert
+            self._migrated = True
+
+        sent = 0
+        while not self._stop.is_set():
+            batch = self.outbox.peek(self.batch_size)
+            if not batch:
+                break
+            try:
+                self.repo.insert_submissions(batch)
+                done = [submission_id for submission_id, _ in batch]
+            except Exception:
+                done = self._flush_singly(batch)
+            self.outbox.remove(done)
+            if self.on_sent is not None and done:
+                sent_ids = set(done)
+                self.on_sent([data for submission_id, data in batch if submission_id in sent_ids])
+            sent += len(done)
+            if not done:
+                break       # only rejected submissions left; try them again next round
+        return sent
+
+    def _flush_singly(self, batch):
+        """Send a failed batch one submission at a time, setting aside the ones the database rejects"""
+        done = []
+        for submission in batch:
+            try:
+                self.repo.insert_submissions([submission])
+                done.append(submission[0])
+            except Exception as e:
+                self.repo.ping()    # raises if the database is down rather than rejecting this row
+                self.outbox.mark_failed(submission[0], e)
+        return done
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop.is_set():
+            try:
+                self.flush()
+                self.last_error = None
+                delay = self.interval
+            except Exception as e:
+                self.last_error = str(e)
+                delay = min(delay * 2, self.max_backoff)
+            try:
+                self.waiting, self.stuck = self.outbox.counts()
+            except sqlite3.Error:
+                pass
+            self._wake.wait(delay)
+            self._wake.clear()
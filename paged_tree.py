@@ -0,0 +1,283 @@
+from bisect import bisect_left
+from collections import deque
+
+import metrics
+
+PAGE_SIZE = 200         # rows fetched per query
+MAX_PAGES = 5           # pages kept materialized in the Treeview
+SCROLL_MARGIN = 0.15    # fraction of the scroll range that triggers a fetch
+
+
+class PagedTreeview:
+    """Keyset-paginated Treeview that only keeps a window of pages materialized
+
+    ``fetch_page(after=None, before=None, limit=PAGE_SIZE)`` must return rows
+    in ascending key order: the first rows when both cursors are None, rows
+    following ``after`` or rows preceding ``before`` (both are full rows).
+
+    ``fetch_changes(since)`` returns ``(rows, watermark)`` with every row
+    changed since ``since``; ``rows`` is None when too many changed to patch,
+    and with ``since=None`` only the current watermark is wanted.  A
+    one-element row ``(id,)`` is a tombstone for a deleted student.
+
+    ``run(fn, on_done, on_error)`` decides where ``fn`` executes; pass a
+    background runner so queries never block the Tk main loop.
+
+    The rows stay the source of truth (see ``row``); ``render(row)`` gives the
+    values handed to Tk, so columns nobody sees never become Tcl strings.
+    """
+
+    def __init__(self, tree, scrollbar, fetch_page, fetch_changes=None, key=lambda row: row[0],
+                 matches=None, row_tags=None, render=None, on_error=None, run=None,
+                 page_size=PAGE_SIZE, max_pages=MAX_PAGES):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.fetch_changes = fetch_changes
+        self.key = key
+        self.matches = matches or (lambda row: True)
+        self.row_tags = row_tags
+        self.render = render or (lambda row: row)
+        self.on_error = on_error
+        self.run = run or _run_inline
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        self._pages = deque()
+        self._rows = {}         # item id -> row; item ids are the student ids
+        self._has_before = False
+        self._has_after = False
+        self._watermark = None
+        self._pending = None
+        self._loading = False
+        self._generation = 0
+
+        tree.configure(yscrollcommand=self._on_yscroll)
+        scrollbar.configure(command=tree.yview)
+
+    def reset(self):
+        """Drop every materialized row and load the first page again"""
+        if self._pending is not None:
+            self.tree.after_cancel(self._pending)
+            self._pending = None
+        # Results of loads started before the reset are ignored
+        self._generation += 1
+
+        def load():
+            # Take the watermark first so edits racing the page query are re-synced
+            watermark = self.fetch_changes(None)[1] if self.fetch_changes else None
+            return watermark, self.fetch_page(limit=self.page_size)
+
+        self._start(load, self._replace, loading=True)
+
+    def cancel(self):
+        """Forget loads in flight, e.g. when their tasks were cancelled; the next sync starts over"""
+        if self._pending is not None:
+            self.tree.after_cancel(self._pending)
+            self._pending = None
+        self._generation += 1
+        if self._loading:
+            self._loading = False
+            self._watermark = None
+
+    def sync(self, run=None):
+        """Patch in rows changed since the last load instead of reloading everything
+
+        ``run`` overrides the runner for this call, e.g. for a quiet periodic poll.
+        """
+        if self.fetch_changes is None or self._watermark is None:
+            self.reset()
+            return
+        since = self._watermark
+        self._start(lambda: self.fetch_changes(since), self._apply_changes, run=run)
+
+    def row(self, iid):
+        """Row tuple behind a Treeview item"""
+        return self._rows.get(iid)
+
+    def patch(self, row):
+        """Insert, update or remove one row in place"""
+        if len(row) == 1:
+            self.remove(row[0])
+            return
+        iid = str(row[0])
+        old = self._rows.get(iid)
+        if old == row:
+            return      # unchanged; change polls return rows at the watermark again
+        if old is not None and self.matches(row) and self.key(old) == self.key(row):
+            self._replace_in_page(old, row)
+            self._rows[iid] = row
+            self.tree.item(iid, values=self.render(row), tags=self._tags(row))
+            return
+
+        if old is not None:
+            self.remove(row[0])
+        if self.matches(row):
+            self._insert_sorted(row)
+
+    def remove(self, student_id):
+        """Remove one row if it is currently materialized"""
+        iid = str(student_id)
+        row = self._rows.pop(iid, None)
+        if row is None:
+            return
+        for page in self._pages:
+            if row in page:
+                page.remove(row)
+                if not page:
+                    self._pages.remove(page)
+                break
+        self.tree.delete(iid)
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        first, last = float(first), float(last)
+        if self._pending is not None or self._loading:
+            return
+        if last >= 1 - SCROLL_MARGIN and self._has_after:
+            self._pending = self.tree.after_idle(self._load_next)
+        elif first <= SCROLL_MARGIN and self._has_before:
+            self._pending = self.tree.after_idle(self._load_previous)
+
+    def _load_next(self):
+        self._pending = None
+        if self._pages:
+            after = self._pages[-1][-1]
+            self._start(lambda: self.fetch_page(after=after, limit=self.page_size),
+                        self._append, loading=True)
+
+    def _load_previous(self):
+        self._pending = None
+        if self._pages:
+            before = self._pages[0][0]
+            self._start(lambda: self.fetch_page(before=before, limit=self.page_size),
+                        self._prepend, loading=True)
+
+    def _start(self, job, apply, loading=False, run=None):
+        """Run ``job`` through ``run`` and apply its result unless a reset superseded it"""
+        generation = self._generation
+        if loading:
+            self._loading = True
+
+        def done(result):
+            if generation == self._generation:
+                if loading:
+                    self._loading = False
+                with metrics.timer("treeview_populate_seconds", op=apply.__name__.lstrip("_")):
+                    apply(result)
+
+        def failed(e):
+            if generation != self._generation:
+                return
+            if loading:
+                self._loading = False
+            if self.on_error is None:
+                raise e
+            self.on_error(e)
+
+        (run or self.run)(job, done, failed)
+
+    def _replace(self, result):
+        self._watermark, rows = result
+        self.tree.delete(*self.tree.get_children())
+        self._pages.clear()
+        self._rows.clear()
+        self._has_before = False
+        self._append(rows)
+
+    def _apply_changes(self, result):
+        rows, watermark = result
+        if rows is None:
+            self.reset()
+            return
+        self._watermark = watermark
+        for row in rows:
+            self.patch(row)
+
+    def _append(self, rows):
+        self._has_after = len(rows) >= self.page_size
+        if not rows:
+            return
+        top = self._top_index()
+        for row in rows:
+            self._insert("end", row)
+        self._pages.append(list(rows))
+
+        if len(self._pages) > self.max_pages:
+            dropped = self._pages.popleft()
+            self._forget(dropped)
+            self._has_before = True
+            self._scroll_to(top - len(dropped))
+
+    def _prepend(self, rows):
+        self._has_before = len(rows) >= self.page_size
+        if not rows:
+            return
+        top = self._top_index()
+        for index, row in enumerate(rows):
+            self._insert(index, row)
+        self._pages.appendleft(list(rows))
+
+        if len(self._pages) > self.max_pages:
+            self._forget(self._pages.pop())
+            self._has_after = True
+        self._scroll_to(top + len(rows))
+
+    def _insert_sorted(self, row):
+        """Place a new row by key, if its position falls inside the loaded window"""
+        key = self.key(row)
+        if not self._pages:
+            if self._has_before or self._has_after:
+                return
+            self._pages.append([])
+        elif key < self.key(self._pages[0][0]) and self._has_before:
+            return
+        elif key > self.key(self._pages[-1][-1]) and self._has_after:
+            return
+
+        offset = 0
+        for number, page in enumerate(self._pages):
+            if number == len(self._pages) - 1 or key <= self.key(page[-1]):
+                position = bisect_left([self.key(r) for r in page], key)
+                page.insert(position, row)
+                self._insert(offset + position, row)
+                return
+            offset += len(page)
+
+    def _replace_in_page(self, old, row):
+        for page in self._pages:
+            for index, existing in enumerate(page):
+                if existing is old:
+                    page[index] = row
+                    return
+
+    def _insert(self, index, row):
+        iid = str(row[0])
+        self._rows[iid] = row
+        self.tree.insert("", index, iid=iid, values=self.render(row), tags=self._tags(row))
+
+    def _tags(self, row):
+        return self.row_tags(row) if self.row_tags else ()
+
+    def _forget(self, rows):
+        iids = [str(row[0]) for row in rows]
+        for iid in iids:
+            del self._rows[iid]
+        self.tree.delete(*iids)
+
+    def _top_index(self):
+        return int(round(self.tree.yview()[0] * len(self._rows)))
+
+    def _scroll_to(self, index):
+        """Keep the same rows on screen after the window shifted"""
+        if self._rows:
+            self.tree.yview_moveto(max(index, 0) / len(self._rows))
+
+
+def _run_inline(fn, on_done, on_error):
+    try:
+        result = fn()
+    except Exception as e:
+        on_error(e)
+        return
+    on_done(result)
@@ -1,8 +1,25 @@
+import os
+import sqlite3
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from db_config import get_connection
+from tkinter import ttk, filedialog, messagebox, simpledialog
+import metrics
+from outbox import Outbox, OutboxFlusher
+from roster_cache import RosterCache
+from choices import (ACCEPTED, ACTIVE_STATUSES, DROPPED, GENDERS, GRADE_LEVELS, GRADUATED, PENDING, REJECTED, STATUSES,
+                     STRAND_CODES, STRANDS, current_school_year, parse_school_year, school_year_label)
+from student_query import StudentFilter, StudentRecord, format_changes
+from student_repository import StudentRepository, WriteConflict
+from task_runner import TaskRunner
 from ui_utils import *
+from validation import PERSONAL_FIELDS, ValidationError, validate_student
 
+CHANGE_POLL_MS = 5000   # how often an open roster picks up other stations' edits
+OUTBOX_POLL_MS = 1000   # how often the main window refreshes the pending-sync count
+STATS_POLL_MS = 5000    # how often an open statistics dashboard re-reads its counters
+DUPLICATE_CHECK_MS = 2000   # longest a submit waits on the duplicate lookup before going ahead
+ARCHIVED_SUFFIX = " (archived)"
 
 class SHSRegistrationSystem:
     def __init__(self, root):
@@ -15,6 +32,19 @@ class SHSRegistrationSystem:
         # Apply treeview styling
         style_treeview()
 
+        # All database work runs on background threads
+        self.repo = StudentRepository()
+        # The admin portal records the logged-in administrator; public views keep the default actor
+        self.admin_repo = StudentRepository()
+        # Roster pages shared by every student view; stats go into metrics dumps
+        self.roster = RosterCache(self.repo)
+        metrics.add_source("roster_cache", self.roster.stats)
+        self.windows = {}       # name -> (Toplevel, show); built once, then hidden and re-shown
+        self.cancels = {}       # window -> Event set when it is hidden, for exports and imports to stop
+        self.hide_hooks = {}    # window -> callback that resets its state when its tasks are cancelled
+        self.tasks = TaskRunner(self.root, on_busy=self.show_busy)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
         # Header
         header_frame = tk.Frame(self.root, bg=ACCENT_COLOR, height=100)
         header_frame.pack(fill=tk.X)
@@ -28,6 +58,22 @@ class SHSRegistrationSystem:
             fg="white"
         ).pack(expand=True)
 
+        # Busy indicator
+        self.status_label = tk.Label(self.root, text="", font=("Segoe UI", 9),
+                                     bg=PRIMARY_BG, fg=TEXT_SECONDARY)
+        self.status_label.pack(side=tk.BOTTOM, pady=(0, 8))
+
+        # Wizard submissions are queued locally and synced in the background
+        self.sync_label = tk.Label(self.root, text="", font=("Segoe UI", 9),
+                                   bg=PRIMARY_BG, fg=TEXT_SECONDARY)
+        self.sync_label.pack(side=tk.BOTTOM)
+        self.outbox = Outbox()
+        # Separate actor, so wizard submissions are audited apart from registrar edits
+        self.flusher = OutboxFlusher(self.outbox, StudentRepository(actor="wizard"),
+                                     on_sent=self.roster.invalidate_registrations)
+        self.flusher.start()
+        self.show_sync_status()
+
         # Main content
         content_frame = tk.Frame(self.root, bg=PRIMARY_BG)
         content_frame.pack(fill=tk.BOTH, expand=True, padx=50, pady=40)
@@ -51,13 +97,150 @@ class SHSRegistrationSystem:
             btn = create_rounded_button(content_frame, text, cmd, color=color, hover_color=ACCENT_HOVER)
             btn.pack(pady=10)
 
-    def open_student_registration(self):
+        # Instrumentation: Ctrl+Shift+M toggles it, Ctrl+Shift+D saves a snapshot
+        self.root.bind_all("<Control-M>", self.toggle_metrics)
+        self.root.bind_all("<Control-D>", self.dump_metrics)
+
+        # Bring the schema up to date in the background
+        self.run_db(self.repo.migrate, self.root, None, error_title="Database Error",
+                    error_prefix="Could not prepare the database:\n")
+
+    def show_busy(self, pending):
+        """Show how many database tasks are still running"""
+        self.status_label.config(text=f"⏳ Working... ({pending})" if pending else "")
+
+    def show_sync_status(self):
+        """Show how many submissions are still waiting for the database"""
+        flusher = self.flusher
+        text = ""
+        if flusher.waiting:
+            text = f"📮 {flusher.waiting} registration(s) waiting to sync"
+            if flusher.last_error:
+                text += " (database unreachable, retrying)"
+        if flusher.stuck:
+            text += f"{'; ' if text else '⚠ '}{flusher.stuck} rejected by the database (see {self.outbox.path})"
+        self.sync_label.config(text=text, fg=DANGER_COLOR if flusher.stuck or flusher.last_error else TEXT_SECONDARY)
+        self.sync_label.after(OUTBOX_POLL_MS, self.show_sync_status)
+
+    def run_db(self, fn, owner, on_done, error_title="Error", error_prefix="", on_error=None, on_conflict=None):
+        """Run a database call in the background and report failures in ``owner``
+
+        ``on_conflict(e)`` handles a WriteConflict instead of the error dialog.
+        """
+        def failed(e):
+            if on_conflict is not None and isinstance(e, WriteConflict):
+                on_conflict(e)
+                return
+            if on_error is not None:
+                on_error(e)
+            if owner.winfo_exists():
+                messagebox.showerror(error_title, f"{error_prefix}{str(e)}", parent=owner)
+
+        return self.tasks.submit(fn, owner=owner, on_done=on_done, on_error=failed)
+
+    @staticmethod
+    def status_updated(rows, current, status):
+        """The ``rows`` a versioned set_status really changed, as they are now
+
+        ``current`` is the same students read back afterwards; a row we
+        updated is one version on and has ``status``, while one skipped as a
+        conflict was changed some other way.
+        """
+        now = {row.id: (row.status, row.version) for row in current}
+        return [row._replace(status=status, version=row.version + 1)
+                for row in rows if now.get(row.id) == (status, row.version + 1)]
+
+    def toggle_metrics(self, _=None):
+        if metrics.enabled:
+            metrics.disable()
+        else:
+            metrics.enable()
+        self.status_label.config(text=f"Instrumentation {'on' if metrics.enabled else 'off'}")
+
+    def dump_metrics(self, _=None):
+        """Save the latency histograms and slow-query log as JSON or Prometheus text"""
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Save Metrics", defaultextension=".json", initialfile="metrics.json",
+            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            metrics.dump(path)
+        except OSError as e:
+            messagebox.showerror("Save Failed", str(e), parent=self.root)
+
+    def close(self):
+        """Stop background work and release pooled connections"""
+        # SHS_METRICS_DUMP=path keeps a snapshot of the session's numbers
+        if metrics.enabled and os.environ.get("SHS_METRICS_DUMP"):
+            try:
+                metrics.dump(os.environ["SHS_METRICS_DUMP"])
+            except OSError:
+                pass
+        self.tasks.shutdown()
+        self.flusher.stop()
+        self.outbox.close()
+        self.repo.close()
+        self.root.destroy()
+
+    def reuse_window(self, name, *args):
+        """Re-show a window built earlier; False when it still has to be built"""
+        cached = self.windows.get(name)
+        if cached is None or not cached[0].winfo_exists():
+            return False
+        cached[1](*args)
+        return True
+
+    def keep_window(self, name, win, show, *args, on_hide=None):
+        """Cache ``win``: closing it only hides it, and ``show(*args)`` resets and re-shows it
+
+        ``on_hide`` runs after the window's tasks are cancelled, to clear any
+        busy flags they would have cleared on completion.
+        """
+        if on_hide is not None:
+            self.hide_hooks[win] = on_hide
+        win.protocol("WM_DELETE_WINDOW", lambda: self.hide_window(win))
+        win.bind("<Destroy>", lambda e: e.widget is win and self.stop_window_work(win), add="+")
+        self.windows[name] = (win, show)
+        show(*args)
+
+    def show_window(self, win, size=None, modal=True):
+        win.deiconify()
+        if size:
+            center_window(win, *size)
+        if modal:
+            win.grab_set()
+        win.lift()
+        win.focus_set()
+
+    def hide_window(self, win):
+        win.grab_release()
+        win.withdraw()
+        # A hidden window is closed as far as its work is concerned
+        self.stop_window_work(win)
+        if win in self.hide_hooks:
+            self.hide_hooks[win]()
+
+    def stop_window_work(self, win):
+        """Cancel ``win``'s queued tasks and signal its running exports and imports to stop"""
+        self.tasks.cancel(win)
+        cancel = self.cancels.pop(win, None)
+        if cancel is not None:
+            cancel.set()
+
+    def cancel_event(self, win):
+        """Event that is set once ``win`` is hidden or destroyed"""
+        return self.cancels.setdefault(win, threading.Event())
+
+    def open_student_registration(self, keep_input=False):
         """Step 1: Student Registration Form"""
+        if self.reuse_window("registration", keep_input):
+            return
+
         reg_win = tk.Toplevel(self.root)
+        reg_win.withdraw()  # built hidden, shown by show() below
         reg_win.title("Student Registration")
         reg_win.configure(bg=SECONDARY_BG)
-        reg_win.grab_set()  # Make modal
-        center_window(reg_win, 550, 700)
         reg_win.resizable(False, False)
 
         # Header
@@ -72,37 +255,32 @@ class SHSRegistrationSystem:
         entries = {}
         entries["First Name"] = create_entry_field(form_frame, "First Name *")
         entries["Last Name"] = create_entry_field(form_frame, "Last Name *")
-        entries["Grade Level"] = create_combobox_field(form_frame, "Grade Level *", ["Grade 11", "Grade 12"])
-        entries["Gender"] = create_combobox_field(form_frame, "Gender *", ["Male", "Female"])
+        entries["Grade Level"] = create_combobox_field(form_frame, "Grade Level *", GRADE_LEVELS)
+        entries["Gender"] = create_combobox_field(form_frame, "Gender *", GENDERS)
         entries["Age"] = create_entry_field(form_frame, "Age *")
         entries["Guardian"] = create_entry_field(form_frame, "Guardian/Parent Name *")
 
-        def next_step():
-            data = {}
-            for k, v in entries.items():
-                value = v.get().strip()
-                data[k] = value
-
-            # Validation
-            if not all(data.values()):
-                messagebox.showwarning("Incomplete Form", "Please fill in all required fields!", parent=reg_win)
-                return
-
-            age_str = data["Age"]
-            if not age_str.isdigit():
-                messagebox.showwarning("Invalid Age", "Please enter a valid number for Age!", parent=reg_win)
-                return
+        def show(keep_input=False):
+            # Going Back keeps what was typed; a new registration starts blank
+            if not keep_input:
+                for field in entries.values():
+                    clear_field(field)
+            self.show_window(reg_win, (550, 700))
+            entries["First Name"].focus_set()
 
-            age = int(age_str)
-            if age < 1 or age > 100:
-                messagebox.showwarning("Invalid Age", "Please enter a valid age (1-100)!", parent=reg_win)
+        def next_step():
+            # Validation (shared with the bulk importer)
+            try:
+                data = validate_student({k: v.get() for k, v in entries.items()}, require_strand=False)
+            except ValidationError as e:
+                messagebox.showwarning(e.title, str(e), parent=reg_win)
                 return
 
-            reg_win.destroy()
+            self.hide_window(reg_win)
             self.open_strand_selection(data)
 
         def cancel():
-            reg_win.destroy()
+            self.hide_window(reg_win)
 
         # Buttons
         btn_frame = tk.Frame(reg_win, bg=SECONDARY_BG)
@@ -114,13 +292,17 @@ class SHSRegistrationSystem:
 
         create_rounded_button(btn_frame, "Next →", next_step, width=12).pack(side=tk.LEFT, padx=10)
 
+        self.keep_window("registration", reg_win, show, keep_input)
+
     def open_strand_selection(self, student_data):
         """Step 2: Strand Selection"""
+        if self.reuse_window("strand", student_data):
+            return
+
         strand_win = tk.Toplevel(self.root)
+        strand_win.withdraw()
         strand_win.title("Strand Selection")
         strand_win.configure(bg=SECONDARY_BG)
-        strand_win.grab_set()
-        center_window(strand_win, 500, 550)
         strand_win.resizable(False, False)
 
         create_header(strand_win, "Choose Your Strand")
@@ -131,17 +313,10 @@ class SHSRegistrationSystem:
         strand_frame.pack(pady=20, padx=50, fill=tk.BOTH, expand=True)
 
         strand_var = tk.StringVar()
+        current = {"data": None}   # the registration this step is showing
+        seat_labels = {}
 
-        strands = [
-            ("STEM", "Science, Technology, Engineering, Mathematics"),
-            ("ABM", "Accountancy, Business, Management"),
-            ("HUMSS", "Humanities and Social Sciences"),
-            ("TVL ICT", "Information & Communication Technology"),
-            ("TVL EIM", "Electrical Installation & Maintenance"),
-            ("GAS", "General Academic Strand")
-        ]
-
-        for strand, desc in strands:
+        for strand, desc in STRANDS:
             frame = tk.Frame(strand_frame, bg="white", highlightbackground=BORDER_COLOR,
                              highlightthickness=1, cursor="hand2")
             frame.pack(fill=tk.X, pady=8, ipady=10)
@@ -168,35 +343,60 @@ class SHSRegistrationSystem:
                 fg=TEXT_SECONDARY
             ).pack(anchor="w", padx=40)
 
+            # Seats left, for strands with a limit; filled in by show()
+            seat_labels[strand] = tk.Label(frame, text="", font=("Segoe UI", 9, "italic"), bg="white")
+            seat_labels[strand].place(relx=1.0, x=-15, y=8, anchor="ne")
+
+        def show_seats(seats):
+            for strand, label in seat_labels.items():
+                if strand not in seats:
+                    label.config(text="")
+                elif seats[strand] > 0:
+                    label.config(text=f"{seats[strand]} seat(s) left", fg=TEXT_SECONDARY)
+                else:
+                    label.config(text="Full · you will be waitlisted", fg=DANGER_COLOR)
+
+        def show(data):
+            current["data"] = data
+            strand_var.set(data.get("Strand", ""))
+            self.show_window(strand_win, (500, 550))
+            # Informational only: a failed read just leaves the labels as they were
+            self.tasks.submit(self.repo.strand_seats, current_school_year(), owner=strand_win, quiet=True,
+                              on_done=show_seats, on_error=lambda _: None)
+
         # Buttons
         btn_frame = tk.Frame(strand_win, bg=SECONDARY_BG)
         btn_frame.pack(pady=30)
 
         def back():
-            strand_win.destroy()
-            self.open_student_registration()
+            self.hide_window(strand_win)
+            self.open_student_registration(keep_input=True)
 
         def next_step():
             if not strand_var.get():
                 messagebox.showwarning("No Selection", "Please select a strand!", parent=strand_win)
                 return
 
-            student_data["Strand"] = strand_var.get()
-            strand_win.destroy()
-            self.open_confirmation(student_data)
+            current["data"]["Strand"] = strand_var.get()
+            self.hide_window(strand_win)
+            self.open_confirmation(current["data"])
 
         tk.Button(btn_frame, text="← Back", command=back, font=FONT_BUTTON,
                   bg=TEXT_SECONDARY, fg="white", width=12, height=2, cursor="hand2").pack(side=tk.LEFT, padx=10)
 
         create_rounded_button(btn_frame, "Next →", next_step, width=12).pack(side=tk.LEFT, padx=10)
 
+        self.keep_window("strand", strand_win, show, student_data)
+
     def open_confirmation(self, student_data):
         """Step 3: Confirmation"""
+        if self.reuse_window("confirmation", student_data):
+            return
+
         confirm_win = tk.Toplevel(self.root)
+        confirm_win.withdraw()
         confirm_win.title("Confirm Registration")
         confirm_win.configure(bg=SECONDARY_BG)
-        confirm_win.grab_set()
-        center_window(confirm_win, 550, 600)
         confirm_win.resizable(False, False)
 
         create_header(confirm_win, "Confirm Your Details")
@@ -215,7 +415,10 @@ class SHSRegistrationSystem:
             fg=TEXT_SECONDARY
         ).pack(pady=15)
 
-        for k, v in student_data.items():
+        # One row per wizard field; show() fills in the values
+        values = {}
+        current = {"data": None}
+        for k in PERSONAL_FIELDS + ["Strand"]:
             row = tk.Frame(info_frame, bg="white")
             row.pack(fill=tk.X, padx=30, pady=5)
 
@@ -229,14 +432,14 @@ class SHSRegistrationSystem:
                 anchor="w"
             ).pack(side=tk.LEFT)
 
-            tk.Label(
+            values[k] = tk.Label(
                 row,
-                text=v,
                 font=FONT_NORMAL,
                 bg="white",
                 fg=TEXT_PRIMARY,
                 anchor="w"
-            ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+            )
+            values[k].pack(side=tk.LEFT, fill=tk.X, expand=True)
 
         tk.Label(
             info_frame,
@@ -246,56 +449,95 @@ class SHSRegistrationSystem:
             fg=TEXT_SECONDARY
         ).pack(pady=15)
 
+        def show(data):
+            current["data"] = data
+            for k, label in values.items():
+                label.config(text=data.get(k, ""))
+            submit_btn.config(state=tk.NORMAL)
+            self.show_window(confirm_win, (550, 600))
+
         # Buttons
         btn_frame = tk.Frame(confirm_win, bg=SECONDARY_BG)
         btn_frame.pack(pady=30)
 
         def back():
-            confirm_win.destroy()
-            self.open_strand_selection(student_data)
+            self.hide_window(confirm_win)
+            self.open_strand_selection(current["data"])
 
         def register():
+            submit_btn.config(state=tk.DISABLED)
+            data = current["data"]
+            check = {"done": False}
+
+            def find_duplicates():
+                return self.outbox.similar(data), self.repo.similar_students(data)
+
+            def checked(result):
+                if check["done"]:
+                    return
+                check["done"] = True
+                queued, existing = result
+                if queued or existing:
+                    lines = [f"• {r.first_name} {r.last_name}, guardian {r.guardian} ({r.status}, ID {r.id})"
+                             for r in existing[:3]]
+                    lines += [f"• {d['First Name']} {d['Last Name']}, guardian {d['Guardian']} (waiting to sync)"
+                              for d in queued[:3 - len(lines)]]
+                    if not messagebox.askyesno(
+                            "Possible Duplicate",
+                            "This learner may already be registered:\n\n" + "\n".join(lines)
+                            + "\n\nSubmit this registration anyway?", parent=confirm_win):
+                        submit_btn.config(state=tk.NORMAL)
+                        return
+                queue()
+
+            def unchecked(_=None):
+                # Database slow or unreachable: submit anyway; the admin duplicate report catches it later
+                if not check["done"]:
+                    check["done"] = True
+                    queue()
+
+            self.tasks.submit(find_duplicates, owner=confirm_win, on_done=checked, on_error=unchecked)
+            confirm_win.after(DUPLICATE_CHECK_MS, unchecked)
+
+        def queue():
+            # Queued locally first, so the learner never waits on (or loses input to) the database
             try:
-                conn = get_connection()
-                cur = conn.cursor()
-                sql = """INSERT INTO students
-                         (first_name, last_name, grade_level, gender, age, guardian, strand, status)
-                         VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"""
-                vals = (
-                    student_data["First Name"],
-                    student_data["Last Name"],
-                    student_data["Grade Level"],
-                    student_data["Gender"],
-                    int(student_data["Age"]),
-                    student_data["Guardian"],
-                    student_data["Strand"],
-                    "Pending"
-                )
-                cur.execute(sql, vals)
-                conn.commit()
-                cur.close()
-                conn.close()
-
-                messagebox.showinfo(
-                    "Registration Successful!",
-                    "Your registration has been submitted successfully!\n\n"
-                    "Please wait for admin approval.",
-                    parent=confirm_win
-                )
-                confirm_win.destroy()
-
-            except Exception as e:
-                messagebox.showerror("Database Error", f"An error occurred:\n{str(e)}", parent=confirm_win)
+                self.outbox.add(current["data"])
+            except sqlite3.Error as e:
+                submit_btn.config(state=tk.NORMAL)
+                messagebox.showerror("Registration Error", f"Could not save the registration:\n{e}",
+                                     parent=confirm_win)
+                return
+            self.flusher.kick()
+            messagebox.showinfo(
+                "Registration Successful!",
+                "Your registration has been submitted successfully!\n\n"
+                "Please wait for admin approval.",
+                parent=confirm_win
+            )
+            self.hide_window(confirm_win)
 
         tk.Button(btn_frame, text="← Back", command=back, font=FONT_BUTTON,
                   bg=TEXT_SECONDARY, fg="white", width=12, height=2, cursor="hand2").pack(side=tk.LEFT, padx=10)
 
-        create_rounded_button(btn_frame, "✓ Submit", register, color=SUCCESS_COLOR, width=12).pack(side=tk.LEFT,
-                                                                                                   padx=10)
+        submit_btn = create_rounded_button(btn_frame, "✓ Submit", register, color=SUCCESS_COLOR, width=12)
+        submit_btn.pack(side=tk.LEFT, padx=10)
+
+        self.keep_window("confirmation", confirm_win, show, student_data)
 
     def view_students(self, active_only=True):
         """View all students with actions"""
+        name = "students" if active_only else "admin"
+        if self.reuse_window(name):
+            return
+
+        # Not needed for the first screen, so imported on first use
+        from exporter import ExportCancelled, export_students
+        from paged_tree import PagedTreeview
+
+        repo = self.repo if active_only else self.admin_repo
         view_win = tk.Toplevel(self.root)
+        view_win.withdraw()
         title = "Registered Students" if active_only else "Admin - All Students"
         view_win.title(title)
         view_win.configure(bg=PRIMARY_BG)
@@ -314,6 +556,21 @@ class SHSRegistrationSystem:
             fg="white"
         ).pack(expand=True)
 
+        # Filter bar
+        filter_frame = tk.Frame(view_win, bg=PRIMARY_BG)
+        filter_frame.pack(fill=tk.X, padx=20, pady=(15, 0))
+
+        name_entry = create_filter_entry(filter_frame, "Name (Last, First)", width=18)
+        strand_combo = create_filter_combobox(filter_frame, "Strand", STRAND_CODES)
+        grade_combo = create_filter_combobox(filter_frame, "Grade", GRADE_LEVELS)
+        status_combo = create_filter_combobox(filter_frame, "Status",
+                                              ACTIVE_STATUSES if active_only else STATUSES)
+        gender_combo = create_filter_combobox(filter_frame, "Gender", GENDERS)
+        # Defaults to the current school year; closed years are read from the archive
+        year_combo = create_filter_combobox(filter_frame, "Year", [school_year_label(current_school_year())],
+                                            width=16)
+        year_combo.set(school_year_label(current_school_year()))
+
         # Table frame
         table_frame = tk.Frame(view_win, bg=PRIMARY_BG)
         table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
@@ -324,54 +581,207 @@ class SHSRegistrationSystem:
 
         columns = ("ID", "First Name", "Last Name", "Grade", "Gender",
                    "Age", "Guardian", "Strand", "Status")
-        tree = ttk.Treeview(table_frame, columns=columns, show="headings",
-                            yscrollcommand=tree_scroll.set)
-        tree_scroll.config(command=tree.yview)
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="extended")
 
         # Column configuration
         widths = {"ID": 50, "First Name": 120, "Last Name": 120, "Grade": 80,
                   "Gender": 80, "Age": 50, "Guardian": 150, "Strand": 100, "Status": 100}
 
         for col in columns:
-            tree.heading(col, text=col)
+            tree.heading(col, text=col, command=lambda c=col: sort_by(c))
             tree.column(col, width=widths.get(col, 100),
                         anchor="center" if col in ["ID", "Age", "Grade", "Gender", "Status"] else "w")
 
         tree.pack(fill=tk.BOTH, expand=True)
 
+        # Color coding
+        tree.tag_configure(ACCEPTED, background="#d4edda")
+        tree.tag_configure(PENDING, background="#fff3cd")
+        tree.tag_configure(DROPPED, background="#f8d7da")
+        tree.tag_configure(REJECTED, background="#f8d7da")
+        tree.tag_configure(GRADUATED, background="#d1ecf1")
+
+        # Current filters and sort order; replaced whenever the user changes them
+        view = {"filter": StudentFilter(statuses=ACTIVE_STATUSES if active_only else None,
+                                        school_year=current_school_year())}
+
+        def fetch_page(after=None, before=None, limit=None):
+            # Keyset pagination: never OFFSET, never the whole table
+            return self.roster.page(view["filter"], after=after, before=before, limit=limit)
+
+        def show_load_error(e):
+            messagebox.showerror("Database Error", f"Error loading data:\n{str(e)}", parent=view_win)
+
+        def run_query(fn, on_done, on_error):
+            self.tasks.submit(fn, owner=view_win, on_done=on_done, on_error=on_error)
+
+        pager = PagedTreeview(tree, tree_scroll, fetch_page, fetch_changes=self.roster.changes_since,
+                              key=view["filter"].sort_key, matches=view["filter"].matches,
+                              row_tags=lambda row: (row.status,), render=StudentRecord.display,
+                              on_error=show_load_error, run=run_query)
+
+        def set_filter(student_filter):
+            view["filter"] = student_filter
+            pager.key = student_filter.sort_key
+            pager.matches = student_filter.matches
+            tree.selection_set(())
+            pager.reset()
+
+        def combo_value(combo):
+            return None if combo.get() == "All" else combo.get()
+
+        def apply_filters(_=None):
+            current = view["filter"]
+            year = combo_value(year_combo)
+            set_filter(StudentFilter(name=name_entry.get(), strand=combo_value(strand_combo),
+                                     grade_level=combo_value(grade_combo), status=combo_value(status_combo),
+                                     gender=combo_value(gender_combo), statuses=current.statuses,
+                                     sort=current.sort, descending=current.descending,
+                                     school_year=parse_school_year(year.split()[0]) if year else None,
+                                     archived=bool(year) and year.endswith(ARCHIVED_SUFFIX)))
+
+        def load_years():
+            def loaded(years):
+                year_combo["values"] = ["All"] + [school_year_label(year) + (ARCHIVED_SUFFIX if archived else "")
+                                                  for year, archived in years]
+
+            self.tasks.submit(repo.school_years, owner=view_win, quiet=True, on_done=loaded)
+
+        def clear_filters():
+            name_entry.delete(0, tk.END)
+            for combo in (strand_combo, grade_combo, status_combo, gender_combo):
+                combo.set("All")
+            year_combo.set(school_year_label(current_school_year()))
+            apply_filters()
+
+        def sort_by(col):
+            current = view["filter"]
+            descending = not current.descending if current.sort == col else False
+            for c in columns:
+                arrow = (" ▼" if descending else " ▲") if c == col else ""
+                tree.heading(c, text=c + arrow)
+            set_filter(StudentFilter(name=current.name, strand=current.strand, grade_level=current.grade_level,
+                                     status=current.status, gender=current.gender, statuses=current.statuses,
+                                     sort=col, descending=descending, school_year=current.school_year,
+                                     archived=current.archived))
+
+        name_entry.bind("<Return>", apply_filters)
+        for combo in (strand_combo, grade_combo, status_combo, gender_combo, year_combo):
+            combo.bind("<<ComboboxSelected>>", apply_filters)
+
+        tk.Button(filter_frame, text="✕ Clear", command=clear_filters, font=FONT_BUTTON,
+                  bg=TEXT_SECONDARY, fg="white", relief=tk.FLAT, cursor="hand2").pack(side=tk.RIGHT, padx=(4, 0))
+        tk.Button(filter_frame, text="🔍 Search", command=apply_filters, font=FONT_BUTTON,
+                  bg=ACCENT_COLOR, fg="white", relief=tk.FLAT, cursor="hand2").pack(side=tk.RIGHT, padx=4)
+
+        # Column chooser; the chosen columns are also what Export writes
+        column_vars = {col: tk.BooleanVar(value=True) for col in columns}
+
+        def toggle_columns():
+            shown = [col for col in columns if column_vars[col].get()]
+            if not shown:
+                column_vars["ID"].set(True)
+                shown = ["ID"]
+            tree["displaycolumns"] = shown
+
+        columns_btn = tk.Menubutton(filter_frame, text="☰ Columns", font=FONT_BUTTON, bg=TEXT_SECONDARY,
+                                    fg="white", relief=tk.FLAT, cursor="hand2")
+        columns_menu = tk.Menu(columns_btn, tearoff=False)
+        for col in columns:
+            columns_menu.add_checkbutton(label=col, variable=column_vars[col], command=toggle_columns)
+        columns_btn["menu"] = columns_menu
+        columns_btn.pack(side=tk.RIGHT, padx=4)
+
         def refresh_tree():
-            for i in tree.get_children():
-                tree.delete(i)
-            try:
-                conn = get_connection()
-                cur = conn.cursor()
-                if active_only:
-                    cur.execute("""SELECT id, first_name, last_name, grade_level, gender, age, 
-                                guardian, strand, status FROM students 
-                                WHERE status IN ('Accepted', 'Dropped')""")
-                else:
-                    cur.execute("""SELECT id, first_name, last_name, grade_level, gender, age, 
-                                guardian, strand, status FROM students""")
+            pager.sync()
+
+        def patch_row(row, student_id):
+            # The write already committed; only this student's row needs redrawing
+            self.roster.invalidate([row or (student_id,)])
+            if row is None:
+                pager.remove(student_id)
+            else:
+                pager.patch(row)
+
+        def show_conflict(e, parent=view_win):
+            # Show the other station's version so the user can decide again
+            patch_row(e.current, e.student_id)
+            messagebox.showwarning("Changed Elsewhere", f"{e}.\n\nThe list now shows the current details; "
+                                   "review them and try again.", parent=parent)
+
+        pager.reset()
+
+        # Cheap change poll: other stations' edits are patched in without a reload
+        poll = {"id": None, "busy": False}
 
-                for row in cur.fetchall():
-                    tree.insert("", "end", values=row, tags=(row[8],))
+        def run_quietly(fn, on_done, on_error):
+            def finished(result):
+                poll["busy"] = False
+                on_done(result)
 
-                # Color coding
-                tree.tag_configure("Accepted", background="#d4edda")
-                tree.tag_configure("Pending", background="#fff3cd")
-                tree.tag_configure("Dropped", background="#f8d7da")
-                tree.tag_configure("Rejected", background="#f8d7da")
+            def failed(_):
+                poll["busy"] = False    # a failed poll just waits for the next one
 
-                conn.close()
-            except Exception as e:
-                messagebox.showerror("Database Error", f"Error loading data:\n{str(e)}", parent=view_win)
+            poll["busy"] = True
+            self.tasks.submit(fn, owner=view_win, quiet=True, on_done=finished, on_error=failed)
 
-        refresh_tree()
+        def poll_changes():
+            if not poll["busy"] and view_win.winfo_viewable():
+                pager.sync(run=run_quietly)
+            poll["id"] = view_win.after(CHANGE_POLL_MS, poll_changes)
+
+        poll["id"] = view_win.after(CHANGE_POLL_MS, poll_changes)
+        view_win.bind("<Destroy>", lambda e: e.widget is view_win and view_win.after_cancel(poll["id"]), add="+")
 
         # Action buttons
         btn_frame = tk.Frame(view_win, bg=PRIMARY_BG)
         btn_frame.pack(pady=20)
 
+        # Progress and selection notes shown above the buttons
+        info_label = tk.Label(view_win, text="", font=("Segoe UI", 9, "italic"),
+                              bg=PRIMARY_BG, fg=TEXT_SECONDARY)
+        info_label.pack(before=btn_frame)
+
+        def export_roster():
+            path = filedialog.asksaveasfilename(
+                parent=view_win, title="Export Students", defaultextension=".csv",
+                filetypes=[("CSV", "*.csv"), ("Excel", "*.xlsx"), ("JSON", "*.json")])
+            if not path:
+                return
+
+            student_filter = view["filter"]
+            shown = [col for col in columns if column_vars[col].get()]
+            progress = {"rows": 0}
+            cancel = self.cancel_event(view_win)
+
+            def report(rows):
+                progress["rows"] = rows
+
+            def show_progress():
+                if future.done() or not view_win.winfo_exists():
+                    return
+                info_label.config(text=f"Exporting... {progress['rows']} row(s) written")
+                view_win.after(250, show_progress)
+
+            def exported(count):
+                info_label.config(text="")
+                messagebox.showinfo("Export Complete", f"{count} student(s) written to\n{path}", parent=view_win)
+
+            def failed(e):
+                info_label.config(text="")
+                if not isinstance(e, ExportCancelled):
+                    messagebox.showerror("Export Failed", str(e), parent=view_win)
+
+            future = self.tasks.submit(export_students, path, student_filter, shown, progress=report,
+                                       cancel=cancel, repo=repo, owner=view_win, on_done=exported,
+                                       on_error=failed)
+            show_progress()
+
+        create_rounded_button(btn_frame, "🔄 Refresh", refresh_tree, color=TEXT_SECONDARY,
+                              width=12).pack(side=tk.LEFT, padx=8)
+        create_rounded_button(btn_frame, "📤 Export", export_roster, color=TEXT_SECONDARY,
+                              width=12).pack(side=tk.LEFT, padx=8)
+
         if active_only:
             # Student portal buttons
             def update_student():
@@ -380,8 +790,9 @@ class SHSRegistrationSystem:
                     messagebox.showwarning("No Selection", "Please select a student to update.", parent=view_win)
                     return
 
-                student = tree.item(selected)["values"]
-                student_id = student[0]
+                student = pager.row(selected[0])
+                student_id = student.id
+                version = {"read": student.version}
 
                 update_win = tk.Toplevel(view_win)
                 update_win.title("Update Student")
@@ -395,45 +806,51 @@ class SHSRegistrationSystem:
                 form_frame.pack(fill=tk.BOTH, expand=True, pady=10)
 
                 entries = {}
-                fields = ["First Name", "Last Name", "Grade Level", "Gender", "Age", "Guardian", "Strand"]
-
-                for i, field in enumerate(fields):
-                    if field in ["Grade Level", "Gender"]:
-                        values = ["Grade 11", "Grade 12"] if field == "Grade Level" else ["Male", "Female"]
-                        combo = create_combobox_field(form_frame, field, values)
-                        combo.set(student[i + 1])
+                fields = {"First Name": student.first_name, "Last Name": student.last_name,
+                          "Grade Level": student.grade_level, "Gender": student.gender, "Age": student.age,
+                          "Guardian": student.guardian, "Strand": student.strand}
+
+                choice_lists = {"Grade Level": GRADE_LEVELS, "Gender": GENDERS, "Strand": STRAND_CODES}
+                for field, value in fields.items():
+                    if field in choice_lists:
+                        combo = create_combobox_field(form_frame, field, choice_lists[field])
+                        combo.set(value)
                         entries[field] = combo
                     else:
                         entry = create_entry_field(form_frame, field)
-                        entry.insert(0, student[i + 1])
+                        entry.insert(0, value)
                         entries[field] = entry
 
                 def save_update():
-                    new_data = {k: v.get() for k, v in entries.items()}
-                    if not all(new_data.values()):
-                        messagebox.showwarning("Incomplete", "All fields are required!", parent=update_win)
-                        return
-
+                    # Same rules as the wizard, so an edit cannot store what registration would refuse
                     try:
-                        conn = get_connection()
-                        cur = conn.cursor()
-                        sql = """UPDATE students 
-                                 SET first_name=%s, last_name=%s, grade_level=%s, gender=%s, 
-                                     age=%s, guardian=%s, strand=%s 
-                                 WHERE id=%s"""
-                        vals = (new_data["First Name"], new_data["Last Name"],
-                                new_data["Grade Level"], new_data["Gender"],
-                                new_data["Age"], new_data["Guardian"],
-                                new_data["Strand"], student_id)
-                        cur.execute(sql, vals)
-                        conn.commit()
-                        conn.close()
+                        new_data = validate_student({k: v.get() for k, v in entries.items()})
+                    except ValidationError as e:
+                        messagebox.showwarning(e.title, str(e), parent=update_win)
+                        return
 
+                    def updated(row):
                         messagebox.showinfo("Success", "Student updated successfully!", parent=update_win)
                         update_win.destroy()
-                        refresh_tree()
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Update failed:\n{str(e)}", parent=update_win)
+                        patch_row(row, student_id)
+
+                    def conflicted(e):
+                        patch_row(e.current, student_id)
+                        if e.current is None:
+                            messagebox.showerror("Deleted Elsewhere", f"{e}.", parent=update_win)
+                            update_win.destroy()
+                        elif messagebox.askyesno("Changed Elsewhere",
+                                                 "Another station changed this student while you were editing.\n\n"
+                                                 "Save your changes over theirs? Choose No to close this form "
+                                                 "and review their version first.", parent=update_win):
+                            version["read"] = e.current.version
+                            save_update()
+                        else:
+                            update_win.destroy()
+
+                    read = version["read"]
+                    self.run_db(lambda: repo.update(student_id, new_data, read), update_win, updated,
+                                error_prefix="Update failed:\n", on_conflict=conflicted)
 
                 btn_container = tk.Frame(update_win, bg=SECONDARY_BG)
                 btn_container.pack(pady=20)
@@ -445,7 +862,8 @@ class SHSRegistrationSystem:
                     messagebox.showwarning("No Selection", "Please select a student.", parent=view_win)
                     return
 
-                student_id = tree.item(selected)["values"][0]
+                student = pager.row(selected[0])
+                student_id, version = student.id, student.version
                 reason = simpledialog.askstring("Drop Reason",
                                                 "Enter reason for dropping this student:",
                                                 parent=view_win)
@@ -456,17 +874,12 @@ class SHSRegistrationSystem:
                 if messagebox.askyesno("Confirm Drop",
                                        f"Mark this student as Dropped?\n\nReason: {reason}",
                                        parent=view_win):
-                    try:
-                        conn = get_connection()
-                        cur = conn.cursor()
-                        cur.execute("UPDATE students SET status='Dropped', drop_reason=%s WHERE id=%s",
-                                    (reason, student_id))
-                        conn.commit()
-                        conn.close()
+                    def dropped(row):
                         messagebox.showinfo("Success", "Student marked as Dropped.", parent=view_win)
-                        refresh_tree()
-                    except Exception as e:
-                        messagebox.showerror("Error", str(e), parent=view_win)
+                        patch_row(row, student_id)
+
+                    self.run_db(lambda: repo.drop(student_id, reason, version), view_win, dropped,
+                                on_conflict=show_conflict)
 
             def delete_student():
                 selected = tree.selection()
@@ -475,22 +888,20 @@ class SHSRegistrationSystem:
                     return
 
                 if messagebox.askyesno("Confirm Delete",
-                                       "Are you sure you want to permanently delete this student?",
+                                       "Delete this student? It can be restored until the year is archived.",
                                        parent=view_win):
-                    try:
-                        student_id = tree.item(selected)["values"][0]
-                        conn = get_connection()
-                        cur = conn.cursor()
-                        cur.execute("DELETE FROM students WHERE id=%s", (student_id,))
-                        conn.commit()
-                        conn.close()
+                    student = pager.row(selected[0])
+                    student_id, version = student.id, student.version
+
+                    def deleted(_):
                         messagebox.showinfo("Deleted", "Student record deleted.", parent=view_win)
-                        refresh_tree()
-                    except Exception as e:
-                        messagebox.showerror("Error", str(e), parent=view_win)
+                        patch_row(None, student_id)
+
+                    self.run_db(lambda: repo.delete(student_id, version), view_win, deleted,
+                                on_conflict=show_conflict)
 
             def register_another():
-                view_win.destroy()
+                self.hide_window(view_win)
                 self.open_student_registration()
 
             buttons = [
@@ -501,64 +912,715 @@ class SHSRegistrationSystem:
             ]
 
             for text, cmd, color in buttons:
-                create_rounded_button(btn_frame, text, cmd, color=color, width=20).pack(side=tk.LEFT, padx=8)
+                create_rounded_button(btn_frame, text, cmd, color=color, width=14).pack(side=tk.LEFT, padx=5)
 
         else:
+            from importer import AlreadyImported, import_file
+
             # Admin buttons
-            def accept_student():
-                selected = tree.selection()
-                if not selected:
-                    messagebox.showwarning("No Selection", "Select a student to accept.", parent=view_win)
+            # "Select All Pending" arms a set-based action over every pending
+            # student, not just the rows currently materialized in the window
+            select_all = {"armed": False, "selection": (), "total": 0, "filter": None}
+
+            def disarm_select_all(_=None):
+                if select_all["armed"] and tree.selection() != select_all["selection"]:
+                    select_all["armed"] = False
+                    info_label.config(text="")
+
+            tree.bind("<<TreeviewSelect>>", disarm_select_all, add="+")
+
+            def archived_view():
+                # Archived years are read-only; their rows are not in the live table
+                if view["filter"].archived:
+                    messagebox.showwarning("Archived Year", "Students in an archived year cannot change status.",
+                                           parent=view_win)
+                return view["filter"].archived
+
+            def select_all_pending():
+                student_filter = view["filter"]
+                if archived_view():
                     return
 
-                student_id = tree.item(selected)["values"][0]
-                try:
-                    conn = get_connection()
-                    cur = conn.cursor()
-                    cur.execute("UPDATE students SET status='Accepted' WHERE id=%s", (student_id,))
-                    conn.commit()
-                    conn.close()
-                    messagebox.showinfo("Accepted", "Student accepted successfully!", parent=view_win)
+                def counted(total):
+                    if not total:
+                        messagebox.showinfo("Nothing Pending", "There are no pending students.", parent=view_win)
+                        return
+                    pending = [iid for iid in tree.get_children() if pager.row(iid).status == PENDING]
+                    tree.selection_set(pending)
+                    select_all.update(armed=True, selection=tree.selection(), total=total, filter=student_filter)
+                    info_label.config(text=f"All {total} pending student(s) matching the filter selected")
+
+                self.run_db(lambda: repo.count_matching(student_filter, PENDING), view_win, counted)
+
+            def change_status(status, verb):
+                # Acceptance goes through the section assignment engine, which
+                # checks strand and section capacity for the whole batch at once
+                accepting = status == ACCEPTED
+                if archived_view():
+                    return
+                if select_all["armed"] and select_all["filter"] is view["filter"]:
+                    student_filter = select_all["filter"]
+                    if accepting:
+                        job = lambda: repo.accept_matching(student_filter)
+                    else:
+                        job = lambda: repo.set_status_matching(student_filter, status)
+                    requested, already = None, 0
+                else:
+                    rows = [pager.row(iid) for iid in tree.selection()]
+                    if not rows:
+                        messagebox.showwarning("No Selection", f"Select a student to {verb}.", parent=view_win)
+                        return
+                    # Each row only changes if nobody else touched it since this view read it
+                    rows = [row for row in rows if row.status != status]
+                    already = len(tree.selection()) - len(rows)
+                    student_ids = [row.id for row in rows]
+                    versions = [row.version for row in rows]
+                    if accepting:
+                        job = lambda: repo.accept(student_ids, versions)
+                    else:
+                        job = lambda: (repo.set_status(student_ids, status, versions), repo.get_many(student_ids))
+                    requested = len(tree.selection())
+
+                if requested is None:
+                    target = f"all {select_all['total']} pending students matching the filter"
+                elif requested == 1:
+                    target = "this student"
+                else:
+                    target = f"{requested} students"
+
+                if status == REJECTED or requested != 1:
+                    if not messagebox.askyesno(f"Confirm {verb.title()}",
+                                               f"Are you sure you want to {verb} {target}?",
+                                               parent=view_win):
+                        return
+
+                def changed(result):
+                    if requested is None:
+                        self.roster.clear()
+                    elif accepting:
+                        # Only the students given a seat changed; waitlisted rows stay as they were
+                        placed = {student_id for ids in result.sections.values() for student_id in ids}
+                        self.roster.invalidate([row._replace(status=status, version=row.version + 1)
+                                                for row in rows if row.id in placed])
+                    else:
+                        # Rows skipped as conflicts keep their version; only ours moved on by one
+                        result, current = result
+                        self.roster.invalidate(self.status_updated(rows, current, status))
+                    select_all["armed"] = False
+                    info_label.config(text="")
+                    waitlisted = 0
+                    if accepting:
+                        affected, waitlisted = result.accepted, len(result.waitlisted)
+                    else:
+                        affected = result
+                    summary = f"{affected} student(s) marked as {status}."
+                    if waitlisted:
+                        summary += (f"\n{waitlisted} stayed Pending because their strand or sections are full; "
+                                    "raise the capacity under Sections to admit them.")
+                    if requested and already:
+                        summary += f"\n{already} already had that status."
+                    if requested and affected + waitlisted < requested - already:
+                        summary += (f"\n{requested - already - affected - waitlisted} changed at another station and were "
+                                    "skipped; review them and try again.")
+                    messagebox.showinfo(status, summary, parent=view_win)
+                    # One incremental refresh for the whole batch
                     refresh_tree()
-                except Exception as e:
-                    messagebox.showerror("Error", str(e), parent=view_win)
 
-            def reject_student():
+                self.run_db(job, view_win, changed)
+
+            def import_registrations(restart=False, path=None):
+                path = path or filedialog.askopenfilename(
+                    parent=view_win, title="Import Registrations",
+                    filetypes=[("Spreadsheets", "*.csv *.xlsx"), ("All files", "*.*")])
+                if not path:
+                    return
+
+                # The worker only writes plain values here; Tk reads them on its own thread
+                progress = {"rows": 0}
+                cancel = self.cancel_event(view_win)
+
+                def report(result):
+                    progress["rows"] = result.inserted + result.rejected
+
+                def show_progress():
+                    if future.done() or not view_win.winfo_exists():
+                        return
+                    info_label.config(text=f"Importing... {progress['rows']} row(s) processed")
+                    view_win.after(250, show_progress)
+
+                def imported(result):
+                    self.roster.clear()
+                    info_label.config(text="")
+                    messagebox.showinfo("Import Complete", result.summary(), parent=view_win)
+                    refresh_tree()
+
+                def failed(e):
+                    info_label.config(text="")
+                    if isinstance(e, AlreadyImported):
+                        if messagebox.askyesno("Already Imported", f"{e}.\n\nImport it again?", parent=view_win):
+                            import_registrations(restart=True, path=path)
+                        return
+                    messagebox.showerror("Import Failed", str(e), parent=view_win)
+
+                future = self.tasks.submit(import_file, path, restart=restart, progress=report, cancel=cancel,
+                                           repo=repo, owner=view_win, on_done=imported, on_error=failed)
+                show_progress()
+
+            def show_history(_=None):
                 selected = tree.selection()
-                if not selected:
-                    messagebox.showwarning("No Selection", "Select a student to reject.", parent=view_win)
+                if len(selected) != 1:
+                    messagebox.showwarning("No Selection", "Select one student to see their history.",
+                                           parent=view_win)
                     return
+                row = pager.row(selected[0])
+                self.open_history(row.id, f"{row.first_name} {row.last_name}")
 
-                if messagebox.askyesno("Confirm Reject",
-                                       "Are you sure you want to reject this student?",
-                                       parent=view_win):
-                    try:
-                        student_id = tree.item(selected)["values"][0]
-                        conn = get_connection()
-                        cur = conn.cursor()
-                        cur.execute("UPDATE students SET status='Rejected' WHERE id=%s", (student_id,))
-                        conn.commit()
-                        conn.close()
-                        messagebox.showinfo("Rejected", "Student rejected.", parent=view_win)
-                        refresh_tree()
-                    except Exception as e:
-                        messagebox.showerror("Error", str(e), parent=view_win)
+            tree.bind("<Double-1>", show_history)
 
             buttons = [
-                ("✓ Accept", accept_student, SUCCESS_COLOR),
-                ("✗ Reject", reject_student, DANGER_COLOR)
+                ("📊 Statistics", self.open_dashboard, ACCENT_COLOR),
+                ("🏫 Sections", self.open_sections, ACCENT_COLOR),
+                ("🔍 Duplicates", self.open_duplicates, ACCENT_COLOR),
+                ("🎓 Rollover", self.open_rollover, ACCENT_COLOR),
+                ("🕘 History", show_history, ACCENT_COLOR),
+                ("📥 Import", import_registrations, ACCENT_COLOR),
+                ("☑ Select All Pending", select_all_pending, TEXT_SECONDARY),
+                ("✓ Accept", lambda: change_status(ACCEPTED, "accept"), SUCCESS_COLOR),
+                ("✗ Reject", lambda: change_status(REJECTED, "reject"), DANGER_COLOR)
             ]
 
             for text, cmd, color in buttons:
-                create_rounded_button(btn_frame, text, cmd, color=color, width=20).pack(side=tk.LEFT, padx=8)
+                create_rounded_button(btn_frame, text, cmd, color=color, width=12).pack(side=tk.LEFT, padx=3)
+
+        def show(first=False):
+            if not first:
+                # Re-opened views catch up on changes instead of reloading
+                tree.selection_set(())
+                info_label.config(text="")
+                pager.sync()
+            load_years()
+            self.show_window(view_win, modal=False)
+
+        def hidden():
+            poll["busy"] = False
+            pager.cancel()
+
+        self.keep_window(name, view_win, show, True, on_hide=hidden)
+
+    def open_dashboard(self):
+        """Admin dashboard: enrollment counts by strand, grade level and gender"""
+        if self.reuse_window("dashboard"):
+            return
+
+        dash_win = tk.Toplevel(self.root)
+        dash_win.withdraw()
+        dash_win.title("Enrollment Statistics")
+        dash_win.configure(bg=PRIMARY_BG)
+
+        header_frame = tk.Frame(dash_win, bg=ACCENT_COLOR, height=80)
+        header_frame.pack(fill=tk.X)
+        header_frame.pack_propagate(False)
+
+        tk.Label(
+            header_frame,
+            text=f"📊 Enrollment Statistics · SY {school_year_label(current_school_year())}",
+            font=("Segoe UI", 20, "bold"),
+            bg=ACCENT_COLOR,
+            fg="white"
+        ).pack(expand=True)
+
+        # One card per status plus the overall total
+        cards_frame = tk.Frame(dash_win, bg=PRIMARY_BG)
+        cards_frame.pack(fill=tk.X, padx=20, pady=(15, 0))
+        card_colors = {ACCEPTED: SUCCESS_COLOR, REJECTED: DANGER_COLOR, DROPPED: DANGER_COLOR}
+        cards = {}
+        for status in ["Total"] + STATUSES:
+            card = tk.Frame(cards_frame, bg=SECONDARY_BG, highlightbackground=BORDER_COLOR, highlightthickness=1)
+            card.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+            cards[status] = tk.Label(card, text="–", font=FONT_TITLE, bg=SECONDARY_BG,
+                                     fg=card_colors.get(status, ACCENT_COLOR))
+            cards[status].pack(pady=(10, 0))
+            tk.Label(card, text=status, font=FONT_NORMAL, bg=SECONDARY_BG, fg=TEXT_SECONDARY).pack(pady=(0, 10))
+
+        # Breakdown tables: one row per group, one column per status
+        notebook = ttk.Notebook(dash_win)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+        columns = ["Group"] + STATUSES + ["Total"]
+        breakdowns = {}
+        for label, index, groups in (("By Strand", 0, STRAND_CODES), ("By Grade Level", 1, GRADE_LEVELS),
+                                     ("By Gender", 2, GENDERS)):
+            tab = tk.Frame(notebook, bg=PRIMARY_BG)
+            notebook.add(tab, text=label)
+            tree = ttk.Treeview(tab, columns=columns, show="headings", height=len(groups) + 1)
+            for col in columns:
+                tree.heading(col, text=col)
+                tree.column(col, width=130 if col == "Group" else 90, anchor="w" if col == "Group" else "center")
+            tree.pack(fill=tk.BOTH, expand=True)
+            breakdowns[label] = (tree, index, groups)
+
+        updated_label = tk.Label(dash_win, text="", font=("Segoe UI", 9, "italic"),
+                                 bg=PRIMARY_BG, fg=TEXT_SECONDARY)
+        updated_label.pack(pady=(0, 10))
+
+        def render(counts):
+            totals = {status: 0 for status in STATUSES}
+            for *_, status, total in counts:
+                totals[status] = totals.get(status, 0) + total
+            cards["Total"].config(text=f"{sum(totals.values()):,}")
+            for status in STATUSES:
+                cards[status].config(text=f"{totals[status]:,}")
+
+            for tree, index, groups in breakdowns.values():
+                table = {}
+                for row in counts:
+                    by_status = table.setdefault(row[index], {})
+                    by_status[row[3]] = by_status.get(row[3], 0) + row[4]
+                # Groups in form order; every write is checked against these reference lists
+                tree.delete(*tree.get_children())
+                for group in groups:
+                    by_status = table.get(group, {})
+                    tree.insert("", tk.END, values=[group] + [by_status.get(s, 0) for s in STATUSES]
+                                + [sum(by_status.values())])
+            updated_label.config(text=f"Updated {time.strftime('%H:%M:%S')} · refreshes every "
+                                      f"{STATS_POLL_MS // 1000} s while open")
+
+        # Counters are a few dozen summary rows, so polling them is cheap
+        poll = {"id": None, "busy": False}
+
+        def refresh(quiet=True):
+            def finished(counts):
+                poll["busy"] = False
+                render(counts)
+
+            def failed(e):
+                poll["busy"] = False
+                if not quiet:
+                    messagebox.showerror("Database Error", f"Error loading statistics:\n{str(e)}", parent=dash_win)
+
+            poll["busy"] = True
+            self.tasks.submit(self.admin_repo.enrollment_counts, current_school_year(), owner=dash_win,
+                              quiet=quiet, on_done=finished, on_error=failed)
+
+        def poll_counts():
+            if not poll["busy"] and dash_win.winfo_viewable():
+                refresh()
+            poll["id"] = dash_win.after(STATS_POLL_MS, poll_counts)
+
+        poll["id"] = dash_win.after(STATS_POLL_MS, poll_counts)
+        dash_win.bind("<Destroy>", lambda e: e.widget is dash_win and dash_win.after_cancel(poll["id"]), add="+")
+
+        def show():
+            refresh(quiet=False)
+            self.show_window(dash_win, (760, 480), modal=False)
+
+        self.keep_window("dashboard", dash_win, show, on_hide=lambda: poll.update(busy=False))
+
+    def open_sections(self):
+        """Admin editor for strand limits and section capacities used when accepting"""
+        if self.reuse_window("sections"):
+            return
+
+        sec_win = tk.Toplevel(self.root)
+        sec_win.withdraw()
+        sec_win.title("Strands & Sections")
+        sec_win.configure(bg=PRIMARY_BG)
+
+        header_frame = tk.Frame(sec_win, bg=ACCENT_COLOR, height=80)
+        header_frame.pack(fill=tk.X)
+        header_frame.pack_propagate(False)
+
+        tk.Label(
+            header_frame,
+            text="🏫 Strands & Sections",
+            font=("Segoe UI", 20, "bold"),
+            bg=ACCENT_COLOR,
+            fg="white"
+        ).pack(expand=True)
+
+        # Seats are counted per school year; promoted Grade 12 students fill next year's sections
+        year_frame = tk.Frame(sec_win, bg=PRIMARY_BG)
+        year_frame.pack(fill=tk.X, padx=20, pady=(15, 0))
+        years = [current_school_year(), current_school_year() + 1]
+        year_combo = create_filter_combobox(year_frame, "Year", (), width=16)
+        year_combo.config(values=[school_year_label(year) for year in years])
+        year_combo.set(school_year_label(years[0]))
+
+        tables = tk.Frame(sec_win, bg=PRIMARY_BG)
+        tables.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+
+        # Strand limits: double-click a strand to change its limit
+        strand_tree = ttk.Treeview(tables, columns=("Strand", "Limit", "Seats Left"), show="headings",
+                                   selectmode="browse", height=len(STRAND_CODES))
+        for col, width in (("Strand", 100), ("Limit", 80), ("Seats Left", 90)):
+            strand_tree.heading(col, text=col)
+            strand_tree.column(col, width=width, anchor="w" if col == "Strand" else "center")
+        strand_tree.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 15))
+
+        section_scroll = ttk.Scrollbar(tables)
+        section_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        section_columns = ("Strand", "Grade", "Section", "Capacity", "Accepted")
+        section_tree = ttk.Treeview(tables, columns=section_columns, show="headings", selectmode="browse",
+                                    yscrollcommand=section_scroll.set)
+        section_scroll.config(command=section_tree.yview)
+        for col in section_columns:
+            section_tree.heading(col, text=col)
+            section_tree.column(col, width=100, anchor="w" if col in ("Strand", "Section") else "center")
+        section_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Add a section, or change the capacity of the one with the same name
+        form = tk.Frame(sec_win, bg=PRIMARY_BG)
+        form.pack(fill=tk.X, padx=20)
+        strand_combo = create_filter_combobox(form, "Strand", ())
+        grade_combo = create_filter_combobox(form, "Grade", ())
+        for combo, values in ((strand_combo, STRAND_CODES), (grade_combo, GRADE_LEVELS)):
+            combo.config(values=values)
+            combo.set(values[0])
+        name_entry = create_filter_entry(form, "Section", width=14)
+        capacity_entry = create_filter_entry(form, "Capacity", width=6)
+
+        def load():
+            def loaded(result):
+                (limits, sections), seats = result
+                strand_tree.delete(*strand_tree.get_children())
+                for strand in STRAND_CODES + sorted(set(limits) - set(STRAND_CODES)):
+                    strand_tree.insert("", tk.END, iid=strand, values=(
+                        strand, limits.get(strand, "No limit"), max(seats[strand], 0) if strand in seats else "–"))
+                section_tree.delete(*section_tree.get_children())
+                for section_id, *values in sections:
+                    section_tree.insert("", tk.END, iid=str(section_id), values=values)
+
+            year = parse_school_year(year_combo.get())
+            self.run_db(lambda: (self.admin_repo.capacities(year), self.admin_repo.strand_seats(year)), sec_win,
+                        loaded, error_title="Database Error", error_prefix="Error loading capacities:\n")
+
+        year_combo.bind("<<ComboboxSelected>>", lambda e: load())
+
+        def edit_limit(_=None):
+            strand = strand_tree.focus()
+            if not strand:
+                return
+            capacity = simpledialog.askinteger("Strand Limit", f"Most students to accept into {strand}\n"
+                                               "(0 for no limit):", parent=sec_win, minvalue=0)
+            if capacity is None:
+                return
+            self.run_db(lambda: self.admin_repo.set_strand_capacity(strand, capacity or None), sec_win,
+                        lambda _: load(), error_title="Save Failed")
+
+        strand_tree.bind("<Double-1>", edit_limit)
+
+        def pick_section(_=None):
+            section_id = section_tree.focus()
+            if not section_id:
+                return
+            strand, grade, section, capacity, _ = section_tree.item(section_id, "values")
+            strand_combo.set(strand)
+            grade_combo.set(grade)
+            for entry, value in ((name_entry, section), (capacity_entry, capacity)):
+                clear_field(entry)
+                entry.insert(0, value)
+
+        section_tree.bind("<<TreeviewSelect>>", pick_section)
+
+        def save_section():
+            name = name_entry.get().strip()
+            try:
+                capacity = int(capacity_entry.get())
+            except ValueError:
+                capacity = 0
+            if not name or capacity <= 0:
+                messagebox.showwarning("Incomplete", "Enter a section name and a capacity above zero.",
+                                       parent=sec_win)
+                return
+            strand, grade = strand_combo.get(), grade_combo.get()
+            self.run_db(lambda: self.admin_repo.save_section(strand, grade, name, capacity), sec_win,
+                        lambda _: load(), error_title="Save Failed")
+
+        def remove_section():
+            section_id = section_tree.focus()
+            if not section_id:
+                messagebox.showwarning("No Selection", "Select a section to remove.", parent=sec_win)
+                return
+            if not messagebox.askyesno("Confirm Remove", "Remove this section?", parent=sec_win):
+                return
+            self.run_db(lambda: self.admin_repo.remove_section(int(section_id)), sec_win, lambda _: load(),
+                        error_title="Remove Failed")
+
+        btn_frame = tk.Frame(sec_win, bg=PRIMARY_BG)
+        btn_frame.pack(pady=15)
+        create_rounded_button(btn_frame, "💾 Save Section", save_section, width=16).pack(side=tk.LEFT, padx=8)
+        create_rounded_button(btn_frame, "🗑 Remove Section", remove_section, color=DANGER_COLOR,
+                              width=16).pack(side=tk.LEFT, padx=8)
+
+        tk.Label(sec_win, text="Double-click a strand to change its limit. Accepting fills sections of the "
+                               "student's strand and grade, balancing gender; strands without sections are "
+                               "limited only by the strand limit.",
+                 font=("Segoe UI", 9, "italic"), bg=PRIMARY_BG, fg=TEXT_SECONDARY,
+                 wraplength=760).pack(pady=(0, 10))
+
+        def show():
+            load()
+            self.show_window(sec_win, (820, 520), modal=False)
+
+        self.keep_window("sections", sec_win, show)
+
+    def open_duplicates(self):
+        """Admin report of registrations that look like the same learner"""
+        if self.reuse_window("duplicates"):
+            return
+
+        dup_win = tk.Toplevel(self.root)
+        dup_win.withdraw()
+        dup_win.title("Possible Duplicates")
+        dup_win.configure(bg=PRIMARY_BG)
+
+        header_frame = tk.Frame(dup_win, bg=ACCENT_COLOR, height=80)
+        header_frame.pack(fill=tk.X)
+        header_frame.pack_propagate(False)
+
+        tk.Label(
+            header_frame,
+            text="🔍 Possible Duplicates",
+            font=("Segoe UI", 20, "bold"),
+            bg=ACCENT_COLOR,
+            fg="white"
+        ).pack(expand=True)
+
+        summary_label = tk.Label(dup_win, text="", font=("Segoe UI", 9, "italic"),
+                                 bg=PRIMARY_BG, fg=TEXT_SECONDARY)
+        summary_label.pack(pady=(10, 0))
+
+        table_frame = tk.Frame(dup_win, bg=PRIMARY_BG)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+        tree_scroll = ttk.Scrollbar(table_frame)
+        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # One parent row per group, its registrations underneath
+        columns = ("ID", "First Name", "Last Name", "Grade", "Gender", "Age", "Guardian", "Strand", "Status")
+        tree = ttk.Treeview(table_frame, columns=columns, show="tree headings", selectmode="extended",
+                            yscrollcommand=tree_scroll.set)
+        tree_scroll.config(command=tree.yview)
+        tree.column("#0", width=90)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=60 if col in ("ID", "Age") else 100,
+                        anchor="center" if col in ("ID", "Age", "Grade", "Gender", "Status") else "w")
+        tree.pack(fill=tk.BOTH, expand=True)
+        rows = {}   # iid -> student row, for the selected children
+
+        def load():
+            def loaded(groups):
+                tree.delete(*tree.get_children())
+                rows.clear()
+                for number, members in enumerate(groups, 1):
+                    parent = tree.insert("", tk.END, text=f"Group {number}", open=True,
+                                         values=("", f"{len(members)} registrations"))
+                    for row in members:
+                        rows[tree.insert(parent, tk.END, values=row.display())] = row
+                summary_label.config(text=f"{len(groups)} group(s) of registrations that look alike "
+                                          "(similar-sounding names and guardians)")
+
+            summary_label.config(text="Searching...")
+            self.run_db(self.admin_repo.duplicate_groups, dup_win, loaded, error_title="Database Error",
+                        error_prefix="Error building the duplicate report:\n")
+
+        def reject_selected():
+            selected = [rows[iid] for iid in tree.selection() if iid in rows]
+            if not selected:
+                messagebox.showwarning("No Selection", "Select the duplicate registrations to reject.",
+                                       parent=dup_win)
+                return
+            if not messagebox.askyesno("Confirm Reject", f"Reject {len(selected)} registration(s)?",
+                                       parent=dup_win):
+                return
+
+            def rejected(result):
+                count, current = result
+                self.roster.invalidate(self.status_updated(selected, current, REJECTED))
+                messagebox.showinfo("Rejected", f"{count} registration(s) marked as Rejected.", parent=dup_win)
+                load()
+
+            ids, versions = [r.id for r in selected], [r.version for r in selected]
+            self.run_db(lambda: (self.admin_repo.set_status(ids, REJECTED, versions), self.admin_repo.get_many(ids)),
+                        dup_win, rejected)
+
+        btn_frame = tk.Frame(dup_win, bg=PRIMARY_BG)
+        btn_frame.pack(pady=(0, 15))
+        create_rounded_button(btn_frame, "⟳ Refresh", load, width=14).pack(side=tk.LEFT, padx=8)
+        create_rounded_button(btn_frame, "✗ Reject Selected", reject_selected, color=DANGER_COLOR,
+                              width=16).pack(side=tk.LEFT, padx=8)
+
+        def show():
+            load()
+            self.show_window(dup_win, (1000, 560), modal=False)
+
+        self.keep_window("duplicates", dup_win, show)
+
+    def open_rollover(self):
+        """Year-end rollover: promote accepted Grade 11 students and graduate Grade 12, with undo"""
+        if self.reuse_window("rollover"):
+            return
+
+        year = current_school_year()
+        roll_win = tk.Toplevel(self.root)
+        roll_win.withdraw()
+        roll_win.title("Year-End Rollover")
+        roll_win.configure(bg=PRIMARY_BG)
+
+        header_frame = tk.Frame(roll_win, bg=ACCENT_COLOR, height=80)
+        header_frame.pack(fill=tk.X)
+        header_frame.pack_propagate(False)
+
+        tk.Label(
+            header_frame,
+            text=f"🎓 Year-End Rollover · SY {school_year_label(year)}",
+            font=("Segoe UI", 20, "bold"),
+            bg=ACCENT_COLOR,
+            fg="white"
+        ).pack(expand=True)
+
+        summary_label = tk.Label(roll_win, text="", font=("Segoe UI", 9, "italic"),
+                                 bg=PRIMARY_BG, fg=TEXT_SECONDARY)
+        summary_label.pack(pady=(10, 0))
+
+        # Preview: accepted students per strand the rollover would move
+        columns = ("Strand", "To Grade 12", "Graduating")
+        tree = ttk.Treeview(roll_win, columns=columns, show="headings", selectmode="none",
+                            height=len(STRAND_CODES) + 1)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=140, anchor="w" if col == "Strand" else "center")
+        tree.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+        totals = {"promoted": 0, "graduated": 0}
+
+        def load():
+            def loaded(rows):
+                tree.delete(*tree.get_children())
+                for row in rows:
+                    tree.insert("", tk.END, values=row)
+                totals["promoted"] = sum(row[1] for row in rows)
+                totals["graduated"] = sum(row[2] for row in rows)
+                tree.insert("", tk.END, values=("Total", totals["promoted"], totals["graduated"]))
+                summary_label.config(text=f"Accepted students of SY {school_year_label(year)} still to roll over")
+
+            summary_label.config(text="Counting...")
+            self.run_db(lambda: self.admin_repo.rollover_preview(year), roll_win, loaded,
+                        error_title="Database Error")
+
+        def rolled_back_or_over(message):
+            self.roster.clear()
+            messagebox.showinfo("Rollover", message, parent=roll_win)
+            load()
+
+        def run_rollover():
+            if not totals["promoted"] and not totals["graduated"]:
+                messagebox.showinfo("Nothing to Do", "No accepted students are left to roll over.", parent=roll_win)
+                return
+            if not messagebox.askyesno(
+                    "Confirm Rollover",
+                    f"Promote {totals['promoted']} student(s) to Grade 12 of SY {school_year_label(year + 1)} "
+                    f"and graduate {totals['graduated']}?\n\nPromoted students come back Pending so they can be "
+                    "accepted into Grade 12 sections.", parent=roll_win):
+                return
+
+            def done(result):
+                promoted, graduated = result
+                rolled_back_or_over(f"{promoted} student(s) promoted and {graduated} graduated.")
+
+            summary_label.config(text="Rolling over...")
+            self.run_db(lambda: self.admin_repo.rollover(year), roll_win, done, error_title="Rollover Failed")
+
+        def undo_rollover():
+            def counted(result):
+                restored, skipped = result
+                if not restored and not skipped:
+                    messagebox.showinfo("Nothing to Undo", "This school year has not been rolled over.",
+                                        parent=roll_win)
+                    return
+                note = f"\n\n{skipped} student(s) changed since will be left as they are." if skipped else ""
+                if messagebox.askyesno("Confirm Undo", f"Put {restored} student(s) back as they were before "
+                                                       f"the rollover?{note}", parent=roll_win):
+                    self.run_db(lambda: self.admin_repo.rollback_rollover(year), roll_win, undone,
+                                error_title="Undo Failed")
+
+            def undone(result):
+                restored, skipped = result
+                rolled_back_or_over(f"{restored} student(s) restored, {skipped} left as they are.")
+
+            self.run_db(lambda: self.admin_repo.rollback_rollover(year, dry_run=True), roll_win, counted,
+                        error_title="Database Error")
+
+        btn_frame = tk.Frame(roll_win, bg=PRIMARY_BG)
+        btn_frame.pack(pady=(0, 10))
+        create_rounded_button(btn_frame, "⟳ Refresh", load, width=14).pack(side=tk.LEFT, padx=8)
+        create_rounded_button(btn_frame, "🎓 Run Rollover", run_rollover, color=SUCCESS_COLOR,
+                              width=16).pack(side=tk.LEFT, padx=8)
+        create_rounded_button(btn_frame, "↶ Undo Rollover", undo_rollover, color=DANGER_COLOR,
+                              width=16).pack(side=tk.LEFT, padx=8)
+
+        tk.Label(roll_win, text="Runs in small batches, so registration keeps working meanwhile. Undo puts back "
+                                "every student nobody has changed since; archiving the year ends the undo.",
+                 font=("Segoe UI", 9, "italic"), bg=PRIMARY_BG, fg=TEXT_SECONDARY,
+                 wraplength=520).pack(pady=(0, 10))
+
+        def show():
+            load()
+            self.show_window(roll_win, (600, 520), modal=False)
+
+        self.keep_window("rollover", roll_win, show)
+
+    def open_history(self, student_id, name):
+        """Audit trail of one student: every change, when and by whom"""
+        if self.reuse_window("history", student_id, name):
+            return
+
+        history_win = tk.Toplevel(self.root)
+        history_win.withdraw()
+        history_win.configure(bg=PRIMARY_BG)
+
+        header_frame = tk.Frame(history_win, bg=ACCENT_COLOR, height=80)
+        header_frame.pack(fill=tk.X)
+        header_frame.pack_propagate(False)
+
+        title_label = tk.Label(header_frame, text="", font=("Segoe UI", 20, "bold"), bg=ACCENT_COLOR, fg="white")
+        title_label.pack(expand=True)
+
+        table_frame = tk.Frame(history_win, bg=PRIMARY_BG)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+        tree_scroll = ttk.Scrollbar(table_frame)
+        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        columns = ("When", "Action", "By", "Changes")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings", yscrollcommand=tree_scroll.set)
+        tree_scroll.config(command=tree.yview)
+        for col, width in zip(columns, (170, 80, 110, 520)):
+            tree.heading(col, text=col)
+            tree.column(col, width=width, anchor="w")
+        tree.pack(fill=tk.BOTH, expand=True)
+
+        def show(student_id, name):
+            history_win.title(f"History - {name}")
+            title_label.config(text=f"🕘 {name} (ID {student_id})")
+            tree.delete(*tree.get_children())
+
+            def loaded(entries):
+                for at, action, actor, changes in entries:
+                    tree.insert("", tk.END, values=(str(at)[:19], action.title(), actor or "system",
+                                                    format_changes(changes)))
+
+            self.run_db(lambda: self.admin_repo.history(student_id), history_win, loaded)
+            self.show_window(history_win, (900, 480), modal=False)
+
+        self.keep_window("history", history_win, show, student_id, name)
 
     def open_admin_login(self):
         """Admin login window"""
+        if self.reuse_window("login"):
+            return
+
         admin_win = tk.Toplevel(self.root)
+        admin_win.withdraw()
         admin_win.title("Administrator Login")
         admin_win.configure(bg=SECONDARY_BG)
-        admin_win.grab_set()
-        center_window(admin_win, 450, 400)
         admin_win.resizable(False, False)
 
         # Icon/Header
@@ -594,15 +1656,23 @@ class SHSRegistrationSystem:
                 return
 
             if username == "admin" and password == "12345":
+                self.admin_repo.actor = username
                 messagebox.showinfo("Login Successful", "Welcome, Administrator!", parent=admin_win)
-                admin_win.destroy()
+                self.hide_window(admin_win)
                 self.view_students(active_only=False)
             else:
                 messagebox.showerror("Login Failed", "Invalid username or password!", parent=admin_win)
                 password_entry.delete(0, tk.END)
 
         def cancel():
-            admin_win.destroy()
+            self.hide_window(admin_win)
+
+        def show():
+            # Credentials never linger in a hidden window
+            clear_field(username_entry)
+            clear_field(password_entry)
+            self.show_window(admin_win, (450, 400))
+            username_entry.focus_set()
 
         tk.Button(btn_frame, text="Cancel", command=cancel, font=FONT_BUTTON,
                   bg=TEXT_SECONDARY, fg="white", width=12, height=2, cursor="hand2").pack(side=tk.LEFT, padx=10)
@@ -610,3 +1680,5 @@ class SHSRegistrationSystem:
         create_rounded_button(btn_frame, "🔓 Login", login, width=12).pack(side=tk.LEFT, padx=10)
 
         admin_win.bind('<Return>', lambda e: login())
+
+        self.keep_window("login", admin_win, show)
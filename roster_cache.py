@@ -0,0 +1,138 @@
+"""Roster pages shared by every student view
+
+The public list and the admin portal read keyset pages through one
+RosterCache owned by the application, so switching back to a filter or
+scrolling back to an evicted page is answered from memory.  Pages are kept in
+least-recently-used order up to CACHE_ROWS rows in total and expire after
+CACHE_TTL seconds, which bounds how stale a page can be when another station
+changes a student nobody here is looking at.
+
+Writes made here invalidate precisely: a changed row drops the pages holding
+that student plus the pages of every filter the new row matches (it may now
+sort into them).  Changes from other stations arrive through the views'
+change polls, which go through ``changes_since`` below.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from choices import PENDING, current_school_year
+from student_query import SORT_COLUMNS, StudentRecord
+from student_repository import CHANGE_LIMIT
+
+CACHE_ROWS = 20000      # rows kept across all cached pages (a few MB)
+CACHE_TTL = 300         # seconds a cached page is served
+SEEN_LIMIT = 2000       # recently invalidated rows remembered, so repeated polls are no-ops
+
+
+class RosterCache:
+    """Read-through LRU/TTL cache of StudentRepository.page results
+
+    Thread-safe: pages are fetched on TaskRunner workers and the outbox
+    flusher invalidates from its own thread.  ``stats()`` gives hit and miss
+    counts for the instrumentation dump.
+    """
+
+    def __init__(self, repo, max_rows=CACHE_ROWS, ttl=CACHE_TTL):
+        self.repo = repo
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._pages = OrderedDict()     # key -> (student_filter, rows, ids, loaded_at)
+        self._size = 0
+        self._generation = 0            # bumped by every invalidation
+        self._seen = OrderedDict()      # student id -> row as last invalidated
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def page(self, student_filter, after=None, before=None, limit=200):
+        """StudentRepository.page, answered from memory when the same page was read recently"""
+        key = (student_filter.cache_key(), _cursor(student_filter, after), _cursor(student_filter, before), limit)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None and now - entry[3] < self.ttl:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            generation = self._generation
+
+        rows = self.repo.page(student_filter, after=after, before=before, limit=limit)
+        with self._lock:
+            # A write landed while fetching: the rows may predate it, so serve them but do not keep them
+            if generation == self._generation:
+                self._pages[key] = (student_filter, tuple(rows), {row[0] for row in rows}, now)
+                self._size += len(rows)
+                while self._size > self.max_rows and len(self._pages) > 1:
+                    self._drop(next(iter(self._pages)))
+                    self.evictions += 1
+        return rows
+
+    def changes_since(self, since, limit=CHANGE_LIMIT):
+        """StudentRepository.changes_since for pagers; drops the pages the changes touch"""
+        rows, watermark = self.repo.changes_since(since, limit)
+        if rows is None:
+            self.clear()
+        elif rows:
+            with self._lock:
+                # Polls return rows at the watermark again; only new versions invalidate
+                changed = [row for row in rows if self._seen.get(row[0]) != row]
+            self.invalidate(changed)
+        return rows, watermark
+
+    def invalidate(self, rows):
+        """Forget pages a changed row may belong to
+
+        ``rows`` are current student rows (the id may be None for a
+        registration not inserted yet) or ``(id,)`` tombstones for deleted
+        students.
+        """
+        if not rows:
+            return
+        with self._lock:
+            self._generation += 1
+            ids = {row[0] for row in rows}
+            live = [row for row in rows if len(row) > 1]
+            for key, (student_filter, _, page_ids, _) in list(self._pages.items()):
+                if not ids.isdisjoint(page_ids) or any(student_filter.matches(row) for row in live):
+                    self._drop(key)
+                    self.invalidations += 1
+            for row in rows:
+                if row[0] is not None:
+                    self._seen[row[0]] = row
+                    self._seen.move_to_end(row[0])
+            while len(self._seen) > SEEN_LIMIT:
+                self._seen.popitem(last=False)
+
+    def invalidate_registrations(self, registrations):
+        """Invalidate for wizard-style registrations about to appear as Pending rows"""
+        self.invalidate([StudentRecord(None, data["First Name"], data["Last Name"], data["Grade Level"],
+                                       data["Gender"], int(data["Age"]), data["Guardian"], data["Strand"], PENDING,
+                                       1, current_school_year())
+                         for data in registrations])
+
+    def clear(self):
+        """Forget everything, e.g. after a bulk change whose rows are not known"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._pages)
+            self._pages.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                    "evictions": self.evictions, "invalidations": self.invalidations,
+                    "pages": len(self._pages), "rows": self._size}
+
+    def _drop(self, key):
+        self._size -= len(self._pages.pop(key)[1])
+
+
+def _cursor(student_filter, row):
+    # Keyset queries only read the sort column and id of a cursor row
+    return None if row is None else (row[0], row[SORT_COLUMNS[student_filter.sort][1]])
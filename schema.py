@@ -0,0 +1,647 @@
+import threading
+
+# Ordered schema migrations per backend; each runs once and is recorded in
+# schema_migrations.  Version numbers line up across backends.
+
+# Columns whose old and new values are written to audit_log; migration 11
+# recreates the trigger to follow school_year as well
+AUDITED_COLUMNS = ("first_name", "last_name", "grade_level", "gender", "age", "guardian", "strand",
+                   "status", "drop_reason", "section_id", "deleted_at")
+YEAR_AUDITED_COLUMNS = AUDITED_COLUMNS + ("school_year",)
+AUDIT_ACTION = """CASE WHEN OLD.deleted_at IS NULL AND NEW.deleted_at IS NOT NULL THEN 'delete'
+                       WHEN OLD.deleted_at IS NOT NULL AND NEW.deleted_at IS NULL THEN 'restore'
+                       ELSE 'update' END"""
+
+
+def _audit_inserted():
+    """JSON object of ``{column: [null, value]}`` for a new row"""
+    pairs = ", ".join(f"'{c}', json_array(NULL, NEW.{c})" for c in AUDITED_COLUMNS[:8])
+    return f"json_object({pairs})"
+
+
+def _audit_changed(merge, differs, columns=AUDITED_COLUMNS):
+    """JSON object of ``{column: [old, new]}`` for the audited columns an UPDATE changed"""
+    changes = "'{}'"
+    for c in columns:
+        changes = (f"{merge}({changes}, CASE WHEN {differs(c)} "
+                   f"THEN json_object('{c}', json_array(OLD.{c}, NEW.{c})) ELSE '{{}}' END)")
+    return changes
+
+
+# Choice lists as migration 13 seeds them into reference_values, in display
+# order; adding a value later takes a migration of its own
+REFERENCE_SEED = {
+    "grade_level": [("Grade 11", None), ("Grade 12", None)],
+    "gender": [("Male", None), ("Female", None)],
+    "strand": [("STEM", "Science, Technology, Engineering, Mathematics"),
+               ("ABM", "Accountancy, Business, Management"),
+               ("HUMSS", "Humanities and Social Sciences"),
+               ("TVL ICT", "Information & Communication Technology"),
+               ("TVL EIM", "Electrical Installation & Maintenance"),
+               ("GAS", "General Academic Strand")],
+    "status": [("Pending", None), ("Accepted", None), ("Rejected", None), ("Dropped", None), ("Graduated", None)],
+}
+
+
+def _quote(value):
+    return "NULL" if value is None else "'" + value.replace("'", "''") + "'"
+
+
+def _seed_reference():
+    rows = ", ".join(f"('{kind}', {position}, {_quote(name)}, {_quote(description)})"
+                     for kind, values in REFERENCE_SEED.items()
+                     for position, (name, description) in enumerate(values, 1))
+    return f"INSERT INTO reference_values (kind, position, name, description) VALUES {rows}"
+
+
+def _enum(kind, default=None):
+    """One-byte MySQL ENUM of a reference kind
+
+    Values are declared in sorted order: ENUMs sort by declaration, and
+    keyset pages and the roster's own sorting compare the names.
+    """
+    names = ", ".join(_quote(name) for name in sorted(name for name, _ in REFERENCE_SEED[kind]))
+    return f"ENUM({names}) NOT NULL" + (f" DEFAULT {_quote(default)}" if default else "")
+
+
+def _mysql_differs(column):
+    return f"NOT (OLD.{column} <=> NEW.{column})"
+
+
+def _sqlite_differs(column):
+    return f"OLD.{column} IS NOT NEW.{column}"
+
+
+MYSQL_MIGRATIONS = [
+    (1, [
+        """CREATE TABLE IF NOT EXISTS students (
+               id INT AUTO_INCREMENT PRIMARY KEY,
+               first_name VARCHAR(100) NOT NULL,
+               last_name VARCHAR(100) NOT NULL,
+               grade_level VARCHAR(20) NOT NULL,
+               gender VARCHAR(10) NOT NULL,
+               age INT NOT NULL,
+               guardian VARCHAR(150) NOT NULL,
+               strand VARCHAR(20) NOT NULL,
+               status VARCHAR(20) NOT NULL DEFAULT 'Pending',
+               drop_reason VARCHAR(255) NULL
+           )""",
+    ]),
+    # Change detection for incremental Treeview refresh
+    (2, [
+        """ALTER TABLE students
+               ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+                   DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+               ADD INDEX idx_students_updated_at (updated_at)""",
+    ]),
+    # Filter bar lookups and name searches
+    (3, [
+        "CREATE INDEX idx_students_status_strand_grade ON students (status, strand, grade_level)",
+        "CREATE INDEX idx_students_name ON students (last_name, first_name)",
+    ]),
+    # Bulk import progress, committed with each batch so imports can resume
+    (4, [
+        """CREATE TABLE IF NOT EXISTS import_runs (
+               file_hash CHAR(64) PRIMARY KEY,
+               file_name VARCHAR(255) NOT NULL,
+               last_line INT NOT NULL DEFAULT 0,
+               inserted INT NOT NULL DEFAULT 0,
+               rejected INT NOT NULL DEFAULT 0,
+               completed_at TIMESTAMP NULL,
+               updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+           )""",
+    ]),
+    # Row version for optimistic locking between registrar stations
+    (5, [
+        "ALTER TABLE students ADD COLUMN version INT NOT NULL DEFAULT 1",
+    ]),
+    # Outbox submission ids, so a retried flush never registers a learner twice
+    (6, [
+        """ALTER TABLE students
+               ADD COLUMN submission_id CHAR(32) NULL,
+               ADD UNIQUE INDEX idx_students_submission (submission_id)""",
+    ]),
+    # Dashboard counters kept current by triggers, so every write path
+    # (wizard, outbox, import, bulk status changes) updates them
+    (7, [
+        """CREATE TABLE IF NOT EXISTS enrollment_counts (
+               strand VARCHAR(20) NOT NULL,
+               grade_level VARCHAR(20) NOT NULL,
+               gender VARCHAR(10) NOT NULL,
+               status VARCHAR(20) NOT NULL,
+               total INT NOT NULL DEFAULT 0,
+               PRIMARY KEY (strand, grade_level, gender, status)
+           )""",
+        """INSERT INTO enrollment_counts (strand, grade_level, gender, status, total)
+           SELECT strand, grade_level, gender, status, COUNT(*) FROM students
+           GROUP BY strand, grade_level, gender, status""",
+        """CREATE TRIGGER students_count_insert AFTER INSERT ON students FOR EACH ROW
+               INSERT INTO enrollment_counts (strand, grade_level, gender, status, total)
+               VALUES (NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1)
+               ON DUPLICATE KEY UPDATE total = total + 1""",
+        """CREATE TRIGGER students_count_update AFTER UPDATE ON students FOR EACH ROW
+           BEGIN
+               IF NOT (OLD.strand <=> NEW.strand AND OLD.grade_level <=> NEW.grade_level
+                       AND OLD.gender <=> NEW.gender AND OLD.status <=> NEW.status) THEN
+                   UPDATE enrollment_counts SET total = total - 1
+                   WHERE strand = OLD.strand AND grade_level = OLD.grade_level
+                     AND gender = OLD.gender AND status = OLD.status;
+                   INSERT INTO enrollment_counts (strand, grade_level, gender, status, total)
+                   VALUES (NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1)
+                   ON DUPLICATE KEY UPDATE total = total + 1;
+               END IF;
+           END""",
+        """CREATE TRIGGER students_count_delete AFTER DELETE ON students FOR EACH ROW
+               UPDATE enrollment_counts SET total = total - 1
+               WHERE strand = OLD.strand AND grade_level = OLD.grade_level
+                 AND gender = OLD.gender AND status = OLD.status""",
+    ]),
+    # Strand and section capacities for batch acceptance
+    (8, [
+        """CREATE TABLE IF NOT EXISTS strand_capacities (
+               strand VARCHAR(20) PRIMARY KEY,
+               capacity INT NOT NULL
+           )""",
+        """CREATE TABLE IF NOT EXISTS sections (
+               id INT AUTO_INCREMENT PRIMARY KEY,
+               strand VARCHAR(20) NOT NULL,
+               grade_level VARCHAR(20) NOT NULL,
+               name VARCHAR(50) NOT NULL,
+               capacity INT NOT NULL,
+               UNIQUE KEY idx_sections_name (strand, grade_level, name)
+           )""",
+        """ALTER TABLE students
+               ADD COLUMN section_id INT NULL,
+               ADD INDEX idx_students_section (section_id, status)""",
+    ]),
+    # Phonetic name key for duplicate lookups; existing rows are filled in by
+    # StudentRepository.migrate, since the key is computed in Python
+    (9, [
+        """ALTER TABLE students
+               ADD COLUMN name_key CHAR(8) NULL,
+               ADD INDEX idx_students_name_key (name_key)""",
+    ]),
+    # Soft delete and an append-only audit trail.  Triggers write the audit
+    # row inside the same transaction as the change; archived (hard-deleted)
+    # rows move to students_archive, and soft-deleted rows leave the counters
+    (10, [
+        """ALTER TABLE students
+               ADD COLUMN deleted_at TIMESTAMP(6) NULL,
+               ADD COLUMN changed_by VARCHAR(64) NULL,
+               ADD INDEX idx_students_deleted (deleted_at),
+               DROP INDEX idx_students_name_key,
+               ADD INDEX idx_students_name_key_live (name_key, deleted_at)""",
+        """CREATE TABLE IF NOT EXISTS audit_log (
+               id BIGINT AUTO_INCREMENT PRIMARY KEY,
+               at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+               student_id INT NOT NULL,
+               action VARCHAR(10) NOT NULL,
+               actor VARCHAR(64) NULL,
+               changes JSON NULL,
+               INDEX idx_audit_at (at),
+               INDEX idx_audit_student (student_id, id)
+           )""",
+        "CREATE TABLE IF NOT EXISTS students_archive LIKE students",
+        f"""CREATE TRIGGER students_audit_insert AFTER INSERT ON students FOR EACH ROW
+                INSERT INTO audit_log (student_id, action, actor, changes)
+                VALUES (NEW.id, 'insert', NEW.changed_by, {_audit_inserted()})""",
+        f"""CREATE TRIGGER students_audit_update AFTER UPDATE ON students FOR EACH ROW
+            BEGIN
+                IF {" OR ".join(_mysql_differs(c) for c in AUDITED_COLUMNS)} THEN
+                    INSERT INTO audit_log (student_id, action, actor, changes)
+                    VALUES (NEW.id, {AUDIT_ACTION}, NEW.changed_by,
+                            {_audit_changed("JSON_MERGE_PATCH", _mysql_differs)});
+                END IF;
+            END""",
+        """CREATE TRIGGER students_audit_delete AFTER DELETE ON students FOR EACH ROW
+               INSERT INTO audit_log (student_id, action) VALUES (OLD.id, 'archive')""",
+        "DROP TRIGGER IF EXISTS students_count_update",
+        """CREATE TRIGGER students_count_update AFTER UPDATE ON students FOR EACH ROW
+           BEGIN
+               IF NOT (OLD.strand <=> NEW.strand AND OLD.grade_level <=> NEW.grade_level
+                       AND OLD.gender <=> NEW.gender AND OLD.status <=> NEW.status
+                       AND (OLD.deleted_at IS NULL) = (NEW.deleted_at IS NULL)) THEN
+                   IF OLD.deleted_at IS NULL THEN
+                       UPDATE enrollment_counts SET total = total - 1
+                       WHERE strand = OLD.strand AND grade_level = OLD.grade_level
+                         AND gender = OLD.gender AND status = OLD.status;
+                   END IF;
+                   IF NEW.deleted_at IS NULL THEN
+                       INSERT INTO enrollment_counts (strand, grade_level, gender, status, total)
+                       VALUES (NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1)
+                       ON DUPLICATE KEY UPDATE total = total + 1;
+                   END IF;
+               END IF;
+           END""",
+        "DROP TRIGGER IF EXISTS students_count_delete",
+        """CREATE TRIGGER students_count_delete AFTER DELETE ON students FOR EACH ROW
+           BEGIN
+               IF OLD.deleted_at IS NULL THEN
+                   UPDATE enrollment_counts SET total = total - 1
+                   WHERE strand = OLD.strand AND grade_level = OLD.grade_level
+                     AND gender = OLD.gender AND status = OLD.status;
+               END IF;
+           END""",
+    ]),
+    # School years: current-year queries lead with school_year so they stay
+    # flat as years pile up, closed years move to students_archive, and the
+    # counters are kept per year.  Existing rows get the year they were last
+    # touched in (updated_at itself is kept).
+    (11, [
+        """ALTER TABLE students
+               ADD COLUMN school_year SMALLINT NOT NULL DEFAULT 0,
+               ADD INDEX idx_students_year (school_year, status, strand, grade_level),
+               ADD INDEX idx_students_year_name (school_year, last_name, first_name)""",
+        """UPDATE students SET school_year = YEAR(updated_at) - (MONTH(updated_at) < 6),
+                               updated_at = updated_at""",
+        """ALTER TABLE students_archive
+               ADD COLUMN school_year SMALLINT NOT NULL DEFAULT 0,
+               ADD INDEX idx_students_archive_year (school_year, last_name, first_name)""",
+        "DROP TRIGGER IF EXISTS students_count_insert",
+        "DROP TRIGGER IF EXISTS students_count_update",
+        "DROP TRIGGER IF EXISTS students_count_delete",
+        "DROP TABLE IF EXISTS enrollment_counts",
+        """CREATE TABLE enrollment_counts (
+               school_year SMALLINT NOT NULL,
+               strand VARCHAR(20) NOT NULL,
+               grade_level VARCHAR(20) NOT NULL,
+               gender VARCHAR(10) NOT NULL,
+               status VARCHAR(20) NOT NULL,
+               total INT NOT NULL DEFAULT 0,
+               PRIMARY KEY (school_year, strand, grade_level, gender, status)
+           )""",
+        """INSERT INTO enrollment_counts (school_year, strand, grade_level, gender, status, total)
+           SELECT school_year, strand, grade_level, gender, status, COUNT(*) FROM students
+           WHERE deleted_at IS NULL
+           GROUP BY school_year, strand, grade_level, gender, status""",
+        """CREATE TRIGGER students_count_insert AFTER INSERT ON students FOR EACH ROW
+               INSERT INTO enrollment_counts (school_year, strand, grade_level, gender, status, total)
+               VALUES (NEW.school_year, NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1)
+               ON DUPLICATE KEY UPDATE total = total + 1""",
+        """CREATE TRIGGER students_count_update AFTER UPDATE ON students FOR EACH ROW
+           BEGIN
+               IF NOT (OLD.school_year <=> NEW.school_year AND OLD.strand <=> NEW.strand
+                       AND OLD.grade_level <=> NEW.grade_level AND OLD.gender <=> NEW.gender
+                       AND OLD.status <=> NEW.status
+                       AND (OLD.deleted_at IS NULL) = (NEW.deleted_at IS NULL)) THEN
+                   IF OLD.deleted_at IS NULL THEN
+                       UPDATE enrollment_counts SET total = total - 1
+                       WHERE school_year = OLD.school_year AND strand = OLD.strand
+                         AND grade_level = OLD.grade_level AND gender = OLD.gender AND status = OLD.status;
+                   END IF;
+                   IF NEW.deleted_at IS NULL THEN
+                       INSERT INTO enrollment_counts (school_year, strand, grade_level, gender, status, total)
+                       VALUES (NEW.school_year, NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1)
+                       ON DUPLICATE KEY UPDATE total = total + 1;
+                   END IF;
+               END IF;
+           END""",
+        """CREATE TRIGGER students_count_delete AFTER DELETE ON students FOR EACH ROW
+           BEGIN
+               IF OLD.deleted_at IS NULL THEN
+                   UPDATE enrollment_counts SET total = total - 1
+                   WHERE school_year = OLD.school_year AND strand = OLD.strand
+                     AND grade_level = OLD.grade_level AND gender = OLD.gender AND status = OLD.status;
+               END IF;
+           END""",
+        "DROP TRIGGER IF EXISTS students_audit_update",
+        f"""CREATE TRIGGER students_audit_update AFTER UPDATE ON students FOR EACH ROW
+            BEGIN
+                IF {" OR ".join(_mysql_differs(c) for c in YEAR_AUDITED_COLUMNS)} THEN
+                    INSERT INTO audit_log (student_id, action, actor, changes)
+                    VALUES (NEW.id, {AUDIT_ACTION}, NEW.changed_by,
+                            {_audit_changed("JSON_MERGE_PATCH", _mysql_differs, YEAR_AUDITED_COLUMNS)});
+                END IF;
+            END""",
+    ]),
+    # Year-end rollover journal: what each promoted or graduated student was
+    # before, and the version the rollover wrote, so it can be undone
+    (12, [
+        """CREATE TABLE IF NOT EXISTS rollover_log (
+               school_year SMALLINT NOT NULL,
+               student_id INT NOT NULL,
+               grade_level VARCHAR(20) NOT NULL,
+               status VARCHAR(20) NOT NULL,
+               section_id INT NULL,
+               version INT NOT NULL,
+               PRIMARY KEY (school_year, student_id)
+           )""",
+    ]),
+    # Reference values: the choice lists are kept in reference_values and
+    # read once at startup, and the coded columns shrink to one-byte ENUMs
+    (13, [
+        """CREATE TABLE IF NOT EXISTS reference_values (
+               kind VARCHAR(20) NOT NULL,
+               position TINYINT UNSIGNED NOT NULL,
+               name VARCHAR(20) NOT NULL,
+               description VARCHAR(100) NULL,
+               PRIMARY KEY (kind, name)
+           )""",
+        _seed_reference(),
+        *(f"""ALTER TABLE {table}
+                  MODIFY grade_level {_enum("grade_level")},
+                  MODIFY gender {_enum("gender")},
+                  MODIFY strand {_enum("strand")},
+                  MODIFY status {_enum("status", "Pending")}"""
+          for table in ("students", "students_archive")),
+        f"""ALTER TABLE enrollment_counts
+                MODIFY grade_level {_enum("grade_level")},
+                MODIFY gender {_enum("gender")},
+                MODIFY strand {_enum("strand")},
+                MODIFY status {_enum("status")}""",
+        f"ALTER TABLE sections MODIFY strand {_enum('strand')}, MODIFY grade_level {_enum('grade_level')}",
+        f"ALTER TABLE strand_capacities MODIFY strand {_enum('strand')}",
+        f"ALTER TABLE rollover_log MODIFY grade_level {_enum('grade_level')}, MODIFY status {_enum('status')}",
+    ]),
+]
+
+# SQLite stores timestamps as sortable ISO-8601 text with milliseconds
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+SQLITE_MIGRATIONS = [
+    # The embedded backend starts with updated_at in the base table, because
+    # SQLite cannot ADD COLUMN with a non-constant default
+    (1, [
+        f"""CREATE TABLE IF NOT EXISTS students (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                first_name TEXT NOT NULL COLLATE NOCASE,
+                last_name TEXT NOT NULL COLLATE NOCASE,
+                grade_level TEXT NOT NULL,
+                gender TEXT NOT NULL,
+                age INTEGER NOT NULL,
+                guardian TEXT NOT NULL COLLATE NOCASE,
+                strand TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'Pending',
+                drop_reason TEXT NULL,
+                updated_at TEXT NOT NULL DEFAULT ({SQLITE_NOW})
+            )""",
+    ]),
+    # Stand-in for MySQL's ON UPDATE CURRENT_TIMESTAMP
+    (2, [
+        "CREATE INDEX IF NOT EXISTS idx_students_updated_at ON students (updated_at)",
+        f"""CREATE TRIGGER IF NOT EXISTS students_touch AFTER UPDATE ON students
+            FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+            BEGIN
+                UPDATE students SET updated_at = {SQLITE_NOW} WHERE id = NEW.id;
+            END""",
+    ]),
+    (3, [
+        "CREATE INDEX IF NOT EXISTS idx_students_status_strand_grade ON students (status, strand, grade_level)",
+        "CREATE INDEX IF NOT EXISTS idx_students_name ON students (last_name, first_name)",
+    ]),
+    (4, [
+        """CREATE TABLE IF NOT EXISTS import_runs (
+               file_hash TEXT PRIMARY KEY,
+               file_name TEXT NOT NULL,
+               last_line INTEGER NOT NULL DEFAULT 0,
+               inserted INTEGER NOT NULL DEFAULT 0,
+               rejected INTEGER NOT NULL DEFAULT 0,
+               completed_at TEXT NULL,
+               updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+           )""",
+    ]),
+    (5, [
+        "ALTER TABLE students ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+    ]),
+    (6, [
+        "ALTER TABLE students ADD COLUMN submission_id TEXT NULL",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_students_submission ON students (submission_id)",
+    ]),
+    (7, [
+        """CREATE TABLE IF NOT EXISTS enrollment_counts (
+               strand TEXT NOT NULL,
+               grade_level TEXT NOT NULL,
+               gender TEXT NOT NULL,
+               status TEXT NOT NULL,
+               total INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (strand, grade_level, gender, status)
+           )""",
+        """INSERT INTO enrollment_counts (strand, grade_level, gender, status, total)
+           SELECT strand, grade_level, gender, status, COUNT(*) FROM students
+           GROUP BY strand, grade_level, gender, status""",
+        """CREATE TRIGGER IF NOT EXISTS students_count_insert AFTER INSERT ON students
+           BEGIN
+               INSERT INTO enrollment_counts (strand, grade_level, gender, status, total)
+               VALUES (NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1)
+               ON CONFLICT (strand, grade_level, gender, status) DO UPDATE SET total = total + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS students_count_update
+           AFTER UPDATE OF strand, grade_level, gender, status ON students
+           WHEN OLD.strand IS NOT NEW.strand OR OLD.grade_level IS NOT NEW.grade_level
+                OR OLD.gender IS NOT NEW.gender OR OLD.status IS NOT NEW.status
+           BEGIN
+               UPDATE enrollment_counts SET total = total - 1
+               WHERE strand = OLD.strand AND grade_level = OLD.grade_level
+                 AND gender = OLD.gender AND status = OLD.status;
+               INSERT INTO enrollment_counts (strand, grade_level, gender, status, total)
+               VALUES (NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1)
+               ON CONFLICT (strand, grade_level, gender, status) DO UPDATE SET total = total + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS students_count_delete AFTER DELETE ON students
+           BEGIN
+               UPDATE enrollment_counts SET total = total - 1
+               WHERE strand = OLD.strand AND grade_level = OLD.grade_level
+                 AND gender = OLD.gender AND status = OLD.status;
+           END""",
+    ]),
+    (8, [
+        """CREATE TABLE IF NOT EXISTS strand_capacities (
+               strand TEXT PRIMARY KEY,
+               capacity INTEGER NOT NULL
+           )""",
+        """CREATE TABLE IF NOT EXISTS sections (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               strand TEXT NOT NULL,
+               grade_level TEXT NOT NULL,
+               name TEXT NOT NULL,
+               capacity INTEGER NOT NULL,
+               UNIQUE (strand, grade_level, name)
+           )""",
+        "ALTER TABLE students ADD COLUMN section_id INTEGER NULL",
+        "CREATE INDEX IF NOT EXISTS idx_students_section ON students (section_id, status)",
+    ]),
+    (9, [
+        "ALTER TABLE students ADD COLUMN name_key TEXT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_students_name_key ON students (name_key)",
+    ]),
+    (10, [
+        "ALTER TABLE students ADD COLUMN deleted_at TEXT NULL",
+        "ALTER TABLE students ADD COLUMN changed_by TEXT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_students_deleted ON students (deleted_at)",
+        "DROP INDEX IF EXISTS idx_students_name_key",
+        "CREATE INDEX IF NOT EXISTS idx_students_name_key_live ON students (name_key, deleted_at)",
+        f"""CREATE TABLE IF NOT EXISTS audit_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                at TEXT NOT NULL DEFAULT ({SQLITE_NOW}),
+                student_id INTEGER NOT NULL,
+                action TEXT NOT NULL,
+                actor TEXT NULL,
+                changes TEXT NULL
+            )""",
+        "CREATE INDEX IF NOT EXISTS idx_audit_at ON audit_log (at)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_student ON audit_log (student_id, id)",
+        # Same columns in the same order, so rows move with INSERT ... SELECT *
+        "CREATE TABLE IF NOT EXISTS students_archive AS SELECT * FROM students WHERE 0",
+        "CREATE INDEX IF NOT EXISTS idx_students_archive_id ON students_archive (id)",
+        f"""CREATE TRIGGER IF NOT EXISTS students_audit_insert AFTER INSERT ON students
+            BEGIN
+                INSERT INTO audit_log (student_id, action, actor, changes)
+                VALUES (NEW.id, 'insert', NEW.changed_by, {_audit_inserted()});
+            END""",
+        # Fires for the students_touch update too, which the WHEN clause skips
+        f"""CREATE TRIGGER IF NOT EXISTS students_audit_update AFTER UPDATE ON students
+            WHEN {" OR ".join(_sqlite_differs(c) for c in AUDITED_COLUMNS)}
+            BEGIN
+                INSERT INTO audit_log (student_id, action, actor, changes)
+                VALUES (NEW.id, {AUDIT_ACTION}, NEW.changed_by,
+                        {_audit_changed("json_patch", _sqlite_differs)});
+            END""",
+        """CREATE TRIGGER IF NOT EXISTS students_audit_delete AFTER DELETE ON students
+           BEGIN
+               INSERT INTO audit_log (student_id, action) VALUES (OLD.id, 'archive');
+           END""",
+        "DROP TRIGGER IF EXISTS students_count_update",
+        """CREATE TRIGGER students_count_update
+           AFTER UPDATE OF strand, grade_level, gender, status, deleted_at ON students
+           WHEN OLD.strand IS NOT NEW.strand OR OLD.grade_level IS NOT NEW.grade_level
+                OR OLD.gender IS NOT NEW.gender OR OLD.status IS NOT NEW.status
+                OR (OLD.deleted_at IS NULL) <> (NEW.deleted_at IS NULL)
+           BEGIN
+               UPDATE enrollment_counts SET total = total - 1
+               WHERE strand = OLD.strand AND grade_level = OLD.grade_level
+                 AND gender = OLD.gender AND status = OLD.status AND OLD.deleted_at IS NULL;
+               INSERT INTO enrollment_counts (strand, grade_level, gender, status, total)
+               SELECT NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1 WHERE NEW.deleted_at IS NULL
+               ON CONFLICT (strand, grade_level, gender, status) DO UPDATE SET total = total + 1;
+           END""",
+        "DROP TRIGGER IF EXISTS students_count_delete",
+        """CREATE TRIGGER students_count_delete AFTER DELETE ON students
+           WHEN OLD.deleted_at IS NULL
+           BEGIN
+               UPDATE enrollment_counts SET total = total - 1
+               WHERE strand = OLD.strand AND grade_level = OLD.grade_level
+                 AND gender = OLD.gender AND status = OLD.status;
+           END""",
+    ]),
+    (11, [
+        "ALTER TABLE students ADD COLUMN school_year INTEGER NOT NULL DEFAULT 0",
+        # Without students_touch for the backfill, so updated_at keeps its meaning
+        "DROP TRIGGER IF EXISTS students_touch",
+        """UPDATE students SET school_year = CAST(substr(updated_at, 1, 4) AS INTEGER)
+                                            - (CAST(substr(updated_at, 6, 2) AS INTEGER) < 6)""",
+        f"""CREATE TRIGGER students_touch AFTER UPDATE ON students
+            FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+            BEGIN
+                UPDATE students SET updated_at = {SQLITE_NOW} WHERE id = NEW.id;
+            END""",
+        "CREATE INDEX IF NOT EXISTS idx_students_year ON students (school_year, status, strand, grade_level)",
+        "CREATE INDEX IF NOT EXISTS idx_students_year_name ON students (school_year, last_name, first_name)",
+        "ALTER TABLE students_archive ADD COLUMN school_year INTEGER NOT NULL DEFAULT 0",
+        """CREATE INDEX IF NOT EXISTS idx_students_archive_year
+           ON students_archive (school_year, last_name, first_name)""",
+        "DROP TRIGGER IF EXISTS students_count_insert",
+        "DROP TRIGGER IF EXISTS students_count_update",
+        "DROP TRIGGER IF EXISTS students_count_delete",
+        "DROP TABLE IF EXISTS enrollment_counts",
+        """CREATE TABLE enrollment_counts (
+               school_year INTEGER NOT NULL,
+               strand TEXT NOT NULL,
+               grade_level TEXT NOT NULL,
+               gender TEXT NOT NULL,
+               status TEXT NOT NULL,
+               total INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (school_year, strand, grade_level, gender, status)
+           )""",
+        """INSERT INTO enrollment_counts (school_year, strand, grade_level, gender, status, total)
+           SELECT school_year, strand, grade_level, gender, status, COUNT(*) FROM students
+           WHERE deleted_at IS NULL
+           GROUP BY school_year, strand, grade_level, gender, status""",
+        """CREATE TRIGGER students_count_insert AFTER INSERT ON students
+           BEGIN
+               INSERT INTO enrollment_counts (school_year, strand, grade_level, gender, status, total)
+               VALUES (NEW.school_year, NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1)
+               ON CONFLICT (school_year, strand, grade_level, gender, status) DO UPDATE SET total = total + 1;
+           END""",
+        """CREATE TRIGGER students_count_update
+           AFTER UPDATE OF school_year, strand, grade_level, gender, status, deleted_at ON students
+           WHEN OLD.school_year IS NOT NEW.school_year OR OLD.strand IS NOT NEW.strand
+                OR OLD.grade_level IS NOT NEW.grade_level OR OLD.gender IS NOT NEW.gender
+                OR OLD.status IS NOT NEW.status OR (OLD.deleted_at IS NULL) <> (NEW.deleted_at IS NULL)
+           BEGIN
+               UPDATE enrollment_counts SET total = total - 1
+               WHERE school_year = OLD.school_year AND strand = OLD.strand AND grade_level = OLD.grade_level
+                 AND gender = OLD.gender AND status = OLD.status AND OLD.deleted_at IS NULL;
+               INSERT INTO enrollment_counts (school_year, strand, grade_level, gender, status, total)
+               SELECT NEW.school_year, NEW.strand, NEW.grade_level, NEW.gender, NEW.status, 1
+               WHERE NEW.deleted_at IS NULL
+               ON CONFLICT (school_year, strand, grade_level, gender, status) DO UPDATE SET total = total + 1;
+           END""",
+        """CREATE TRIGGER students_count_delete AFTER DELETE ON students
+           WHEN OLD.deleted_at IS NULL
+           BEGIN
+               UPDATE enrollment_counts SET total = total - 1
+               WHERE school_year = OLD.school_year AND strand = OLD.strand AND grade_level = OLD.grade_level
+                 AND gender = OLD.gender AND status = OLD.status;
+           END""",
+        "DROP TRIGGER IF EXISTS students_audit_update",
+        f"""CREATE TRIGGER students_audit_update AFTER UPDATE ON students
+            WHEN {" OR ".join(_sqlite_differs(c) for c in YEAR_AUDITED_COLUMNS)}
+            BEGIN
+                INSERT INTO audit_log (student_id, action, actor, changes)
+                VALUES (NEW.id, {AUDIT_ACTION}, NEW.changed_by,
+                        {_audit_changed("json_patch", _sqlite_differs, YEAR_AUDITED_COLUMNS)});
+            END""",
+    ]),
+    (12, [
+        """CREATE TABLE IF NOT EXISTS rollover_log (
+               school_year INTEGER NOT NULL,
+               student_id INTEGER NOT NULL,
+               grade_level TEXT NOT NULL,
+               status TEXT NOT NULL,
+               section_id INTEGER,
+               version INTEGER NOT NULL,
+               PRIMARY KEY (school_year, student_id)
+           )""",
+    ]),
+    # SQLite has no ENUM; the short names stay as they are
+    (13, [
+        """CREATE TABLE IF NOT EXISTS reference_values (
+               kind TEXT NOT NULL,
+               position INTEGER NOT NULL,
+               name TEXT NOT NULL,
+               description TEXT,
+               PRIMARY KEY (kind, name)
+           ) WITHOUT ROWID""",
+        _seed_reference(),
+    ]),
+]
+
+MIGRATIONS = {"mysql": MYSQL_MIGRATIONS, "sqlite": SQLITE_MIGRATIONS}
+
+# Startup and the outbox flusher may both migrate; only one runs at a time
+_lock = threading.Lock()
+
+
+def migrate(conn, backend):
+    """Apply any schema migrations this database has not seen yet"""
+    with _lock:
+        _migrate(conn, backend)
+
+
+def _migrate(conn, backend):
+    cur = conn.cursor()
+    cur.execute("""CREATE TABLE IF NOT EXISTS schema_migrations (
+                       version INT PRIMARY KEY,
+                       applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                   )""")
+    cur.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cur.fetchall()}
+
+    placeholder = "?" if backend == "sqlite" else "%s"
+    for version, statements in MIGRATIONS[backend]:
+        if version in applied:
+            continue
+        for sql in statements:
+            cur.execute(sql)
+        cur.execute(f"INSERT INTO schema_migrations (version) VALUES ({placeholder})", (version,))
+        conn.commit()
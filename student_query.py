@@ -0,0 +1,206 @@
+from collections import namedtuple
+from functools import cmp_to_key
+
+from choices import PENDING, current_school_year
+from duplicates import name_key
+
+# Rows carry the version and school year last in the tuple, after the displayed columns
+STUDENT_COLUMNS = ("id, first_name, last_name, grade_level, gender, age, guardian, strand, status, version, "
+                   "school_year")
+VERSION_INDEX = 9
+YEAR_INDEX = 10
+DISPLAY_COLUMNS = 9     # id through status, the roster Treeview's columns
+
+
+class StudentRecord(namedtuple("StudentRecord", STUDENT_COLUMNS)):
+    """One student row as the views hold it, by field (``record.status``) or position
+
+    Still a tuple with no per-instance dict, so a page of records costs what
+    the raw rows did and compares equal to them.
+    """
+    __slots__ = ()
+
+    def display(self):
+        """Treeview values, without the version and school year"""
+        return self[:DISPLAY_COLUMNS]
+
+
+# The repository appends its actor to insert_values() for changed_by
+INSERT_STUDENT = """INSERT INTO students
+                    (first_name, last_name, grade_level, gender, age, guardian, strand, status, name_key,
+                     school_year, changed_by)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+
+# Queued wizard submissions carry their outbox id so retries can be skipped
+INSERT_SUBMISSION = """INSERT INTO students
+                       (first_name, last_name, grade_level, gender, age, guardian, strand, status, name_key,
+                        school_year, changed_by, submission_id)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+
+# Treeview column -> (SQL column, position in a student row)
+SORT_COLUMNS = {
+    "ID": ("id", 0),
+    "First Name": ("first_name", 1),
+    "Last Name": ("last_name", 2),
+    "Grade": ("grade_level", 3),
+    "Gender": ("gender", 4),
+    "Age": ("age", 5),
+    "Guardian": ("guardian", 6),
+    "Strand": ("strand", 7),
+    "Status": ("status", 8),
+}
+
+_descending = cmp_to_key(lambda a, b: (a < b) - (a > b))
+
+
+def insert_values(data, status=PENDING, school_year=None):
+    """Parameters for INSERT_STUDENT from wizard-style field names, in the current school year by default"""
+    return (
+        data["First Name"],
+        data["Last Name"],
+        data["Grade Level"],
+        data["Gender"],
+        int(data["Age"]),
+        data["Guardian"],
+        data["Strand"],
+        status,
+        name_key(data["First Name"], data["Last Name"]),
+        school_year or current_school_year()
+    )
+
+
+def format_changes(changes):
+    """``column: old -> new`` pairs of one audit_log entry, for display"""
+    return "; ".join(f"{column}: {old} -> {new}" if old is not None else f"{column}: {new}"
+                     for column, (old, new) in changes.items())
+
+
+def _fold(value):
+    # Mirrors MySQL's case-insensitive collation closely enough to place patched rows
+    return value.lower() if isinstance(value, str) else value
+
+
+class StudentFilter:
+    """Filter bar state translated into parameterized WHERE / ORDER BY / LIMIT SQL
+
+    ``name`` matches a last-name prefix, or ``"Last, First"`` prefixes for both
+    names, so lookups stay on the (last_name, first_name) index.  ``statuses``
+    restricts the view itself (e.g. the public list) and ``status`` is the
+    user's pick inside it.  ``school_year`` None means every year still in the
+    students table; ``archived`` reads a closed year from students_archive
+    instead.  SQL uses ``%s`` placeholders; the backend dialect supplies the
+    name-prefix test and converts placeholders when it runs.
+    """
+
+    def __init__(self, name="", strand=None, grade_level=None, status=None, gender=None,
+                 statuses=None, sort="ID", descending=False, school_year=None, archived=False):
+        self.name = name.strip()
+        self.strand = strand
+        self.grade_level = grade_level
+        self.status = status
+        self.gender = gender
+        self.statuses = statuses
+        self.sort = sort
+        self.descending = descending
+        self.school_year = school_year
+        self.archived = archived
+
+    @property
+    def table(self):
+        return "students_archive" if self.archived else "students"
+
+    def cache_key(self):
+        """Hashable identity of the rows this filter selects, in order"""
+        return (self.name, self.strand, self.grade_level, self.status, self.gender,
+                tuple(self.statuses or ()), self.sort, self.descending, self.school_year, self.archived)
+
+    def where(self, dialect):
+        """WHERE clauses and parameters for the current filters"""
+        clauses, params = ["deleted_at IS NULL"], []
+        if self.school_year is not None:
+            clauses.append("school_year = %s")
+            params.append(self.school_year)
+        if self.statuses:
+            clauses.append(f"status IN ({', '.join(['%s'] * len(self.statuses))})")
+            params.extend(self.statuses)
+        for column, value in (("status", self.status), ("strand", self.strand),
+                              ("grade_level", self.grade_level), ("gender", self.gender)):
+            if value:
+                clauses.append(f"{column} = %s")
+                params.append(value)
+
+        for column, prefix in zip(("last_name", "first_name"), self._name_parts()):
+            if prefix:
+                clause, values = dialect.prefix_match(column, prefix)
+                clauses.append(clause)
+                params.extend(values)
+        return clauses, params
+
+    def page_query(self, dialect, after=None, before=None, limit=200):
+        """Keyset-paginated SELECT ordered by the sort column, then id"""
+        clauses, params = self.where(dialect)
+        column = SORT_COLUMNS[self.sort][0]
+
+        cursor = after if after is not None else before
+        if cursor is not None:
+            # Rows past the cursor in display order; "before" walks backwards
+            forward = (after is not None) != self.descending
+            op = ">" if forward else "<"
+            value = cursor[SORT_COLUMNS[self.sort][1]]
+            if column == "id":
+                clauses.append(f"id {op} %s")
+                params.append(cursor[0])
+            else:
+                clauses.append(f"({column} {op} %s OR ({column} = %s AND id {op} %s))")
+                params.extend([value, value, cursor[0]])
+
+        sql = f"SELECT {STUDENT_COLUMNS} FROM {self.table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+
+        sql += self._order_by(reverse=(before is not None) != self.descending)
+        sql += " LIMIT %s"
+        params.append(limit)
+        return sql, params
+
+    def select_query(self, dialect, columns=None):
+        """Unpaginated SELECT of the chosen Treeview columns in display order, for streaming"""
+        clauses, params = self.where(dialect)
+        selected = ", ".join(SORT_COLUMNS[c][0] for c in columns) if columns else STUDENT_COLUMNS
+        sql = f"SELECT {selected} FROM {self.table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += self._order_by(reverse=self.descending)
+        return sql, params
+
+    def matches(self, row):
+        """Whether a row fetched by id belongs in this filtered view"""
+        if self.archived or self.school_year is not None and row[YEAR_INDEX] != self.school_year:
+            return False
+        if self.statuses and row[8] not in self.statuses:
+            return False
+        for index, value in ((8, self.status), (7, self.strand), (3, self.grade_level), (4, self.gender)):
+            if value and row[index] != value:
+                return False
+        last, first = self._name_parts()
+        if last and not row[2].lower().startswith(last.lower()):
+            return False
+        if first and not row[1].lower().startswith(first.lower()):
+            return False
+        return True
+
+    def sort_key(self, row):
+        """Python ordering equivalent to the ORDER BY of ``page_query``"""
+        key = (_fold(row[SORT_COLUMNS[self.sort][1]]), row[0])
+        return _descending(key) if self.descending else key
+
+    def _order_by(self, reverse):
+        column = SORT_COLUMNS[self.sort][0]
+        direction = "DESC" if reverse else "ASC"
+        if column == "id":
+            return f" ORDER BY id {direction}"
+        return f" ORDER BY {column} {direction}, id {direction}"
+
+    def _name_parts(self):
+        last, _, first = self.name.partition(",")
+        return last.strip(), first.strip()
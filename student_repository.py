@@ -0,0 +1,822 @@
+import json
+import time
+
+import db_config
+import metrics
+import duplicates
+from assignment import assign
+from choices import (ACCEPTED, DROPPED, GRADE_11, GRADE_12, GRADUATED, PENDING, current_school_year,
+                     load_reference, school_year_label)
+from schema import SQLITE_NOW, migrate
+from student_query import INSERT_STUDENT, INSERT_SUBMISSION, STUDENT_COLUMNS, StudentRecord, insert_values
+
+CHANGE_LIMIT = 500      # more changed rows than this and callers should reload instead
+BACKFILL_CHUNK = 1000   # rows per transaction when filling in computed columns
+BULK_CHUNK = 1000       # ids per IN (...) list in bulk updates
+STREAM_CHUNK = 1000     # rows per fetchmany when streaming
+DEFAULT_ACTOR = "registrar"
+
+
+class MySQLDialect:
+    """SQL differences for the shared MySQL server"""
+
+    name = "mysql"
+    min_timestamp = "1970-01-01 00:00:01"
+    now = "NOW(6)"
+
+    def sql(self, text):
+        return text
+
+    def prefix_match(self, column, prefix):
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"{column} LIKE %s", [escaped + "%"]
+
+    def stream_cursor(self, conn):
+        from pymysql.cursors import SSCursor
+
+        # Unbuffered: rows are pulled from the server as they are fetched
+        return conn.cursor(SSCursor)
+
+    def skip_duplicates(self, insert, key):
+        return insert + " ON DUPLICATE KEY UPDATE id = id"
+
+    def upsert(self, insert, key, columns):
+        return insert + " ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in columns)
+
+    def begin_write(self, cur):
+        pass    # InnoDB starts a transaction implicitly; rows are locked with FOR UPDATE
+
+    def for_update(self, select):
+        return select + " FOR UPDATE"
+
+    def days_ago(self):
+        return "NOW(6) - INTERVAL %s DAY"
+
+
+class SQLiteDialect:
+    """SQL differences for the embedded SQLite database"""
+
+    name = "sqlite"
+    min_timestamp = "1970-01-01 00:00:00.000"
+    now = SQLITE_NOW
+
+    def sql(self, text):
+        return text.replace("%s", "?")
+
+    def prefix_match(self, column, prefix):
+        # A NOCASE range instead of LIKE so the (last_name, first_name) index is used
+        return f"{column} >= %s AND {column} < %s", [prefix, prefix + "\U0010ffff"]
+
+    def stream_cursor(self, conn):
+        return conn.cursor()    # SQLite cursors already step through rows lazily
+
+    def skip_duplicates(self, insert, key):
+        return insert + f" ON CONFLICT ({key}) DO NOTHING"
+
+    def upsert(self, insert, key, columns):
+        return insert + f" ON CONFLICT ({key}) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in columns)
+
+    def begin_write(self, cur):
+        cur.execute("BEGIN IMMEDIATE")  # take the write lock now so reads below cannot go stale
+
+    def for_update(self, select):
+        return select   # the whole file is already locked by begin_write
+
+    def days_ago(self):
+        # Same text format as the updated_at default, so the comparison is a string compare
+        return "strftime('%Y-%m-%d %H:%M:%f', 'now', '-' || %s || ' days')"
+
+
+DIALECTS = {"mysql": MySQLDialect(), "sqlite": SQLiteDialect()}
+
+
+class WriteConflict(Exception):
+    """The row changed (or vanished) since it was read; ``current`` is its row now, or None"""
+
+    def __init__(self, student_id, current):
+        super().__init__("This student was changed at another station" if current is not None
+                         else "This student was deleted at another station")
+        self.student_id = student_id
+        self.current = current
+
+
+class StudentRepository:
+    """Every query the application runs against the students table
+
+    Works against ``pool`` or, by default, the shared ``db_config`` pool and
+    backend.  Writes commit before returning, and each method holds a pooled
+    connection only for its own duration.  Every write records ``actor`` in
+    changed_by, which the audit triggers copy into audit_log.
+    """
+
+    def __init__(self, pool=None, backend=None, actor=DEFAULT_ACTOR):
+        self._pool = pool
+        self._backend = backend
+        self.actor = actor
+
+    @property
+    def pool(self):
+        return self._pool or db_config.pool
+
+    @property
+    def dialect(self):
+        return DIALECTS[self._backend or db_config.DB_BACKEND]
+
+    def _execute(self, cur, sql, params=()):
+        started = time.perf_counter()
+        cur.execute(self.dialect.sql(sql), params)
+        metrics.record_query(sql, time.perf_counter() - started, cur.rowcount if cur.rowcount >= 0 else None)
+        return cur
+
+    def _executemany(self, cur, sql, rows):
+        started = time.perf_counter()
+        cur.executemany(self.dialect.sql(sql), rows)
+        metrics.record_query(sql, time.perf_counter() - started, len(rows))
+
+    def _fetch(self, sql, params=(), one=False):
+        """Run a SELECT and fetch its rows, timing execute and fetch together"""
+        with self.pool.connection() as conn:
+            started = time.perf_counter()
+            cur = conn.cursor()
+            cur.execute(self.dialect.sql(sql), params)
+            rows = cur.fetchone() if one else cur.fetchall()
+        metrics.record_query(sql, time.perf_counter() - started, int(rows is not None) if one else len(rows))
+        return rows
+
+    def _write(self, sql, params=()):
+        with self.pool.connection() as conn:
+            cur = self._execute(conn.cursor(), sql, params)
+            conn.commit()
+            return cur.rowcount
+
+    # Schema
+
+    def migrate(self):
+        """Bring the schema up to date for this backend, fill in missing name keys and load the choice lists"""
+        with self.pool.connection() as conn:
+            migrate(conn, self.dialect.name)
+        self._backfill_name_keys()
+        load_reference(self.reference_values())
+
+    def load_choices(self):
+        """Load the reference_values lists into choices.py without migrating; False if they cannot be read
+
+        Until the schema is migrated (or when the database is down) the
+        built-in lists stay, and the caller's next query reports the problem.
+        """
+        try:
+            load_reference(self.reference_values())
+        except Exception:
+            return False
+        return True
+
+    def reference_values(self):
+        """``(kind, name, description)`` for every strand, grade level, gender and status, in display order"""
+        return self._fetch("SELECT kind, name, description FROM reference_values ORDER BY kind, position")
+
+    def _backfill_name_keys(self):
+        # Rows from before the name_key column; a no-op index probe once done
+        while True:
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                self._execute(cur, "SELECT id, first_name, last_name FROM students WHERE name_key IS NULL LIMIT %s",
+                              (BACKFILL_CHUNK,))
+                rows = cur.fetchall()
+                if not rows:
+                    return
+                self._executemany(cur, "UPDATE students SET name_key=%s WHERE id=%s",
+                                  [(duplicates.name_key(first, last), student_id) for student_id, first, last in rows])
+                conn.commit()
+
+    def ping(self):
+        """Raise if the database cannot be reached"""
+        self._fetch("SELECT 1", one=True)
+
+    def close(self):
+        self.pool.close()
+
+    # Single students
+
+    def insert(self, data, status=PENDING):
+        """Insert one wizard-style registration; returns the new id"""
+        with self.pool.connection() as conn:
+            cur = self._execute(conn.cursor(), INSERT_STUDENT, insert_values(data, status) + (self.actor,))
+            conn.commit()
+            return cur.lastrowid
+
+    def get(self, student_id):
+        """Current StudentRecord for one student, or None if it was deleted"""
+        row = self._fetch(f"SELECT {STUDENT_COLUMNS} FROM students WHERE id=%s AND deleted_at IS NULL",
+                          (student_id,), one=True)
+        return StudentRecord._make(row) if row is not None else None
+
+    def get_many(self, student_ids):
+        """Current StudentRecords for many students; deleted ones are left out"""
+        found = []
+        for start in range(0, len(student_ids), BULK_CHUNK):
+            chunk = student_ids[start:start + BULK_CHUNK]
+            found.extend(StudentRecord._make(row) for row in self._fetch(
+                f"""SELECT {STUDENT_COLUMNS} FROM students
+                    WHERE id IN ({', '.join(['%s'] * len(chunk))}) AND deleted_at IS NULL""", chunk))
+        return found
+
+    def update(self, student_id, data, version):
+        """Save the editable fields of one student read at ``version``; returns the updated row
+
+        Moving a student to another strand or grade level gives up their
+        section.  Raises WriteConflict when another station changed the row first.
+        """
+        return self._write_versioned(student_id, version,
+                                     # section_id first: MySQL evaluates SET left to right
+                                     """UPDATE students
+                                        SET section_id=CASE WHEN strand=%s AND grade_level=%s
+                                                            THEN section_id END,
+                                            first_name=%s, last_name=%s, grade_level=%s, gender=%s,
+                                            age=%s, guardian=%s, strand=%s, name_key=%s, changed_by=%s,
+                                            version=version+1
+                                        WHERE id=%s AND version=%s""",
+                                     (data["Strand"], data["Grade Level"],
+                                      data["First Name"], data["Last Name"], data["Grade Level"], data["Gender"],
+                                      data["Age"], data["Guardian"], data["Strand"],
+                                      duplicates.name_key(data["First Name"], data["Last Name"]), self.actor,
+                                      student_id, version))
+
+    def drop(self, student_id, reason, version):
+        """Mark one student Dropped with a reason; returns the updated row"""
+        return self._write_versioned(student_id, version,
+                                     """UPDATE students SET status=%s, drop_reason=%s, changed_by=%s,
+                                                           version=version+1
+                                        WHERE id=%s AND version=%s""",
+                                     (DROPPED, reason, self.actor, student_id, version))
+
+    def delete(self, student_id, version):
+        """Soft-delete one student, unless another station changed it since ``version``
+
+        The row disappears from every view but stays in the table, with its
+        history, until archive() moves it out.
+        """
+        self._write_versioned(student_id, version,
+                              f"""UPDATE students SET deleted_at={self.dialect.now}, changed_by=%s, version=version+1
+                                  WHERE id=%s AND version=%s AND deleted_at IS NULL""",
+                              (self.actor, student_id, version))
+
+    def restore(self, student_id):
+        """Bring back a soft-deleted student; returns False if it is not deleted (or archived)"""
+        return self._write("""UPDATE students SET deleted_at=NULL, changed_by=%s, version=version+1
+                              WHERE id=%s AND deleted_at IS NOT NULL""", (self.actor, student_id)) > 0
+
+    def _write_versioned(self, student_id, version, sql, params):
+        if self._write(sql, params) == 0:
+            raise WriteConflict(student_id, self.get(student_id))
+        return self.get(student_id)
+
+    # Bulk operations
+
+    def insert_many(self, values):
+        """Insert many insert_values() tuples in one transaction"""
+        with self.pool.connection() as conn:
+            self._executemany(conn.cursor(), INSERT_STUDENT, [row + (self.actor,) for row in values])
+            conn.commit()
+        return len(values)
+
+    def insert_submissions(self, submissions):
+        """Insert queued ``(submission_id, data)`` registrations in one transaction
+
+        Submissions already in the table (a flush retried after its commit)
+        are skipped, so replaying the same batch is harmless.
+        """
+        values = [insert_values(data) + (self.actor, submission_id) for submission_id, data in submissions]
+        with self.pool.connection() as conn:
+            self._executemany(conn.cursor(), self.dialect.skip_duplicates(INSERT_SUBMISSION, "submission_id"),
+                              values)
+            conn.commit()
+        return len(values)
+
+    def submission_ids(self, submission_ids):
+        """``{submission_id: student id}`` for submissions already inserted"""
+        found = {}
+        for start in range(0, len(submission_ids), BULK_CHUNK):
+            chunk = submission_ids[start:start + BULK_CHUNK]
+            found.update(self._fetch(f"""SELECT submission_id, id FROM students
+                                         WHERE submission_id IN ({', '.join(['%s'] * len(chunk))})""", chunk))
+        return found
+
+    def set_status(self, student_ids, status, versions=None, reason=None):
+        """Set the status of many students in one transaction; returns rows changed
+
+        With ``versions`` (one per id, as read) only rows nobody else changed
+        since are updated, so ``len(student_ids) - changed`` were conflicts or
+        already had ``status``.  ``reason`` is stored as the drop reason.
+        """
+        assignments, values = self._status_assignments(status, reason)
+        affected = 0
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            for start in range(0, len(student_ids), BULK_CHUNK):
+                chunk = student_ids[start:start + BULK_CHUNK]
+                if versions is None:
+                    match = f"id IN ({', '.join(['%s'] * len(chunk))})"
+                    params = list(chunk)
+                else:
+                    match = "(" + " OR ".join(["(id = %s AND version = %s)"] * len(chunk)) + ")"
+                    params = [value for pair in zip(chunk, versions[start:start + BULK_CHUNK]) for value in pair]
+                # status <> %s so both backends count only rows that really changed
+                self._execute(cur, f"""UPDATE students SET {assignments}
+                                       WHERE {match} AND status <> %s AND deleted_at IS NULL""",
+                              [*values, *params, status])
+                affected += cur.rowcount
+            conn.commit()
+        return affected
+
+    def set_status_matching(self, student_filter, status, current=PENDING, reason=None):
+        """Move every ``current`` student matching the filter to ``status`` in one UPDATE"""
+        self._check_live(student_filter)
+        assignments, values = self._status_assignments(status, reason)
+        where, params = self._where(student_filter, current)
+        return self._write(f"UPDATE students SET {assignments} WHERE {where}", [*values, *params])
+
+    def _status_assignments(self, status, reason):
+        if reason is None:
+            return "status=%s, changed_by=%s, version=version+1", [status, self.actor]
+        return "status=%s, drop_reason=%s, changed_by=%s, version=version+1", [status, reason, self.actor]
+
+    # Retention
+
+    def purge(self, status, older_than_days=0, chunk_size=BULK_CHUNK, dry_run=False):
+        """Soft-delete ``status`` students untouched for ``older_than_days``; returns how many
+
+        Works a chunk of ids per transaction so a large purge never holds
+        long locks.  ``dry_run`` only counts.
+        """
+        where = f"deleted_at IS NULL AND status = %s AND updated_at < {self.dialect.days_ago()}"
+        params = [status, older_than_days]
+        if dry_run:
+            return self._fetch(f"SELECT COUNT(*) FROM students WHERE {where}", params, one=True)[0]
+
+        purged = 0
+        while True:
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                self._execute(cur, f"SELECT id FROM students WHERE {where} LIMIT %s", [*params, chunk_size])
+                ids = [row[0] for row in cur.fetchall()]
+                if not ids:
+                    return purged
+                # Re-checked so a row changed since the SELECT is kept
+                self._execute(cur, f"""UPDATE students SET deleted_at={self.dialect.now}, changed_by=%s,
+                                                         version=version+1
+                                       WHERE id IN ({', '.join(['%s'] * len(ids))}) AND {where}""",
+                              [self.actor, *ids, *params])
+                purged += cur.rowcount
+                conn.commit()
+
+    def archive(self, older_than_days=0, chunk_size=BULK_CHUNK, dry_run=False):
+        """Move students soft-deleted ``older_than_days`` ago to students_archive; returns how many
+
+        Each chunk is copied and deleted in one transaction, walking the
+        deleted_at index, so the live table shrinks without long locks.  The
+        audit trail keeps an 'archive' entry and the earlier history.
+        """
+        return self._archive(f"deleted_at < {self.dialect.days_ago()}", [older_than_days], chunk_size, dry_run)
+
+    def archive_year(self, school_year, chunk_size=BULK_CHUNK, dry_run=False):
+        """Move every student of a closed school year to students_archive; returns how many
+
+        Walks the school_year index a chunk per transaction like archive().
+        The current and future years cannot be archived, and an archived
+        year's rollover can no longer be undone.
+        """
+        if school_year >= current_school_year():
+            raise ValueError(f"School year {school_year_label(school_year)} is not closed yet")
+        archived = self._archive("school_year = %s", [school_year], chunk_size, dry_run)
+        if not dry_run:
+            self._write("DELETE FROM rollover_log WHERE school_year = %s", (school_year,))
+        return archived
+
+    def _archive(self, where, params, chunk_size, dry_run):
+        if dry_run:
+            return self._fetch(f"SELECT COUNT(*) FROM students WHERE {where}", params, one=True)[0]
+
+        archived = 0
+        while True:
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                self.dialect.begin_write(cur)
+                self._execute(cur, self.dialect.for_update(f"SELECT id FROM students WHERE {where} LIMIT %s"),
+                              [*params, chunk_size])
+                ids = [row[0] for row in cur.fetchall()]
+                if not ids:
+                    return archived
+                in_ids = f"id IN ({', '.join(['%s'] * len(ids))})"
+                self._execute(cur, f"INSERT INTO students_archive SELECT * FROM students WHERE {in_ids}", ids)
+                self._execute(cur, f"DELETE FROM students WHERE {in_ids}", ids)
+                archived += cur.rowcount
+                conn.commit()
+
+    def prune_audit(self, older_than_days, chunk_size=BULK_CHUNK):
+        """Delete audit entries older than ``older_than_days``, a chunk per transaction; returns how many"""
+        pruned = 0
+        while True:
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                self._execute(cur, f"SELECT id FROM audit_log WHERE at < {self.dialect.days_ago()} LIMIT %s",
+                              (older_than_days, chunk_size))
+                ids = [row[0] for row in cur.fetchall()]
+                if not ids:
+                    return pruned
+                self._execute(cur, f"DELETE FROM audit_log WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+                pruned += cur.rowcount
+                conn.commit()
+
+    def history(self, student_id):
+        """Audit trail of one student, oldest first: ``(at, action, actor, changes)`` rows
+
+        ``changes`` maps each changed column to ``[old, new]``; empty for an
+        archive entry.  Archived students keep their history.
+        """
+        rows = self._fetch("""SELECT at, action, actor, changes FROM audit_log
+                              WHERE student_id=%s ORDER BY id""", (student_id,))
+        return [(at, action, actor, json.loads(changes) if changes else {}) for at, action, actor, changes in rows]
+
+    # Year-end rollover
+
+    def rollover_preview(self, school_year):
+        """``(strand, promoted, graduated)`` per strand that a rollover of ``school_year`` would move
+
+        Read from enrollment_counts, so the preview is instant at any roster size.
+        """
+        rows = self._fetch("""SELECT strand, SUM(CASE WHEN grade_level = %s THEN total ELSE 0 END),
+                                     SUM(CASE WHEN grade_level = %s THEN total ELSE 0 END)
+                              FROM enrollment_counts WHERE school_year = %s AND status = %s
+                              GROUP BY strand HAVING SUM(total) > 0 ORDER BY strand""",
+                           (GRADE_11, GRADE_12, school_year, ACCEPTED))
+        return [(strand, int(promoted), int(graduated)) for strand, promoted, graduated in rows]
+
+    def rollover(self, school_year, chunk_size=BULK_CHUNK, dry_run=False):
+        """Close ``school_year``: promote its accepted Grade 11 students and graduate Grade 12
+
+        Returns ``(promoted, graduated)``.  Promoted students move to Grade 12
+        of the next school year as Pending without a section, so accepting
+        them seats them in Grade 12 sections under the usual limits.  Each
+        chunk is journaled in rollover_log and moved by two set-based UPDATEs
+        in one transaction; an interrupted run is finished by running it
+        again, and rollback_rollover() undoes it.
+        """
+        if school_year > current_school_year():
+            raise ValueError(f"School year {school_year_label(school_year)} has not started yet")
+        if dry_run:
+            rows = self.rollover_preview(school_year)
+            return sum(row[1] for row in rows), sum(row[2] for row in rows)
+
+        where = "school_year = %s AND status = %s AND grade_level IN (%s, %s) AND deleted_at IS NULL"
+        promoted = graduated = 0
+        while True:
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                self.dialect.begin_write(cur)
+                self._execute(cur, self.dialect.for_update(f"SELECT id FROM students WHERE {where} LIMIT %s"),
+                              (school_year, ACCEPTED, GRADE_11, GRADE_12, chunk_size))
+                ids = [row[0] for row in cur.fetchall()]
+                if not ids:
+                    return promoted, graduated
+                in_ids = f"id IN ({', '.join(['%s'] * len(ids))})"
+                # Journal the version the UPDATEs below write, so a rollback leaves later edits alone
+                self._execute(cur, f"""INSERT INTO rollover_log
+                                           (school_year, student_id, grade_level, status, section_id, version)
+                                       SELECT school_year, id, grade_level, status, section_id, version + 1
+                                       FROM students WHERE {in_ids}""", ids)
+                self._execute(cur, f"""UPDATE students SET status=%s, changed_by=%s, version=version+1
+                                       WHERE {in_ids} AND grade_level = %s""", [GRADUATED, self.actor, *ids, GRADE_12])
+                graduated += cur.rowcount
+                self._execute(cur, f"""UPDATE students SET grade_level=%s, school_year=%s, status=%s,
+                                                          section_id=NULL, changed_by=%s, version=version+1
+                                       WHERE {in_ids} AND grade_level = %s""",
+                              [GRADE_12, school_year + 1, PENDING, self.actor, *ids, GRADE_11])
+                promoted += cur.rowcount
+                conn.commit()
+
+    def rollback_rollover(self, school_year, chunk_size=BULK_CHUNK, dry_run=False):
+        """Undo the rollover of ``school_year``; returns ``(restored, skipped)``
+
+        Students changed since the rollover (accepted into a Grade 12
+        section, dropped, archived, ...) are skipped and keep their current
+        values.  Works a chunk of the journal per transaction.
+        """
+        if dry_run:
+            total, unchanged = self._fetch("""SELECT COUNT(*), COALESCE(SUM(CASE WHEN s.version = r.version
+                                                                          THEN 1 ELSE 0 END), 0)
+                                              FROM rollover_log r LEFT JOIN students s ON s.id = r.student_id
+                                              WHERE r.school_year = %s""", (school_year,), one=True)
+            return int(unchanged), int(total) - int(unchanged)
+
+        journal = "(SELECT r.{} FROM rollover_log r WHERE r.school_year = %s AND r.student_id = students.id)"
+        restored = skipped = 0
+        while True:
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                self.dialect.begin_write(cur)
+                self._execute(cur, """SELECT student_id FROM rollover_log WHERE school_year = %s
+                                      ORDER BY student_id LIMIT %s""", (school_year, chunk_size))
+                ids = [row[0] for row in cur.fetchall()]
+                if not ids:
+                    return restored, skipped
+                in_ids = ', '.join(['%s'] * len(ids))
+                self._execute(cur, f"""UPDATE students SET grade_level={journal.format("grade_level")},
+                                                          status={journal.format("status")},
+                                                          section_id={journal.format("section_id")},
+                                                          school_year=%s, changed_by=%s, version=version+1
+                                       WHERE id IN ({in_ids}) AND version = {journal.format("version")}""",
+                              [school_year, school_year, school_year, school_year, self.actor, *ids, school_year])
+                restored += cur.rowcount
+                skipped += len(ids) - cur.rowcount
+                self._execute(cur, f"DELETE FROM rollover_log WHERE school_year = %s AND student_id IN ({in_ids})",
+                              [school_year, *ids])
+                conn.commit()
+
+    # Duplicate detection
+
+    def similar_students(self, data):
+        """Existing students that look like the same learner as a wizard-style registration"""
+        rows = self._fetch(f"SELECT {STUDENT_COLUMNS} FROM students WHERE name_key=%s AND deleted_at IS NULL",
+                           (duplicates.name_key(data["First Name"], data["Last Name"]),))
+        wanted = (data["First Name"], data["Last Name"], data["Guardian"])
+        records = map(StudentRecord._make, rows)
+        return [r for r in records if duplicates.likely_duplicate(wanted, (r.first_name, r.last_name, r.guardian))]
+
+    def duplicate_groups(self, statuses=None):
+        """Groups of StudentRecords that look like the same learner, in name key order
+
+        Shared keys come from an index-only GROUP BY, so only candidate rows
+        are read and compared.  ``statuses`` limits which rows are reported.
+        """
+        keys = [row[0] for row in self._fetch("""SELECT name_key FROM students
+                                                 WHERE name_key IS NOT NULL AND deleted_at IS NULL
+                                                 GROUP BY name_key HAVING COUNT(*) > 1 ORDER BY name_key""")]
+        groups = []
+        for start in range(0, len(keys), BULK_CHUNK):
+            chunk = keys[start:start + BULK_CHUNK]
+            sql = (f"SELECT {STUDENT_COLUMNS}, name_key FROM students "
+                   f"WHERE name_key IN ({', '.join(['%s'] * len(chunk))}) AND deleted_at IS NULL")
+            params = list(chunk)
+            if statuses:
+                sql += f" AND status IN ({', '.join(['%s'] * len(statuses))})"
+                params += statuses
+            by_key = {}
+            for row in self._fetch(sql + " ORDER BY name_key, id", params):
+                by_key.setdefault(row[-1], []).append(StudentRecord._make(row[:-1]))
+            for rows in by_key.values():
+                groups += duplicates.group(rows)
+        return groups
+
+    # Acceptance and capacities
+
+    def accept(self, student_ids, versions):
+        """Accept the given students (as read at ``versions``) into sections; returns an Assignment
+
+        Students already Accepted or changed at another station since are
+        skipped; those that do not fit stay Pending as ``waitlisted``.
+        """
+        def candidates(cur):
+            found = []
+            for start in range(0, len(student_ids), BULK_CHUNK):
+                chunk = student_ids[start:start + BULK_CHUNK]
+                match = " OR ".join(["(id = %s AND version = %s)"] * len(chunk))
+                params = [value for pair in zip(chunk, versions[start:start + BULK_CHUNK]) for value in pair]
+                found += self._candidates(cur, f"({match}) AND status <> %s AND deleted_at IS NULL",
+                                          [*params, ACCEPTED])
+            return sorted(found)
+
+        return self._accept(candidates)
+
+    def accept_matching(self, student_filter):
+        """Accept every Pending student matching the filter in one pass; returns an Assignment"""
+        self._check_live(student_filter)
+        where, params = self._where(student_filter, PENDING)
+        return self._accept(lambda cur: self._candidates(cur, where, params))
+
+    def _candidates(self, cur, where, params):
+        sql = f"SELECT id, strand, grade_level, gender, school_year FROM students WHERE {where} ORDER BY id"
+        return [tuple(row) for row in self._execute(cur, self.dialect.for_update(sql), params).fetchall()]
+
+    def _accept(self, find_candidates):
+        """Read, assign and write one acceptance batch while holding the capacity locks
+
+        Candidates and then the sections and strand limits they draw on are
+        locked (SQLite: the whole file) before seats are counted, so two
+        stations accepting at once are serialized instead of overfilling.
+        Seats are counted in each candidate's own school year, so promoted
+        students fill next year's sections rather than this year's.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            self.dialect.begin_write(cur)
+            candidates = find_candidates(cur)
+            if not candidates:
+                return assign((), (), {}, {})
+
+            strands = sorted({row[1] for row in candidates})
+            in_strands = f"strand IN ({', '.join(['%s'] * len(strands))})"
+            sections = self._execute(cur, self.dialect.for_update(
+                f"SELECT id, strand, grade_level, capacity FROM sections WHERE {in_strands} ORDER BY name, id"),
+                strands).fetchall()
+            limits = dict(self._execute(cur, self.dialect.for_update(
+                f"SELECT strand, capacity FROM strand_capacities WHERE {in_strands}"), strands).fetchall())
+
+            by_year = {}
+            for student_id, strand, grade_level, gender, school_year in candidates:
+                by_year.setdefault(school_year, []).append((student_id, strand, grade_level, gender))
+            result = assign((), (), {}, {})
+            for school_year in sorted(by_year):
+                taken = {}
+                if sections:
+                    ids = [row[0] for row in sections]
+                    self._execute(cur, f"""SELECT section_id, gender, COUNT(*) FROM students
+                                           WHERE section_id IN ({', '.join(['%s'] * len(ids))}) AND status = %s
+                                             AND deleted_at IS NULL AND school_year = %s
+                                           GROUP BY section_id, gender""", [*ids, ACCEPTED, school_year])
+                    taken = {(section_id, gender): count for section_id, gender, count in cur.fetchall()}
+                room = dict(limits)
+                if limits:
+                    # enrollment_counts is kept by triggers, so this is current inside the transaction
+                    self._execute(cur, f"""SELECT strand, SUM(total) FROM enrollment_counts
+                                           WHERE school_year = %s AND status = %s AND {in_strands}
+                                           GROUP BY strand""", [school_year, ACCEPTED, *strands])
+                    for strand, accepted in cur.fetchall():
+                        if strand in room:
+                            room[strand] -= accepted
+                placed = assign(by_year[school_year], sections, taken, room)
+                for section_id, ids in placed.sections.items():
+                    result.sections.setdefault(section_id, []).extend(ids)
+                result.waitlisted += placed.waitlisted
+
+            for section_id, ids in result.sections.items():
+                for start in range(0, len(ids), BULK_CHUNK):
+                    chunk = ids[start:start + BULK_CHUNK]
+                    self._execute(cur, f"""UPDATE students SET status=%s, section_id=%s, changed_by=%s,
+                                                              version=version+1
+                                           WHERE id IN ({', '.join(['%s'] * len(chunk))})""",
+                                  [ACCEPTED, section_id, self.actor, *chunk])
+            conn.commit()
+        return result
+
+    def capacities(self, school_year=None):
+        """``(strand_limits, sections)`` for the capacity editor
+
+        strand_limits maps strand -> capacity (strands without a row are
+        unlimited); sections are ``(id, strand, grade_level, name, capacity,
+        accepted)`` rows, counting students accepted in ``school_year``
+        (default: the current one).
+        """
+        if school_year is None:
+            school_year = current_school_year()
+        limits = dict(self._fetch("SELECT strand, capacity FROM strand_capacities"))
+        sections = self._fetch("""SELECT s.id, s.strand, s.grade_level, s.name, s.capacity,
+                                         (SELECT COUNT(*) FROM students
+                                          WHERE section_id = s.id AND status = %s AND deleted_at IS NULL
+                                            AND school_year = %s)
+                                  FROM sections s ORDER BY s.strand, s.grade_level, s.name""",
+                               (ACCEPTED, school_year))
+        return limits, sections
+
+    def strand_seats(self, school_year=None):
+        """Seats left in ``school_year`` (default: current) per limited strand; missing strands are unlimited"""
+        if school_year is None:
+            school_year = current_school_year()
+        return dict(self._fetch("""SELECT c.strand, c.capacity - COALESCE(SUM(e.total), 0)
+                                   FROM strand_capacities c
+                                   LEFT JOIN enrollment_counts e ON e.strand = c.strand AND e.status = %s
+                                                                AND e.school_year = %s
+                                   GROUP BY c.strand, c.capacity""", (ACCEPTED, school_year)))
+
+    def set_strand_capacity(self, strand, capacity):
+        """Limit a strand to ``capacity`` accepted students; None removes the limit"""
+        if capacity is None:
+            self._write("DELETE FROM strand_capacities WHERE strand=%s", (strand,))
+        else:
+            self._write(self.dialect.upsert("INSERT INTO strand_capacities (strand, capacity) VALUES (%s, %s)",
+                                            "strand", ["capacity"]), (strand, capacity))
+
+    def save_section(self, strand, grade_level, name, capacity):
+        """Create a section, or change the capacity of an existing one with the same name"""
+        self._write(self.dialect.upsert("""INSERT INTO sections (strand, grade_level, name, capacity)
+                                           VALUES (%s, %s, %s, %s)""",
+                                        "strand, grade_level, name", ["capacity"]),
+                    (strand, grade_level, name, capacity))
+
+    def remove_section(self, section_id):
+        """Delete a section nobody is seated in; raises ValueError otherwise"""
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            self.dialect.begin_write(cur)
+            self._execute(cur, self.dialect.for_update("SELECT id FROM sections WHERE id=%s"), (section_id,))
+            self._execute(cur, "SELECT COUNT(*) FROM students WHERE section_id=%s AND deleted_at IS NULL",
+                          (section_id,))
+            if cur.fetchone()[0]:
+                raise ValueError("Students are still assigned to this section")
+            self._execute(cur, "DELETE FROM sections WHERE id=%s", (section_id,))
+            conn.commit()
+
+    def count_matching(self, student_filter, status=None):
+        where, params = self._where(student_filter, status)
+        return self._fetch(f"SELECT COUNT(*) FROM {student_filter.table} WHERE {where}", params, one=True)[0]
+
+    def _check_live(self, student_filter):
+        # Bulk writes only touch the live table; archived years are read-only
+        if student_filter.archived:
+            raise ValueError("Archived students cannot change status")
+
+    def _where(self, student_filter, status):
+        clauses, params = student_filter.where(self.dialect)
+        if status:
+            clauses.append("status = %s")
+            params.append(status)
+        return " AND ".join(clauses) or "1=1", params
+
+    # Views
+
+    def page(self, student_filter, after=None, before=None, limit=200):
+        """One keyset page of StudentRecords in display order (see StudentFilter.page_query)"""
+        sql, params = student_filter.page_query(self.dialect, after=after, before=before, limit=limit)
+        rows = [StudentRecord._make(row) for row in self._fetch(sql, params)]
+        return rows[::-1] if before is not None else rows
+
+    def changes_since(self, since, limit=CHANGE_LIMIT):
+        """StudentRecords changed since the ``since`` watermark plus the new watermark
+
+        With ``since=None`` only the current watermark is returned; rows is
+        None when more than ``limit`` rows changed.  A deleted student comes
+        back as the one-element tombstone ``(id,)``.
+        """
+        if since is None:
+            return (), self._fetch("SELECT COALESCE(MAX(updated_at), %s) FROM students",
+                                   (self.dialect.min_timestamp,), one=True)[0]
+
+        # >= so rows sharing the watermark's timestamp are never missed
+        rows = self._fetch(f"""SELECT {STUDENT_COLUMNS}, deleted_at, updated_at FROM students
+                               WHERE updated_at >= %s ORDER BY updated_at LIMIT %s""", (since, limit + 1))
+
+        if len(rows) > limit:
+            return None, since
+        watermark = rows[-1][-1] if rows else since
+        return [row[:1] if row[-2] is not None else StudentRecord._make(row[:-2]) for row in rows], watermark
+
+    def enrollment_counts(self, school_year=None):
+        """``(strand, grade_level, gender, status, total)`` for every non-empty combination
+
+        Reads the trigger-maintained summary table, so the cost does not grow
+        with the roster.  ``school_year`` None adds up every year still in
+        the students table.
+        """
+        if school_year is not None:
+            return self._fetch("""SELECT strand, grade_level, gender, status, total FROM enrollment_counts
+                                  WHERE school_year = %s AND total > 0""", (school_year,))
+        return self._fetch("""SELECT strand, grade_level, gender, status, SUM(total) FROM enrollment_counts
+                              GROUP BY strand, grade_level, gender, status HAVING SUM(total) > 0""")
+
+    def school_years(self):
+        """``(school_year, archived)`` for every year with students, newest first"""
+        live = {row[0] for row in self._fetch("SELECT DISTINCT school_year FROM students")}
+        archived = {row[0] for row in self._fetch("SELECT DISTINCT school_year FROM students_archive")}
+        return [(year, year not in live) for year in sorted(live | archived, reverse=True)]
+
+    def stream(self, student_filter, columns=None, chunk_size=STREAM_CHUNK):
+        """Yield lists of rows for the whole filtered roster without buffering it"""
+        sql, params = student_filter.select_query(self.dialect, columns)
+        with self.pool.connection() as conn:
+            cur = self.dialect.stream_cursor(conn)
+            try:
+                self._execute(cur, sql, params)
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                cur.close()
+
+    # Bulk import bookkeeping
+
+    def import_run(self, file_hash):
+        """(last_line, inserted, rejected, completed_at) for an earlier import, or None"""
+        return self._fetch("""SELECT last_line, inserted, rejected, completed_at
+                              FROM import_runs WHERE file_hash=%s""", (file_hash,), one=True)
+
+    def begin_import(self, file_hash, file_name, restart=False):
+        """Register a new import, or reset an earlier one's progress when restarting"""
+        if restart:
+            self._write("""UPDATE import_runs SET last_line=0, inserted=0, rejected=0, completed_at=NULL
+                           WHERE file_hash=%s""", (file_hash,))
+        else:
+            self._write("INSERT INTO import_runs (file_hash, file_name) VALUES (%s, %s)", (file_hash, file_name))
+
+    def record_import_batch(self, file_hash, values, last_line, rejected):
+        """Insert one import batch and record progress in the same transaction"""
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            if values:
+                self._executemany(cur, INSERT_STUDENT, [row + (self.actor,) for row in values])
+            self._execute(cur, """UPDATE import_runs SET last_line=%s, inserted=inserted+%s, rejected=rejected+%s
+                                  WHERE file_hash=%s""", (last_line, len(values), rejected, file_hash))
+            conn.commit()
+
+    def finish_import(self, file_hash):
+        self._write("UPDATE import_runs SET completed_at=CURRENT_TIMESTAMP WHERE file_hash=%s", (file_hash,))
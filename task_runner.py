@@ -0,0 +1,119 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+MAX_WORKERS = 4     # background threads for database work
+POLL_MS = 50        # how often the Tk loop collects finished tasks
+
+
+class TaskRunner:
+    """Runs blocking work (database I/O) off the Tk main thread
+
+    Worker threads never touch Tk: finished futures are queued and their
+    callbacks run on the main thread from a ``root.after`` poll.  Work
+    submitted with an ``owner`` window is cancelled when that window is
+    destroyed, and the owner shows a busy cursor while it has tasks running.
+    """
+
+    def __init__(self, root, max_workers=MAX_WORKERS, poll_ms=POLL_MS, on_busy=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._finished = queue.Queue()
+        self._tasks = {}        # future -> (owner, on_done, on_error)
+        self._owners = {}       # owner -> number of unfinished tasks
+        self._watched = set()   # owners with a <Destroy> binding
+        self._poll_id = None
+
+    def submit(self, fn, *args, on_done=None, on_error=None, owner=None, quiet=False, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the background; callbacks run on the Tk thread
+
+        ``quiet`` work (e.g. periodic polls) is still cancelled with its owner
+        but shows no busy cursor and is not counted as pending.
+        """
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._tasks[future] = (owner, on_done, on_error, quiet)
+        if owner is not None:
+            self._track(owner, quiet)
+        future.add_done_callback(self._finished.put)
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+        self._notify_busy()
+        return future
+
+    def cancel(self, owner):
+        """Cancel queued work for a window and ignore results still in flight"""
+        for future, task in list(self._tasks.items()):
+            if task[0] is owner:
+                future.cancel()
+                del self._tasks[future]
+        self._owners.pop(owner, None)
+        self._notify_busy()
+
+    def pending(self):
+        return sum(1 for task in self._tasks.values() if not task[3])
+
+    def shutdown(self):
+        """Stop polling and abandon queued work (used when the app closes)"""
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._tasks.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                future = self._finished.get_nowait()
+            except queue.Empty:
+                break
+
+            task = self._tasks.pop(future, None)
+            if task is None or future.cancelled():
+                continue    # owner went away
+            owner, on_done, on_error, quiet = task
+            if not quiet:
+                self._untrack(owner)
+
+            error = future.exception()
+            if error is None:
+                if on_done is not None:
+                    with metrics.timer("tk_callback_seconds", handler=getattr(on_done, "__name__", "callback")):
+                        on_done(future.result())
+            elif on_error is not None:
+                with metrics.timer("tk_callback_seconds", handler=getattr(on_error, "__name__", "callback")):
+                    on_error(error)
+            else:
+                self.root.report_callback_exception(type(error), error, error.__traceback__)
+
+        if self._tasks:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+        self._notify_busy()
+
+    def _track(self, owner, quiet=False):
+        if str(owner) not in self._watched:
+            self._watched.add(str(owner))
+            owner.bind("<Destroy>", lambda e: e.widget is owner and self.cancel(owner), add="+")
+        if quiet:
+            return
+        if owner not in self._owners:
+            self._owners[owner] = 0
+            owner.configure(cursor="watch")
+        self._owners[owner] += 1
+
+    def _untrack(self, owner):
+        if owner not in self._owners:
+            return
+        self._owners[owner] -= 1
+        if self._owners[owner] == 0:
+            del self._owners[owner]
+            if owner.winfo_exists():
+                owner.configure(cursor="")
+
+    def _notify_busy(self):
+        if self.on_busy is not None:
+            self.on_busy(self.pending())
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_config  # noqa: E402
+from student_repository import StudentRepository  # noqa: E402
+
+SCHOOL_YEAR = 2025
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A migrated repository on its own throwaway SQLite file, in SCHOOL_YEAR"""
+    monkeypatch.setenv("SHS_SCHOOL_YEAR", str(SCHOOL_YEAR))
+    pool = db_config.create_pool("sqlite", str(tmp_path / "test.db"))
+    repo = StudentRepository(pool=pool, backend="sqlite", actor="test")
+    repo.migrate()
+    yield repo
+    pool.close()
+
+
+def student(first="Juan", last="Cruz", grade="Grade 11", gender="Male", strand="STEM", age="16"):
+    return {"First Name": first, "Last Name": last, "Grade Level": grade, "Gender": gender,
+            "Age": age, "Guardian": "Maria Cruz", "Strand": strand}
+
+
+def add_students(repo, count, **fields):
+    """Insert ``count`` Pending students (numbered first names) and return their ids"""
+    return [repo.insert(student(first=f"Student{i}", **fields)) for i in range(count)]
@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+import admin
+import db_config
+from choices import ACCEPTED, PENDING, REJECTED
+from conftest import add_students
+
+
+@pytest.fixture
+def cli(repo, tmp_path, monkeypatch):
+    """Run admin.main against the test database; returns (exit status, stdout)"""
+    monkeypatch.setattr(db_config, "DB_BACKEND", "sqlite")
+
+    def run(*argv):
+        # main() closes its pool when done, so each run gets a fresh one
+        monkeypatch.setattr(db_config, "pool", db_config.create_pool("sqlite", str(tmp_path / "test.db")))
+        out = io.StringIO()
+        return admin.main(list(argv), out), out.getvalue()
+
+    return run
+
+
+def test_list_streams_the_filtered_roster_as_csv(repo, cli):
+    add_students(repo, 2)
+    add_students(repo, 1, strand="ABM")
+
+    status, out = cli("list", "--strand", "ABM", "--format", "csv", "--columns", "ID,Strand")
+    assert status == 0
+    assert out.splitlines() == ["ID,Strand", "3,ABM"]
+
+
+def test_reject_dry_run_changes_nothing(repo, cli):
+    ids = add_students(repo, 3)
+
+    assert cli("reject", "--strand", "STEM", "--dry-run") == (0, "Would reject 3 Pending student(s)\n")
+    assert {repo.get(i).status for i in ids} == {PENDING}
+
+    assert cli("reject", "--ids", f"{ids[0]},{ids[1]}")[0] == 0
+    assert [repo.get(i).status for i in ids] == [REJECTED, REJECTED, PENDING]
+
+
+def test_accept_reports_waitlisted_students(repo, cli):
+    repo.set_strand_capacity("STEM", 1)
+    ids = add_students(repo, 2)
+
+    status, out = cli("accept")
+    assert status == 0
+    assert out == f"1 student(s) marked as Accepted\n1 stayed Pending (strand or sections full): {ids[1]}\n"
+    assert repo.get(ids[0]).status == ACCEPTED
+
+
+def test_unknown_reference_value_is_a_usage_error(cli):
+    with pytest.raises(SystemExit) as error:
+        cli("list", "--strand", "ASTRONOMY")
+    assert error.value.code == 2
+
+
+def test_failed_commands_exit_with_status_2(cli, capsys):
+    assert cli("archive", "--year", "2999")[0] == 2
+    assert capsys.readouterr().err.startswith("archive failed:")
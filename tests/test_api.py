@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+import pytest
+
+import api
+from conftest import student
+from student_repository import StudentRepository
+
+
+class RejectingRepository(StudentRepository):
+    """Fails any insert that includes a learner with this last name, like a constraint would"""
+
+    rejected_name = "Rejectme"
+
+    def insert_submissions(self, submissions):
+        if any(data["Last Name"] == self.rejected_name for _, data in submissions):
+            raise ValueError("constraint failed")
+        return super().insert_submissions(submissions)
+
+
+@pytest.fixture
+def service(repo):
+    """Serve the API on a free local port for the test's coroutine; yields a ``request`` helper"""
+    rejecting = RejectingRepository(pool=repo.pool, backend="sqlite", actor="api")
+
+    def run(test, window_ms=api.BATCH_WINDOW_MS):
+        async def main():
+            server_api = api.RegistrationAPI(rejecting, window_ms=window_ms)
+            server_api.batcher.start()
+            server = await asyncio.start_server(server_api.handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                await test(lambda *args, **kwargs: request(port, *args, **kwargs))
+            finally:
+                server.close()
+                await server.wait_closed()
+                await server_api.batcher.stop()
+                server_api.executor.shutdown()
+
+        asyncio.run(main())
+
+    return run
+
+
+async def request(port, method, path, body=None, raw_headers=None):
+    """Send one request on its own connection; returns (status, decoded JSON)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = b"" if body is None else json.dumps(body).encode()
+    headers = raw_headers if raw_headers is not None else f"Content-Length: {len(payload)}\r\n"
+    writer.write(f"{method} {path} HTTP/1.1\r\nConnection: close\r\n{headers}\r\n".encode() + payload)
+    await writer.drain()
+    status_line = await reader.readline()
+    response = await reader.read()
+    writer.close()
+    return int(status_line.split()[1]), json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+def test_valid_submission_is_registered(service, repo):
+    async def test(request):
+        status, body = await request("POST", "/registrations", student())
+        assert status == 201 and body["status"] == "Pending"
+        status, row = await request("GET", f"/registrations/{body['id']}")
+        assert status == 200 and row["First Name"] == "Juan"
+
+    service(test)
+
+
+def test_invalid_submission_is_a_400(service, repo):
+    async def test(request):
+        status, body = await request("POST", "/registrations", student(age="two"))
+        assert status == 400 and "Age" in body["error"]
+        status, _ = await request("POST", "/registrations", ["not", "an", "object"])
+        assert status == 400
+
+    service(test)
+
+
+def test_retry_with_the_same_submission_id_returns_the_first_registration(service, repo):
+    async def test(request):
+        data = dict(student(), submission_id="kiosk-7-0001")
+        first = await request("POST", "/registrations", data)
+        retry = await request("POST", "/registrations", data)
+        assert first[0] == retry[0] == 201
+        assert first[1]["id"] == retry[1]["id"]
+
+        status, body = await request("POST", "/registrations", dict(student(), submission_id="x" * 33))
+        assert status == 400 and "submission_id" in body["error"]
+
+    service(test)
+    assert repo.count_matching(api.StudentFilter()) == 1
+
+
+def test_a_bad_row_fails_alone_in_a_shared_batch(service, repo):
+    async def test(request):
+        results = await asyncio.gather(
+            request("POST", "/registrations", student(first="Ana")),
+            request("POST", "/registrations", student(last=RejectingRepository.rejected_name)),
+            request("POST", "/registrations", student(first="Ben")))
+        assert [status for status, _ in results] == [201, 400, 201]
+        assert "Registration rejected" in results[1][1]["error"]
+
+    service(test, window_ms=200)    # long enough for all three to share one batch
+    assert sorted(row.first_name for row in repo.page(api.StudentFilter())) == ["Ana", "Ben"]
+
+
+def test_list_pages_with_limit_and_after(service, repo):
+    ids = [repo.insert(student(first=f"Learner{i}")) for i in range(5)]
+
+    async def test(request):
+        status, page = await request("GET", "/registrations?limit=2")
+        assert status == 200 and [s["ID"] for s in page["students"]] == ids[:2]
+        assert page["next_after"] == ids[1]
+
+        # A cursor whose student was deleted since still moves forward
+        repo.delete(ids[2], repo.get(ids[2]).version)
+        _, page = await request("GET", f"/registrations?limit=2&after={ids[2]}")
+        assert [s["ID"] for s in page["students"]] == ids[3:] and page["next_after"] == ids[4]
+        _, page = await request("GET", f"/registrations?limit=2&after={ids[4]}")
+        assert page == {"students": [], "next_after": None}
+
+        for query in ("limit=0", f"limit={api.PAGE_LIMIT + 1}", "limit=ten", "after=x", "strand=NOPE"):
+            status, _ = await request("GET", f"/registrations?{query}")
+            assert status == 400, query
+
+    service(test)
+
+
+def test_oversized_and_malformed_bodies_are_refused(service, repo):
+    async def test(request):
+        status, _ = await request("POST", "/registrations",
+                                  raw_headers=f"Content-Length: {api.MAX_BODY + 1}\r\n")
+        assert status == 413
+        for length in ("abc", "-1"):
+            status, body = await request("POST", "/registrations", raw_headers=f"Content-Length: {length}\r\n")
+            assert (status, body) == (400, {"error": "Bad Content-Length"})
+
+    service(test)
@@ -0,0 +1,36 @@
+from assignment import assign
+
+
+def test_full_sections_waitlist_the_rest_in_queue_order():
+    candidates = [(i, "STEM", "Grade 11", "Male") for i in range(1, 6)]
+    sections = [(10, "STEM", "Grade 11", 2), (11, "STEM", "Grade 11", 2)]
+
+    result = assign(candidates, sections, {(10, "Male"): 1}, {})
+    assert result.accepted == 3
+    assert result.waitlisted == [4, 5]
+    assert len(result.sections[10]) == 1 and len(result.sections[11]) == 2
+
+
+def test_strand_limit_is_shared_round_robin_across_grade_and_gender_queues():
+    candidates = ([(i, "ABM", "Grade 11", "Male") for i in range(1, 5)]
+                  + [(i, "ABM", "Grade 11", "Female") for i in range(5, 7)]
+                  + [(i, "ABM", "Grade 12", "Male") for i in range(7, 9)])
+
+    result = assign(candidates, [], {}, {"ABM": 3})
+    # One from each (grade, gender) queue before anyone gets a second seat
+    assert sorted(result.sections[None]) == [1, 5, 7]
+    assert sorted(result.waitlisted) == [2, 3, 4, 6, 8]
+
+
+def test_students_go_to_the_section_with_the_smallest_share_of_their_gender():
+    sections = [(10, "GAS", "Grade 12", 4), (11, "GAS", "Grade 12", 4)]
+    taken = {(10, "Female"): 2, (11, "Male"): 2}
+
+    result = assign([(1, "GAS", "Grade 12", "Female"), (2, "GAS", "Grade 12", "Male")], sections, taken, {})
+    assert result.sections == {11: [1], 10: [2]}
+
+
+def test_strands_without_sections_are_only_limited_by_their_strand_room():
+    result = assign([(1, "HUMSS", "Grade 11", "Male"), (2, "STEM", "Grade 11", "Male")],
+                    [(10, "STEM", "Grade 11", 1)], {(10, "Male"): 1}, {})
+    assert result.sections == {None: [1]} and result.waitlisted == [2]
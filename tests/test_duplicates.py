@@ -0,0 +1,36 @@
+import duplicates
+from conftest import student
+
+
+def row(student_id, first, last, guardian):
+    return (student_id, first, last, "Grade 11", "Male", 16, guardian, "STEM", "Pending")
+
+
+def test_name_key_ignores_spelling_variants():
+    assert duplicates.name_key("Jon", "Dela Cruz") == duplicates.name_key("John", "dela cruz")
+    assert duplicates.name_key("Jon", "Cruz") != duplicates.name_key("Jon", "Santos")
+
+
+def test_group_chains_look_alikes_and_leaves_out_singles():
+    rows = [row(1, "Juan", "Dela Cruz", "Maria Dela Cruz"),
+            row(2, "Pedro", "Santos", "Ana Santos"),
+            row(3, "Juan", "Dela Cruz", "Maria Dela Cruz"),
+            row(4, "Juan", "Delacruz", "Maria Dela Cruz"),
+            row(5, "Jose", "Reyes", "Lito Reyes")]
+
+    groups = duplicates.group(rows)
+    assert [[r[0] for r in members] for members in groups] == [[1, 3, 4]]
+
+
+def test_different_guardians_keep_namesakes_apart():
+    rows = [row(1, "Juan", "Cruz", "Maria Cruz"), row(2, "Juan", "Cruz", "Roberto Villanueva")]
+    assert duplicates.group(rows) == []
+
+
+def test_repository_finds_similar_students_and_duplicate_groups(repo):
+    first = repo.insert(student(first="John", last="Dela Cruz"))
+    second = repo.insert(student(first="Jon", last="Dela Cruz"))
+    repo.insert(student(first="Pedro", last="Santos"))
+
+    assert [r.id for r in repo.similar_students(student(first="Jon", last="Dela Cruz"))] == [first, second]
+    assert [[r.id for r in members] for members in repo.duplicate_groups()] == [[first, second]]
@@ -0,0 +1,43 @@
+import csv
+import json
+import threading
+
+import pytest
+
+from conftest import add_students
+from exporter import ExportCancelled, export_students
+from student_query import StudentFilter
+
+
+def test_csv_export_writes_the_chosen_columns_of_the_filtered_roster(repo, tmp_path):
+    add_students(repo, 3)
+    add_students(repo, 2, strand="ABM")
+    path = tmp_path / "roster.csv"
+
+    count = export_students(str(path), StudentFilter(strand="ABM"), ["ID", "Strand"], repo=repo)
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert count == 2
+    assert rows == [["ID", "Strand"], ["4", "ABM"], ["5", "ABM"]]
+
+
+def test_json_export_is_a_list_of_objects(repo, tmp_path):
+    add_students(repo, 2)
+    path = tmp_path / "roster.json"
+    export_students(str(path), columns=["ID", "Last Name"], repo=repo)
+    assert json.loads(path.read_text()) == [{"ID": 1, "Last Name": "Cruz"}, {"ID": 2, "Last Name": "Cruz"}]
+
+
+def test_cancelled_export_leaves_no_file(repo, tmp_path):
+    add_students(repo, 3)
+    cancel = threading.Event()
+    cancel.set()
+    path = tmp_path / "roster.csv"
+    with pytest.raises(ExportCancelled):
+        export_students(str(path), cancel=cancel, repo=repo)
+    assert not any(p.name.startswith("roster") for p in tmp_path.iterdir())
+
+
+def test_unknown_format_is_refused(repo, tmp_path):
+    with pytest.raises(ValueError):
+        export_students(str(tmp_path / "roster.txt"), repo=repo)
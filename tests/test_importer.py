@@ -0,0 +1,70 @@
+import csv
+import threading
+
+import pytest
+
+from importer import AlreadyImported, ImportFileError, import_file
+from student_query import StudentFilter
+
+HEADER = ["First Name", "Last Name", "Grade", "Gender", "Age", "Guardian", "Strand"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return str(path)
+
+
+def learner(i, age="16"):
+    return [f"Learner{i}", "Cruz", "Grade 11", "Female", age, "Maria Cruz", "STEM"]
+
+
+def test_import_writes_rejected_rows_to_the_errors_csv(repo, tmp_path):
+    path = write_csv(tmp_path / "learners.csv", [learner(1), learner(2, age="abc"), learner(3)])
+
+    result = import_file(path, repo=repo)
+    assert (result.inserted, result.rejected) == (2, 1)
+    assert repo.count_matching(StudentFilter()) == 2
+
+    with open(result.errors_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][:2] == ["Row", "Error"]
+    assert [row[0] for row in rows[1:]] == ["3"] and rows[1][2] == "Learner2"
+
+
+def test_clean_import_leaves_no_errors_csv(repo, tmp_path):
+    path = write_csv(tmp_path / "learners.csv", [learner(1)])
+    result = import_file(path, repo=repo)
+    assert result.rejected == 0 and not (tmp_path / "learners.csv.errors.csv").exists()
+
+
+def test_interrupted_import_resumes_after_the_last_batch(repo, tmp_path):
+    rows = [learner(i, age="abc" if i in (2, 6) else "16") for i in range(1, 9)]
+    path = write_csv(tmp_path / "learners.csv", rows)
+    cancel = threading.Event()
+    cancel.set()    # stop after the first committed batch
+
+    first = import_file(path, batch_size=3, cancel=cancel, repo=repo)
+    assert first.cancelled and (first.inserted, first.rejected) == (2, 1)
+
+    second = import_file(path, batch_size=3, repo=repo)
+    assert second.resumed_from == 4
+    assert (second.inserted, second.rejected) == (6, 2)
+    assert repo.count_matching(StudentFilter()) == 6
+
+    # Rejections from both runs end up in the one report
+    with open(second.errors_path, newline="", encoding="utf-8") as f:
+        assert [row[0] for row in csv.reader(f)][1:] == ["3", "7"]
+
+    with pytest.raises(AlreadyImported):
+        import_file(path, repo=repo)
+    assert import_file(path, restart=True, repo=repo).inserted == 6
+
+
+def test_unsupported_file_type_is_refused(repo, tmp_path):
+    path = tmp_path / "learners.txt"
+    path.write_text("First Name\n")
+    with pytest.raises(ImportFileError):
+        import_file(str(path), repo=repo)
@@ -0,0 +1,63 @@
+from conftest import student
+from outbox import MAX_ATTEMPTS, Outbox, OutboxFlusher
+from student_query import StudentFilter
+
+
+class RejectingRepository:
+    """Stands in for the database: rejects registrations of one last name, accepts the rest"""
+
+    def __init__(self, rejected_name):
+        self.rejected_name = rejected_name
+        self.inserted = []
+
+    def migrate(self):
+        pass
+
+    def ping(self):
+        pass
+
+    def insert_submissions(self, submissions):
+        if any(data["Last Name"] == self.rejected_name for _, data in submissions):
+            raise ValueError("rejected by the database")
+        self.inserted += [submission_id for submission_id, _ in submissions]
+
+
+def test_flush_moves_queued_submissions_into_the_database(repo, tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    for first in ("Ana", "Ben"):
+        outbox.add(student(first=first))
+
+    assert OutboxFlusher(outbox, repo).flush() == 2
+    assert outbox.counts() == (0, 0)
+    assert repo.count_matching(StudentFilter()) == 2
+
+
+def test_replayed_submission_is_registered_once(repo, tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    outbox.add(student())
+    # A flush that committed but crashed before clearing the outbox
+    repo.insert_submissions(outbox.peek())
+
+    assert OutboxFlusher(outbox, repo).flush() == 1
+    assert outbox.counts() == (0, 0)
+    assert repo.count_matching(StudentFilter()) == 1
+
+
+def test_rejected_submission_is_set_aside_after_max_attempts(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    outbox.add(student(last="Bad"))
+    good = outbox.add(student())
+    database = RejectingRepository("Bad")
+    flusher = OutboxFlusher(outbox, database)
+
+    assert flusher.flush() == 1     # the good one goes through on the single-row retry
+    assert database.inserted == [good]
+    attempts = 0
+    while outbox.counts() == (1, 0):
+        assert flusher.flush() == 0
+        attempts += 1
+        assert attempts < MAX_ATTEMPTS
+
+    assert outbox.counts() == (0, 1)
+    assert outbox.peek() == []
+    assert flusher.flush() == 0 and outbox.counts() == (0, 1)
@@ -0,0 +1,60 @@
+import pytest
+
+from db_config import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError("server has gone away")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_acquire_times_out_when_pool_is_exhausted():
+    pool = ConnectionPool(FakeConnection, size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+
+
+def test_dead_idle_connection_is_replaced():
+    pool = ConnectionPool(FakeConnection, size=1, ping_after=0)
+    dead = pool.acquire()
+    pool.release(dead)
+    dead.alive = False
+
+    conn = pool.acquire()
+    assert conn is not dead and dead.closed
+    assert pool.stats()["reconnects"] == 1
+    assert pool.stats()["creates"] == 2
+
+
+def test_stats_track_open_idle_and_in_use():
+    pool = ConnectionPool(FakeConnection, size=3)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    stats = pool.stats()
+    assert (stats["open"], stats["idle"], stats["in_use"]) == (2, 1, 1)
+    assert stats["checkouts"] == 2 and stats["size"] == 3
+
+    pool.release(second, discard=True)
+    stats = pool.stats()
+    assert (stats["open"], stats["idle"], stats["discards"]) == (1, 1, 1)
+
+
+def test_closed_pool_refuses_checkouts():
+    pool = ConnectionPool(FakeConnection)
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
@@ -0,0 +1,161 @@
+import pytest
+
+from choices import ACCEPTED, DROPPED, GRADUATED, PENDING, REJECTED
+from conftest import SCHOOL_YEAR, add_students, student
+from student_query import StudentFilter
+from student_repository import WriteConflict
+
+
+def test_changes_since_returns_rows_changed_after_the_watermark(repo):
+    changed, _ = add_students(repo, 2)
+    assert repo.changes_since(None)[0] == ()
+    _, watermark = repo.changes_since(None)
+
+    repo.drop(changed, "Moved away", repo.get(changed).version)
+    rows, new_watermark = repo.changes_since(watermark)
+
+    # Rows sharing the watermark's timestamp may come back again alongside the change
+    assert {row.id: row for row in rows}[changed].status == DROPPED
+    assert new_watermark >= watermark
+
+
+def test_changes_since_gives_up_past_the_limit(repo):
+    _, watermark = repo.changes_since(None)
+    add_students(repo, 3)
+    assert repo.changes_since(watermark, limit=2) == (None, watermark)
+
+
+def test_versioned_write_conflicts_with_a_newer_change(repo):
+    student_id = repo.insert(student())
+    read = repo.get(student_id)
+    repo.update(student_id, student(first="Juana"), read.version)
+
+    with pytest.raises(WriteConflict) as conflict:
+        repo.drop(student_id, "Moved away", read.version)
+    assert conflict.value.current.first_name == "Juana"
+    assert repo.get(student_id).status == PENDING
+
+
+def test_bulk_status_change_skips_rows_changed_since_they_were_read(repo):
+    ids = add_students(repo, 3)
+    versions = [repo.get(i).version for i in ids]
+    repo.update(ids[1], student(first="Changed"), versions[1])
+
+    assert repo.set_status(ids, REJECTED, versions) == 2
+    assert [repo.get(i).status for i in ids] == [REJECTED, PENDING, REJECTED]
+    current = {row.id: row for row in repo.get_many(ids)}
+    assert [(current[i].status, current[i].version - v) for i, v in zip(ids, versions)] == \
+        [(REJECTED, 1), (PENDING, 1), (REJECTED, 1)]
+
+
+def test_accept_fills_sections_up_to_capacity(repo):
+    repo.save_section("STEM", "Grade 11", "Einstein", 3)
+    ids = add_students(repo, 5)
+
+    result = repo.accept(ids, [repo.get(i).version for i in ids])
+    assert result.accepted == 3
+    assert sorted(result.waitlisted) == ids[3:]
+    _, sections = repo.capacities()
+    assert [row[-1] for row in sections] == [3]
+    assert [repo.get(i).status for i in ids] == [ACCEPTED] * 3 + [PENDING] * 2
+
+
+def test_accept_respects_the_strand_limit(repo):
+    repo.set_strand_capacity("ABM", 2)
+    add_students(repo, 4, strand="ABM")
+
+    result = repo.accept_matching(StudentFilter(strand="ABM"))
+    assert result.accepted == 2 and len(result.waitlisted) == 2
+    assert repo.strand_seats() == {"ABM": 0}
+    assert repo.accept_matching(StudentFilter(strand="ABM")).accepted == 0
+
+
+def test_deleted_student_is_hidden_until_restored(repo):
+    student_id = repo.insert(student())
+    version = repo.get(student_id).version
+    repo.delete(student_id, version)
+
+    assert repo.get(student_id) is None
+    assert repo.page(StudentFilter()) == []
+    with pytest.raises(WriteConflict) as conflict:
+        repo.update(student_id, student(), version)
+    assert conflict.value.current is None
+
+    assert repo.restore(student_id) and not repo.restore(student_id)
+    assert repo.get(student_id).first_name == "Juan"
+
+
+def test_changes_since_reports_deletes_as_tombstones(repo):
+    student_id = repo.insert(student())
+    _, watermark = repo.changes_since(None)
+    repo.delete(student_id, repo.get(student_id).version)
+
+    rows, _ = repo.changes_since(watermark)
+    assert (student_id,) in rows
+
+
+def test_history_lists_every_change_with_its_actor(repo):
+    student_id = repo.insert(student())
+    repo.drop(student_id, "Moved away", repo.get(student_id).version)
+    repo.delete(student_id, repo.get(student_id).version)
+
+    entries = repo.history(student_id)
+    assert len(entries) == 3
+    assert {actor for _, _, actor, _ in entries} == {"test"}
+
+
+def test_rollover_promotes_graduates_and_rolls_back(repo):
+    grade_11 = add_students(repo, 3)
+    grade_12 = add_students(repo, 2, grade="Grade 12")
+    pending = add_students(repo, 1)
+    repo.accept(grade_11 + grade_12, [repo.get(i).version for i in grade_11 + grade_12])
+
+    assert repo.rollover(SCHOOL_YEAR, dry_run=True) == (3, 2)
+    assert repo.rollover(SCHOOL_YEAR, chunk_size=2) == (3, 2)
+    assert repo.rollover(SCHOOL_YEAR) == (0, 0)
+
+    promoted = repo.get(grade_11[0])
+    assert (promoted.grade_level, promoted.status, promoted.school_year) == ("Grade 12", PENDING, SCHOOL_YEAR + 1)
+    assert repo.get(grade_12[0]).status == GRADUATED
+    assert repo.get(pending[0]).school_year == SCHOOL_YEAR
+
+    # A student changed after the rollover keeps the change
+    repo.drop(grade_11[1], "Transferred", repo.get(grade_11[1]).version)
+    assert repo.rollback_rollover(SCHOOL_YEAR, dry_run=True) == (4, 1)
+    assert repo.rollback_rollover(SCHOOL_YEAR, chunk_size=2) == (4, 1)
+
+    restored = repo.get(grade_11[0])
+    assert (restored.grade_level, restored.status, restored.school_year) == ("Grade 11", ACCEPTED, SCHOOL_YEAR)
+    assert repo.get(grade_12[0]).status == ACCEPTED
+    assert repo.get(grade_11[1]).status == DROPPED
+    assert repo.rollback_rollover(SCHOOL_YEAR) == (0, 0)
+
+
+def test_rollover_refuses_a_future_year(repo):
+    with pytest.raises(ValueError):
+        repo.rollover(SCHOOL_YEAR + 1)
+
+
+def test_promoted_students_fill_next_years_sections(repo):
+    repo.save_section("STEM", "Grade 12", "Curie", 2)
+    add_students(repo, 3, grade="Grade 12")
+    repo.accept_matching(StudentFilter(school_year=SCHOOL_YEAR))
+    add_students(repo, 3)
+    repo.accept_matching(StudentFilter(grade_level="Grade 11", school_year=SCHOOL_YEAR))
+    assert repo.rollover(SCHOOL_YEAR) == (3, 2)
+
+    # This year's Grade 12 section is full, but next year's is empty
+    result = repo.accept_matching(StudentFilter(school_year=SCHOOL_YEAR + 1))
+    assert result.accepted == 2 and len(result.waitlisted) == 1
+    assert repo.capacities(SCHOOL_YEAR + 1)[1][0][-1] == 2
+    assert repo.capacities(SCHOOL_YEAR)[1][0][-1] == 0
+
+
+def test_bulk_status_changes_refuse_archived_filters(repo):
+    add_students(repo, 2)
+    archived = StudentFilter(school_year=SCHOOL_YEAR, archived=True)
+    with pytest.raises(ValueError):
+        repo.accept_matching(archived)
+    with pytest.raises(ValueError):
+        repo.set_status_matching(archived, REJECTED)
+    assert repo.count_matching(StudentFilter(), PENDING) == 2
@@ -0,0 +1,79 @@
+import roster_cache
+from choices import ACCEPTED
+from conftest import add_students, student
+from roster_cache import RosterCache
+from student_query import StudentFilter
+
+
+def test_repeated_page_reads_are_served_from_memory(repo):
+    add_students(repo, 3)
+    cache = RosterCache(repo)
+    first = cache.page(StudentFilter())
+    repo.insert(student(first="Unseen"))    # another station; not invalidated here
+
+    assert cache.page(StudentFilter()) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_invalidation_drops_only_the_pages_a_row_touches(repo):
+    stem = add_students(repo, 2)
+    add_students(repo, 2, strand="ABM")
+    stem_filter, abm_filter = StudentFilter(strand="STEM"), StudentFilter(strand="ABM")
+    cache = RosterCache(repo)
+    cache.page(stem_filter)
+    cache.page(abm_filter)
+
+    # A STEM student accepted in place: only pages holding them go
+    cache.invalidate([repo.get(stem[0])._replace(status=ACCEPTED)])
+    cache.page(abm_filter)
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.page(stem_filter)
+    assert cache.misses == 3
+
+    # A student moving into ABM drops the ABM pages it now sorts into
+    cache.invalidate([repo.get(stem[1])._replace(strand="ABM")])
+    cache.page(abm_filter)
+    assert cache.misses == 4
+
+
+def test_pages_expire_after_the_ttl(repo, monkeypatch):
+    add_students(repo, 2)
+    clock = [1000.0]
+    monkeypatch.setattr(roster_cache.time, "monotonic", lambda: clock[0])
+    cache = RosterCache(repo, ttl=60)
+    cache.page(StudentFilter())
+
+    clock[0] += 59
+    cache.page(StudentFilter())
+    assert cache.hits == 1
+    repo.insert(student(first="Later"))
+    clock[0] += 2
+    assert len(cache.page(StudentFilter())) == 3 and cache.misses == 2
+
+
+def test_size_limit_evicts_least_recently_used_pages(repo):
+    add_students(repo, 4)
+    cache = RosterCache(repo, max_rows=5)
+    cache.page(StudentFilter(), limit=2)
+    cache.page(StudentFilter(sort="Last Name"), limit=2)
+    cache.page(StudentFilter(), limit=2)                 # now the most recently used
+    cache.page(StudentFilter(sort="Age"), limit=2)       # pushes the total past 5 rows
+
+    assert cache.evictions == 1
+    cache.page(StudentFilter(), limit=2)
+    assert cache.hits == 2
+
+
+def test_polls_only_invalidate_new_versions(repo):
+    student_id = repo.insert(student())
+    cache = RosterCache(repo)
+    _, watermark = cache.changes_since(None)
+    repo.drop(student_id, "Moved away", repo.get(student_id).version)
+
+    cache.changes_since(watermark)
+    invalidations = cache.invalidations
+    cache.page(StudentFilter())
+    cache.changes_since(watermark)     # same rows again: nothing new to drop
+    assert cache.invalidations == invalidations
+    cache.page(StudentFilter())
+    assert cache.hits == 1
@@ -0,0 +1,74 @@
+from conftest import add_students
+from student_query import StudentFilter
+from student_repository import DIALECTS
+
+SQLITE = DIALECTS["sqlite"]
+
+
+def test_page_query_by_id_continues_after_the_cursor_id():
+    sql, params = StudentFilter(school_year=2025).page_query(SQLITE, after=(7,), limit=20)
+    assert "id > %s" in sql and sql.endswith("ORDER BY id ASC LIMIT %s")
+    assert params == [2025, 7, 20]
+
+
+def test_page_query_before_walks_backwards():
+    sql, params = StudentFilter().page_query(SQLITE, before=(7,), limit=20)
+    assert "id < %s" in sql and sql.endswith("ORDER BY id DESC LIMIT %s")
+    assert params == [7, 20]
+
+
+def test_keyset_pages_cover_every_row_once(repo):
+    ids = add_students(repo, 12)
+    student_filter = StudentFilter()
+
+    seen, after = [], None
+    while True:
+        rows = repo.page(student_filter, after=after, limit=5)
+        if not rows:
+            break
+        seen += rows
+        after = rows[-1]
+    assert [row.id for row in seen] == ids
+
+    assert repo.page(student_filter, before=seen[5], limit=5) == seen[:5]
+
+
+def test_page_query_by_column_breaks_ties_on_id():
+    cursor = (7, "Ana", "Cruz")
+    sql, params = StudentFilter(sort="Last Name").page_query(SQLITE, after=cursor, limit=20)
+    assert "(last_name > %s OR (last_name = %s AND id > %s))" in sql
+    assert "ORDER BY last_name ASC, id ASC" in sql
+    assert params == ["Cruz", "Cruz", 7, 20]
+
+
+def test_page_query_descending_walks_the_other_way():
+    cursor = (7, "Ana", "Cruz")
+    sql, _ = StudentFilter(sort="Last Name", descending=True).page_query(SQLITE, after=cursor)
+    assert "last_name < %s" in sql and "ORDER BY last_name DESC, id DESC" in sql
+
+
+def test_filters_become_parameterized_clauses():
+    student_filter = StudentFilter(name="Cru, An", strand="STEM", status="Pending", school_year=2025)
+    clauses, params = student_filter.where(SQLITE)
+    assert "strand = %s" in clauses and "status = %s" in clauses
+    assert params[:3] == [2025, "Pending", "STEM"]
+    assert "Cru" in " ".join(map(str, params)) and "An" in " ".join(map(str, params))
+
+
+def test_sorted_filtered_pages_match_a_full_sort(repo):
+    for last in ("Santos", "Cruz", "Reyes"):
+        add_students(repo, 4, last=last)
+    add_students(repo, 3, last="Cruz", strand="ABM")
+    student_filter = StudentFilter(sort="Last Name", descending=True, strand="STEM")
+
+    seen, after = [], None
+    while True:
+        rows = repo.page(student_filter, after=after, limit=5)
+        if not rows:
+            break
+        seen += rows
+        after = rows[-1]
+    assert len(seen) == 12 and {row.strand for row in seen} == {"STEM"}
+    assert seen == sorted(seen, key=lambda row: (row.last_name, row.id), reverse=True)
+
+    assert [row.last_name for row in repo.page(StudentFilter(name="Cru", strand="STEM"))] == ["Cruz"] * 4
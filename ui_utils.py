@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 
+import metrics
+
 # MODERN COLOR SCHEME
 PRIMARY_BG = "#F8F9FA"
 SECONDARY_BG = "#FFFFFF"
@@ -31,10 +33,14 @@ def center_window(win, w, h):
 
 def create_rounded_button(parent, text, command, color=ACCENT_COLOR, hover_color=ACCENT_HOVER, width=25):
     """Create a modern styled button"""
+    # Timed under the handler's name, or the button text (minus emoji) for lambdas
+    handler = getattr(command, "__name__", "<lambda>")
+    if handler == "<lambda>":
+        handler = text.encode("ascii", "ignore").decode().strip()
     btn = tk.Button(
         parent,
         text=text,
-        command=command,
+        command=metrics.timed("tk_callback_seconds", command, handler=handler),
         font=FONT_BUTTON,
         bg=color,
         fg="white",
@@ -119,6 +125,14 @@ def create_combobox_field(parent, label_text, values, width=30):
     return combo
 
 
+def clear_field(widget):
+    """Empty an entry or combobox made by the helpers above"""
+    if isinstance(widget, ttk.Combobox):
+        widget.set("")
+    else:
+        widget.delete(0, tk.END)
+
+
 def create_header(parent, text):
     """Create a header label"""
     header = tk.Label(
@@ -169,3 +183,26 @@ def style_treeview():
 
     style.map('Treeview', background=[('selected', ACCENT_COLOR)])
     style.map('Treeview.Heading', background=[('active', ACCENT_HOVER)])
+
+
+def create_filter_entry(parent, label_text, width=15):
+    """Create a compact labeled entry for a filter bar"""
+    tk.Label(parent, text=label_text, font=FONT_NORMAL, bg=PRIMARY_BG,
+             fg=TEXT_PRIMARY).pack(side=tk.LEFT, padx=(10, 4))
+
+    entry = tk.Entry(parent, font=FONT_NORMAL, relief=tk.FLAT, width=width, bg="white", fg=TEXT_PRIMARY,
+                     highlightbackground=BORDER_COLOR, highlightthickness=1)
+    entry.pack(side=tk.LEFT, ipady=4)
+    return entry
+
+
+def create_filter_combobox(parent, label_text, values, width=10):
+    """Create a compact labeled combobox for a filter bar, defaulting to "All" """
+    tk.Label(parent, text=label_text, font=FONT_NORMAL, bg=PRIMARY_BG,
+             fg=TEXT_PRIMARY).pack(side=tk.LEFT, padx=(10, 4))
+
+    combo = ttk.Combobox(parent, values=["All"] + list(values), font=FONT_NORMAL,
+                         state="readonly", width=width)
+    combo.set("All")
+    combo.pack(side=tk.LEFT)
+    return combo
@@ -0,0 +1,56 @@
+from choices import GENDERS, GRADE_LEVELS, STRAND_CODES
+
+# Wizard step 1 fields, in form order
+PERSONAL_FIELDS = ["First Name", "Last Name", "Grade Level", "Gender", "Age", "Guardian"]
+
+MIN_AGE = 1
+MAX_AGE = 100
+
+
+class ValidationError(ValueError):
+    """A registration that breaks the wizard's rules; ``title`` suits a dialog"""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+
+
+def _choice(value, allowed):
+    """Canonical spelling of ``value`` from ``allowed``, ignoring case; None if absent"""
+    for option in allowed:
+        if value.lower() == option.lower():
+            return option
+    return None
+
+
+def validate_student(data, require_strand=True):
+    """Check one registration and return a cleaned copy; raises ValidationError
+
+    These are the wizard's rules (every field required, age 1-100, grade,
+    gender and strand from the allowed lists) so bulk imports and the
+    registration form accept exactly the same records.
+    """
+    fields = PERSONAL_FIELDS + (["Strand"] if require_strand else [])
+    cleaned = {field: str(data.get(field) or "").strip() for field in fields}
+
+    if not all(cleaned.values()):
+        raise ValidationError("Incomplete Form", "Please fill in all required fields!")
+
+    age_str = cleaned["Age"]
+    if not age_str.isdigit():
+        raise ValidationError("Invalid Age", "Please enter a valid number for Age!")
+
+    age = int(age_str)
+    if age < MIN_AGE or age > MAX_AGE:
+        raise ValidationError("Invalid Age", f"Please enter a valid age ({MIN_AGE}-{MAX_AGE})!")
+    cleaned["Age"] = age
+
+    for field, allowed in (("Grade Level", GRADE_LEVELS), ("Gender", GENDERS), ("Strand", STRAND_CODES)):
+        if field not in cleaned:
+            continue
+        value = _choice(cleaned[field], allowed)
+        if value is None:
+            raise ValidationError(f"Invalid {field}", f"{field} must be one of: {', '.join(allowed)}")
+        cleaned[field] = value
+
+    return cleaned